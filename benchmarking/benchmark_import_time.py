@@ -0,0 +1,45 @@
+# python3 -m pytest benchmarking/benchmark_import_time.py
+import subprocess
+import sys
+
+
+def import_in_fresh_interpreter(module):
+    subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+
+
+def construct_linker_in_fresh_interpreter():
+    code = """
+import pandas as pd
+from splink.duckdb.linker import DuckDBLinker
+import splink.duckdb.comparison_library as cl
+
+settings = {
+    "link_type": "dedupe_only",
+    "comparisons": [cl.exact_match("first_name"), cl.exact_match("surname")],
+}
+df = pd.DataFrame({"unique_id": [1], "first_name": ["a"], "surname": ["b"]})
+DuckDBLinker(df, settings)
+"""
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_import_python(benchmark):
+    # Baseline: the cost of starting the interpreter
+    benchmark.pedantic(
+        import_in_fresh_interpreter, args=("sys",), rounds=10, warmup_rounds=1
+    )
+
+
+def test_import_duckdb_linker(benchmark):
+    benchmark.pedantic(
+        import_in_fresh_interpreter,
+        args=("splink.duckdb.linker",),
+        rounds=10,
+        warmup_rounds=1,
+    )
+
+
+def test_construct_duckdb_linker(benchmark):
+    benchmark.pedantic(
+        construct_linker_in_fresh_interpreter, rounds=10, warmup_rounds=1
+    )
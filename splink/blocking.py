@@ -71,6 +71,7 @@ class BlockingRule:
         self.blocking_rule_sql = blocking_rule_sql
         self.preceding_rules: List[BlockingRule] = []
         self.sqlglot_dialect = sqlglot_dialect
+        self._parsed_join_condition_cache = None
 
     @property
     def sql_dialect(self):
@@ -128,10 +129,19 @@ class BlockingRule:
 
     @property
     def _parsed_join_condition(self):
-        br = self.blocking_rule_sql
-        return parse_one("INNER JOIN r", into=Join).on(
-            br, dialect=self.sqlglot_dialect
-        )  # using sqlglot==11.4.1
+        # Parsing is slow, so the parsed join is cached on the rule, and is only
+        # recomputed if the blocking rule or dialect changes.  join_condition
+        # modifies the join, so callers must copy it first
+        key = (self.blocking_rule_sql, self.sqlglot_dialect)
+        cached = self._parsed_join_condition_cache
+        if cached is None or cached[0] != key:
+            br = self.blocking_rule_sql
+            join = parse_one("INNER JOIN r", into=Join).on(
+                br, dialect=self.sqlglot_dialect
+            )  # using sqlglot==11.4.1
+            cached = (key, join)
+            self._parsed_join_condition_cache = cached
+        return cached[1]
 
     @property
     def _equi_join_conditions(self):
@@ -148,7 +158,7 @@ class BlockingRule:
                 del c.args["table"]
             return tree
 
-        j = self._parsed_join_condition
+        j = self._parsed_join_condition.copy()
 
         source_keys, join_keys, _ = join_condition(j)
 
@@ -171,7 +181,7 @@ class BlockingRule:
         # or "complex join conditions", but to capture the idea these are
         # filters that have to be applied post-creation of the pairwise record
         # comparison i've opted to call it a filter
-        j = self._parsed_join_condition
+        j = self._parsed_join_condition.copy()
         _, _, filter_condition = join_condition(j)
         if not filter_condition:
             return ""
@@ -1,6 +1,7 @@
 import logging
-from collections import UserDict
+from collections import OrderedDict, UserDict
 from copy import copy
+from weakref import WeakSet
 
 from .splink_dataframe import SplinkDataFrame
 
@@ -13,25 +14,74 @@ class CacheDictWithLogging(UserDict):
         self.executed_queries = []
         self.queries_retrieved_from_cache = []
 
+        # Optional budget on the total size of the tables in the cache.  When it is
+        # exceeded, the least recently used tables created by Splink are dropped
+        # from the database, to be recomputed if they are needed again.
+        # Tables cached under their templated name (such as term frequency tables),
+        # and those in pinned_templated_names, are never evicted.  Nor are tables
+        # for which a SplinkDataFrame is still held outside the cache, since they
+        # are in use by a running algorithm or by the user
+        self.max_rows = None
+        self.max_bytes = None
+        self.pinned_templated_names = {
+            "__splink__df_concat",
+            "__splink__df_concat_with_tf",
+        }
+        self.evicted_tables = []
+        # Physical name -> (row count, estimated bytes), for tables in the cache
+        self._table_sizes = {}
+        # Physical names of tables in the cache, least recently used first
+        self._recently_used = OrderedDict()
+        # Physical name -> the SplinkDataFrames for the table handed out by the
+        # cache, held weakly so that a table is in use while any of them is alive
+        self._handed_out = {}
+
     def __getitem__(self, key) -> SplinkDataFrame:
         splink_dataframe = super().__getitem__(key)
 
         # Return a copy so that user can modify physical or templated name
         # without modifying the version in the cache
-        return copy(splink_dataframe)
+        splink_dataframe = copy(splink_dataframe)
+        self._track(splink_dataframe)
+        return splink_dataframe
 
     def __setitem__(self, key, value):
         if not isinstance(value, SplinkDataFrame):
             raise TypeError("Cached items must be of type SplinkDataFrame")
 
-        super().__setitem__(key, value)
+        # The cache keeps its own copy, so that value is only alive while the
+        # caller holds it
+        super().__setitem__(key, copy(value))
+        self._track(value)
 
         logger.log(
             1, f"Setting cache for {key}" f" with physical name {value.physical_name}"
         )
 
+        self._mark_used(value.physical_name)
+        self._evict_to_budget()
+
+    def _track(self, splink_dataframe):
+        physical_name = splink_dataframe.physical_name
+        self._handed_out.setdefault(physical_name, WeakSet()).add(splink_dataframe)
+
+    def _in_use(self, physical_name):
+        return len(self._handed_out.get(physical_name, ())) > 0
+
+    def __delitem__(self, key):
+        physical_name = self.data[key].physical_name
+        super().__delitem__(key)
+
+        if not any(df.physical_name == physical_name for df in self.data.values()):
+            self._table_sizes.pop(physical_name, None)
+            self._recently_used.pop(physical_name, None)
+            self._handed_out.pop(physical_name, None)
+
     def invalidate_cache(self):
         self.data = dict()
+        self._table_sizes = {}
+        self._recently_used = OrderedDict()
+        self._handed_out = {}
 
     def get_with_logging(self, key):
         df = self[key]
@@ -39,10 +89,92 @@ class CacheDictWithLogging(UserDict):
         logger.debug(
             f"Using cache for template name {key}" f" with physical name {phy_name}"
         )
-        self.queries_retrieved_from_cache.append(df)
+        # Record a copy, so the record does not keep the table in use
+        self.queries_retrieved_from_cache.append(copy(df))
+        self._mark_used(phy_name)
 
         return df
 
+    def _mark_used(self, physical_name):
+        self._recently_used[physical_name] = None
+        self._recently_used.move_to_end(physical_name)
+
+    def set_budget(self, max_rows=None, max_bytes=None):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self._evict_to_budget()
+
+    def _is_evictable(self, physical_name):
+        if self._in_use(physical_name):
+            return False
+        for key, df in self.data.items():
+            if df.physical_name != physical_name:
+                continue
+            if not df.created_by_splink or key != physical_name:
+                return False
+            if df.templated_name in self.pinned_templated_names:
+                return False
+        return True
+
+    def _table_size(self, physical_name):
+        if physical_name not in self._table_sizes:
+            df = next(
+                df for df in self.data.values() if df.physical_name == physical_name
+            )
+            self._table_sizes[physical_name] = df.linker._table_size_estimate(
+                physical_name
+            )
+        return self._table_sizes[physical_name]
+
+    def _over_budget(self, total_rows, total_bytes):
+        if self.max_rows is not None and total_rows > self.max_rows:
+            return True
+        if self.max_bytes is not None and total_bytes > self.max_bytes:
+            return True
+        return False
+
+    def _evict_to_budget(self):
+        if self.max_rows is None and self.max_bytes is None:
+            return
+
+        # Tables whose size the backend cannot estimate cheaply are not counted
+        sizes = {name: self._table_size(name) for name in self._recently_used}
+        total_rows = sum(rows or 0 for rows, _ in sizes.values())
+        total_bytes = sum(num_bytes or 0 for _, num_bytes in sizes.values())
+
+        for physical_name in list(self._recently_used):
+            if not self._over_budget(total_rows, total_bytes):
+                break
+            if not self._is_evictable(physical_name):
+                continue
+
+            logger.debug(f"Evicting {physical_name} from cache to stay within budget")
+            df = self.data[physical_name]
+            df.drop_table_from_database_and_remove_from_cache()
+            self.evicted_tables.append(df)
+
+            rows, num_bytes = sizes[physical_name]
+            total_rows -= rows or 0
+            total_bytes -= num_bytes or 0
+
+    @property
+    def statistics(self):
+        """Counts of cache hits, misses and evictions, and the size of the tables
+        currently in the cache"""
+        sizes = [
+            self._table_sizes[name]
+            for name in self._recently_used
+            if name in self._table_sizes
+        ]
+        return {
+            "hits": len(self.queries_retrieved_from_cache),
+            "misses": len(self.executed_queries),
+            "evictions": len(self.evicted_tables),
+            "tables": len(self._recently_used),
+            "rows": sum(rows or 0 for rows, _ in sizes),
+            "bytes": sum(num_bytes or 0 for _, num_bytes in sizes),
+        }
+
     def reset_executed_queries_tracker(self):
         self.executed_queries = []
 
@@ -1,6 +1,7 @@
 import json
 import math
 import os
+from importlib.util import find_spec
 
 import numpy as np
 import pandas as pd
@@ -8,12 +9,8 @@ import pandas as pd
 from .misc import read_resource
 from .waterfall_chart import records_to_waterfall_data
 
-altair_installed = True
-
-try:
-    import altair as alt
-except ImportError:
-    altair_installed = False
+# altair is slow to import, so is only imported when a chart is first created
+altair_installed = find_spec("altair") is not None
 
 
 def load_chart_definition(filename):
@@ -34,6 +31,8 @@ def altair_or_json(chart_dict, as_dict=False):
     if altair_installed:
         if not as_dict:
             try:
+                import altair as alt
+
                 return alt.Chart.from_dict(chart_dict)
 
             except ModuleNotFoundError:
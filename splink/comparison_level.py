@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 import math
 import re
+from functools import lru_cache
 from statistics import median
 from textwrap import dedent
 from typing import TYPE_CHECKING
@@ -21,7 +22,7 @@ from .misc import (
     join_list_with_commas_final_and,
     match_weight_to_bayes_factor,
 )
-from .parse_sql import get_columns_used_from_sql
+from .parse_sql import get_columns_used_from_sql, parse_one_cached
 from .sql_transform import sqlglot_tree_signature
 
 # https://stackoverflow.com/questions/39740632/python-type-hinting-without-cyclic-imports
@@ -34,7 +35,8 @@ logger = logging.getLogger(__name__)
 def _is_exact_match(sql_syntax_tree):
     signature = sqlglot_tree_signature(sql_syntax_tree)
 
-    if signature != sqlglot_tree_signature(sqlglot.parse_one("col_l = col_r")):
+    exact_match_tree = parse_one_cached("col_l = col_r", copy=False)
+    if signature != sqlglot_tree_signature(exact_match_tree):
         return False
 
     identifiers = []
@@ -80,6 +82,16 @@ def _get_and_subclauses(expr: sqlglot.Expression):
     return [expr]
 
 
+@lru_cache(maxsize=4096)
+def _and_subclauses_of_condition(sql_condition, sql_dialect):
+    # The 'AND' subclauses of the normalised sql condition, memoised because
+    # normalising is slow and is repeated for every level in every comparison.
+    # The returned expressions are shared, so must be copied before modification
+    sql_syntax_tree = parse_one_cached(sql_condition.lower(), sql_dialect)
+    sql_cnf = simplify(normalize(sql_syntax_tree))
+    return tuple(_get_and_subclauses(sql_cnf))
+
+
 def _default_m_values(num_levels):
     proportion_exact_match = 0.95
     remainder = 1 - proportion_exact_match
@@ -430,7 +442,7 @@ class ComparisonLevel:
         if dialect is None:
             dialect = "spark"
         try:
-            sqlglot.parse_one(sql, read=dialect)
+            parse_one_cached(sql, dialect, copy=False)
         except sqlglot.ParseError as e:
             raise ValueError(f"Error parsing sql_statement:\n{sql}") from e
 
@@ -493,12 +505,7 @@ class ComparisonLevel:
         if self._is_else_level:
             return False
 
-        sql_syntax_tree = sqlglot.parse_one(
-            self.sql_condition.lower(), read=self.sql_dialect
-        )
-        sql_cnf = simplify(normalize(sql_syntax_tree))
-
-        exprs = _get_and_subclauses(sql_cnf)
+        exprs = _and_subclauses_of_condition(self.sql_condition, self.sql_dialect)
         for expr in exprs:
             if not _is_exact_match(expr):
                 return False
@@ -506,12 +513,7 @@ class ComparisonLevel:
 
     @property
     def _exact_match_colnames(self):
-        sql_syntax_tree = sqlglot.parse_one(
-            self.sql_condition.lower(), read=self.sql_dialect
-        )
-        sql_cnf = simplify(normalize(sql_syntax_tree))
-
-        exprs = _get_and_subclauses(sql_cnf)
+        exprs = _and_subclauses_of_condition(self.sql_condition, self.sql_dialect)
         for expr in exprs:
             if not _is_exact_match(expr):
                 raise ValueError(
@@ -520,7 +522,7 @@ class ComparisonLevel:
 
         cols = []
         for expr in exprs:
-            col = _exact_match_colname(expr)
+            col = _exact_match_colname(expr.copy())
             cols.append(col)
         return cols
 
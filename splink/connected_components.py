@@ -13,6 +13,10 @@ import logging
 import time
 from typing import TYPE_CHECKING
 
+import numpy as np
+import pandas as pd
+
+from .misc import ascii_uid
 from .splink_dataframe import SplinkDataFrame
 from .unique_id_concat import (
     _composite_unique_id_from_edges_sql,
@@ -404,41 +408,343 @@ def _exit_query(
         """
 
 
-def solve_connected_components(
+def _union_find_roots(
+    nodes_l: np.ndarray, nodes_r: np.ndarray, num_nodes: int, parent=None
+):
+    """Vectorised union-find over integer node ids 0..num_nodes-1.
+
+    Each round fully compresses every path, so that each node points directly at
+    the root of its tree, then hooks the larger of the two roots of each edge
+    that still spans two trees onto the smaller.  Roots are therefore always the
+    minimum node id of their component.  Edges within a single tree are
+    discarded as the algorithm proceeds.
+
+    If given, parent is the result of a previous call, to which the edges are
+    added.
+    """
+    if parent is None:
+        parent = np.arange(num_nodes)
+
+    while True:
+        # Path compression by pointer jumping
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+        roots_l = parent[nodes_l]
+        roots_r = parent[nodes_r]
+        spanning = roots_l != roots_r
+        if not spanning.any():
+            return parent
+
+        nodes_l = np.minimum(roots_l[spanning], roots_r[spanning])
+        nodes_r = np.maximum(roots_l[spanning], roots_r[spanning])
+        np.minimum.at(parent, nodes_r, nodes_l)
+
+
+def _solve_representatives_union_find(
+    linker: "Linker", edges_table: SplinkDataFrame
+) -> SplinkDataFrame:
+    """Solve connected components in memory, by pulling the edges table into
+    numpy arrays and running union-find.
+
+    Returns a representatives table with the same node_id and representative
+    columns as the SQL algorithm.  As the node ids are factorised in sorted order,
+    the representative of each component is its minimum node id, as in SQL.
+    """
+    start_time = time.time()
+
+    edges = edges_table.as_pandas_dataframe()
+    num_edges = len(edges)
+    node_codes, node_ids = pd.factorize(
+        pd.concat([edges["unique_id_l"], edges["unique_id_r"]], ignore_index=True),
+        sort=True,
+    )
+
+    roots = _union_find_roots(
+        node_codes[:num_edges], node_codes[num_edges:], len(node_ids)
+    )
+
+    representatives = pd.DataFrame(
+        {"node_id": node_ids, "representative": node_ids.take(roots)}
+    )
+    logger.log(15, f"    Union-find time: {time.time() - start_time} seconds")
+
+    return linker.register_table(
+        representatives, f"__splink__df_representatives_{ascii_uid(8)}"
+    )
+
+
+def _threshold_column_name(threshold_match_probability):
+    threshold_str = np.format_float_positional(threshold_match_probability, trim="-")
+    return "cluster_id_" + threshold_str.replace(".", "_")
+
+
+def solve_connected_components_at_thresholds(
     linker: "Linker",
-    edges_table: SplinkDataFrame,
     df_predict: SplinkDataFrame,
     concat_with_tf: SplinkDataFrame,
-    pairwise_output: bool = False,
-    filter_pairwise_format_for_clusters: bool = False,
-    _generated_graph: bool = False,
-):
-    """Connected Components main algorithm.
+    threshold_match_probabilities: list[float],
+) -> SplinkDataFrame:
+    """Cluster at several match probability thresholds in a single pass.
 
-    This function helps cluster your linked (or deduped) records
-    into single groups, which can then be more easily visualised.
+    Edges are added to an in-memory union-find in descending order of match
+    probability, Kruskal-style, and the cluster of every node is recorded as each
+    threshold is passed.  As with `solve_connected_components`, the cluster id is
+    the minimum node id in each cluster.
 
-    Args:
-        linker:
-            Splink linker object. For more, see splink.linker.
+    Returns:
+        SplinkDataFrame: The records of concat_with_tf, with one cluster id column
+        per threshold, named e.g. cluster_id_0_95 for a threshold of 0.95
+    """
+    uid_cols = linker._settings_obj._unique_id_input_columns
+    uid_concat_edges_l = _composite_unique_id_from_edges_sql(uid_cols, "l")
+    uid_concat_edges_r = _composite_unique_id_from_edges_sql(uid_cols, "r")
+    uid_concat_nodes = _composite_unique_id_from_nodes_sql(uid_cols)
 
-        edges_table (SplinkDataFrame):
-            Splink dataframe containing our edges dataframe to be connected.
+    thresholds = sorted(set(threshold_match_probabilities), reverse=True)
 
-        generated_graph (bool):
-            Specifies whether the input df is a NetworkX graph, or part of
-            a splink deduping or linking job.
+    sql = f"""
+    select {uid_concat_nodes} as node_id
+    from {concat_with_tf.physical_name}
+    """
+    nodes_df = linker._sql_to_splink_dataframe_checking_cache(
+        sql, "__splink__df_cluster_nodes"
+    )
+    node_ids = nodes_df.as_pandas_dataframe()["node_id"]
+    nodes_df.drop_table_from_database_and_remove_from_cache()
+
+    sql = f"""
+    select
+        {uid_concat_edges_l} as unique_id_l,
+        {uid_concat_edges_r} as unique_id_r,
+        match_probability
+    from {df_predict.physical_name}
+    where match_probability >= {thresholds[-1]}
+    """
+    edges_df = linker._sql_to_splink_dataframe_checking_cache(
+        sql, "__splink__df_cluster_edges"
+    )
+    edges = edges_df.as_pandas_dataframe()
+    edges_df.drop_table_from_database_and_remove_from_cache()
+
+    node_ids = pd.Index(node_ids).sort_values()
+    edges = edges.sort_values("match_probability", ascending=False)
+    nodes_l = node_ids.get_indexer(edges["unique_id_l"])
+    nodes_r = node_ids.get_indexer(edges["unique_id_r"])
+    match_probabilities = edges["match_probability"].to_numpy()
+
+    representatives = pd.DataFrame({"node_id": node_ids})
+    parent = None
+    edges_added = 0
+    for threshold in thresholds:
+        # Edges are sorted, so those at or above this threshold, not yet added,
+        # are a contiguous block
+        edges_to_add = np.searchsorted(-match_probabilities, -threshold, side="right")
+        parent = _union_find_roots(
+            nodes_l[edges_added:edges_to_add],
+            nodes_r[edges_added:edges_to_add],
+            len(node_ids),
+            parent,
+        )
+        edges_added = edges_to_add
+        representatives[_threshold_column_name(threshold)] = node_ids.take(parent)
+
+    representatives = linker.register_table(
+        representatives, f"__splink__df_representatives_{ascii_uid(8)}"
+    )
+
+    # One column per distinct threshold, in the order they were given
+    cluster_cols = ", ".join(
+        f"c.{_threshold_column_name(t)}"
+        for t in dict.fromkeys(threshold_match_probabilities)
+    )
+    uid_concat = _composite_unique_id_from_nodes_sql(uid_cols, "n")
+    sql = f"""
+    select {cluster_cols}, n.*
+    from {representatives.physical_name} as c
+    left join {concat_with_tf.physical_name} as n
+    on {uid_concat} = c.node_id
+    """
+    clusters = linker._sql_to_splink_dataframe_checking_cache(
+        sql, "__splink__df_clusters_at_thresholds"
+    )
+    # Registered tables are not marked as created by Splink
+    representatives.drop_table_from_database_and_remove_from_cache(
+        force_non_splink_table=True
+    )
+    return clusters
 
-            This is used for testing against NetworkX and only impacts how
-            our nodes table is generated as this can be shortcut using
-            __splink__df_concat_with_tf.
+
+def cluster_incrementally(
+    linker: "Linker",
+    df_clusters: SplinkDataFrame,
+    df_new_edges: SplinkDataFrame,
+    threshold_match_probability: float = None,
+) -> SplinkDataFrame:
+    """Update an existing clustering with new edges, without reclustering the
+    whole graph.
+
+    Each endpoint of the new edges is replaced by its existing cluster id (or by
+    its own id, if it is a record that is not yet clustered), and union-find is
+    run in memory over these cluster ids only.  Clusters that are joined by a new
+    edge take the minimum of their cluster ids, so the result is the same as
+    reclustering all edges, and records in clusters not touched by a new edge
+    keep their cluster id.
 
     Returns:
-        SplinkDataFrame: A dataframe containing the connected components list
-        for your link or dedupe job.
+        SplinkDataFrame: The records of df_clusters with updated cluster ids, plus
+        a row for each record that appears only in the new edges.  The columns of
+        these records are taken from the linker's input records, and are null
+        (other than the cluster id and unique id columns) for records that are
+        not among them
+    """
+    start_time = time.time()
+
+    uid_cols = linker._settings_obj._unique_id_input_columns
+    uid_concat_edges_l = _composite_unique_id_from_edges_sql(uid_cols, "l", "e")
+    uid_concat_edges_r = _composite_unique_id_from_edges_sql(uid_cols, "r", "e")
+    uid_concat_l = _composite_unique_id_from_nodes_sql(uid_cols, "cl")
+    uid_concat_r = _composite_unique_id_from_nodes_sql(uid_cols, "cr")
+
+    uid_select_cols = [f"e.{c.name_l} as {c.name_l}" for c in uid_cols]
+    uid_select_cols += [f"e.{c.name_r} as {c.name_r}" for c in uid_cols]
 
+    if threshold_match_probability is not None:
+        match_probability_condition = (
+            f"where e.match_probability >= {threshold_match_probability}"
+        )
+    else:
+        match_probability_condition = ""
+
+    sql = f"""
+    select
+        {", ".join(uid_select_cols)},
+        coalesce(cl.cluster_id, {uid_concat_edges_l}) as cluster_id_l,
+        coalesce(cr.cluster_id, {uid_concat_edges_r}) as cluster_id_r,
+        case when cl.cluster_id is null then 1 else 0 end as is_new_l,
+        case when cr.cluster_id is null then 1 else 0 end as is_new_r
+    from {df_new_edges.physical_name} as e
+    left join {df_clusters.physical_name} as cl
+    on {uid_concat_l} = {uid_concat_edges_l}
+    left join {df_clusters.physical_name} as cr
+    on {uid_concat_r} = {uid_concat_edges_r}
+    {match_probability_condition}
     """
+    edges_df = linker._sql_to_splink_dataframe_checking_cache(
+        sql, "__splink__df_new_cluster_edges"
+    )
+    edges = edges_df.as_pandas_dataframe()
+    edges_df.drop_table_from_database_and_remove_from_cache()
+
+    num_edges = len(edges)
+    cluster_codes, cluster_ids = pd.factorize(
+        pd.concat([edges["cluster_id_l"], edges["cluster_id_r"]], ignore_index=True),
+        sort=True,
+    )
+    roots = _union_find_roots(
+        cluster_codes[:num_edges], cluster_codes[num_edges:], len(cluster_ids)
+    )
+    new_cluster_ids = cluster_ids.take(roots)
+    new_cluster_id_lookup = pd.Series(new_cluster_ids, index=cluster_ids)
+
+    # Records that are not yet clustered are their own cluster, so the cluster id
+    # computed above is also their node id
+    new_nodes = []
+    for l_or_r in ["l", "r"]:
+        is_new = edges[f"is_new_{l_or_r}"] == 1
+        nodes = pd.DataFrame(
+            {
+                c.unquote().name: edges.loc[
+                    is_new, getattr(c.unquote(), f"name_{l_or_r}")
+                ]
+                for c in uid_cols
+            }
+        )
+        nodes["cluster_id"] = edges.loc[is_new, f"cluster_id_{l_or_r}"]
+        new_nodes.append(nodes)
+    new_nodes = pd.concat(new_nodes, ignore_index=True).drop_duplicates()
+    new_nodes["cluster_id"] = new_cluster_id_lookup[new_nodes["cluster_id"]].values
+
+    logger.log(15, f"    Incremental union-find time: {time.time() - start_time}")
+
+    updates = pd.DataFrame(
+        {"cluster_id": cluster_ids, "new_cluster_id": new_cluster_ids}
+    )
+    updates = updates[updates["cluster_id"] != updates["new_cluster_id"]]
+
+    uid = ascii_uid(8)
+    registered_dfs = []
+    record_cols = [c for c in df_clusters.columns if c.unquote().name != "cluster_id"]
+    record_col_names = [c.name for c in record_cols]
+    select_record_cols = ", ".join(f"c.{name}" for name in record_col_names)
+
+    if len(updates) > 0:
+        updates_df = linker.register_table(
+            updates, f"__splink__df_cluster_id_updates_{uid}"
+        )
+        registered_dfs.append(updates_df)
+        sql = f"""
+        select
+            coalesce(u.new_cluster_id, c.cluster_id) as cluster_id,
+            {select_record_cols}
+        from {df_clusters.physical_name} as c
+        left join {updates_df.physical_name} as u
+        on c.cluster_id = u.cluster_id
+        """
+    else:
+        sql = f"""
+        select c.cluster_id, {select_record_cols}
+        from {df_clusters.physical_name} as c
+        """
+
+    if len(new_nodes) > 0:
+        new_nodes_df = linker.register_table(
+            new_nodes, f"__splink__df_new_cluster_nodes_{uid}"
+        )
+        registered_dfs.append(new_nodes_df)
+        # The columns of new records are taken from the linker's input records,
+        # as for cluster_pairwise_predictions_at_threshold
+        concat_with_tf = linker._initialise_df_concat_with_tf()
+        uid_col_names = [c.name for c in uid_cols]
+        concat_col_names = [c.name for c in concat_with_tf.columns]
+
+        def new_node_col(name):
+            if name in uid_col_names:
+                return f"n.{name}"
+            if name in concat_col_names:
+                return f"r.{name}"
+            return f"null as {name}"
+
+        select_new_node_cols = ", ".join(new_node_col(n) for n in record_col_names)
+        uid_concat_n = _composite_unique_id_from_nodes_sql(uid_cols, "n")
+        uid_concat_r = _composite_unique_id_from_nodes_sql(uid_cols, "r")
+        sql += f"""
+        union all
+        select n.cluster_id, {select_new_node_cols}
+        from {new_nodes_df.physical_name} as n
+        left join {concat_with_tf.physical_name} as r
+        on {uid_concat_n} = {uid_concat_r}
+        """
+
+    clusters = linker._sql_to_splink_dataframe_checking_cache(
+        sql, "__splink__df_clusters_incremental"
+    )
+    for registered_df in registered_dfs:
+        registered_df.drop_table_from_database_and_remove_from_cache(
+            force_non_splink_table=True
+        )
+    return clusters
 
+
+def _solve_representatives_label_propagation(
+    linker: "Linker",
+    edges_table: SplinkDataFrame,
+    concat_with_tf: SplinkDataFrame,
+    _generated_graph: bool = False,
+) -> SplinkDataFrame:
     input_dfs = [edges_table]
     if _generated_graph:
         edges_table.templated_name = "__splink__df_connected_components_df"
@@ -515,6 +821,253 @@ def solve_connected_components(
         end_time = time.time()
         logger.log(15, f"    Iteration time: {end_time - start_time} seconds")
 
+    return representatives
+
+
+def _star_edges_initial_sql():
+    """SQL to orient each edge from the larger to the smaller node id, removing
+    self links, for the large-star/small-star algorithm.
+
+    Throughout the algorithm, each row (node_id, parent) is an undirected edge
+    with node_id > parent.
+    """
+
+    sql = """
+    select distinct
+        case when unique_id_l > unique_id_r
+            then unique_id_l else unique_id_r end as node_id,
+        case when unique_id_l > unique_id_r
+            then unique_id_r else unique_id_l end as parent
+    from __splink__df_connected_components_df
+    where unique_id_l <> unique_id_r
+    """
+
+    return sql
+
+
+def _large_star_sql(edges_name):
+    """SQL for the large-star operation.
+
+    Each node u is connected to m(u), the minimum of itself and its neighbours,
+    and every larger neighbour of u is reattached to m(u).  Since the minimum of
+    u's neighbours is one of its smaller neighbours, m(u) is found by grouping on
+    the edges for which u is the larger node.
+    """
+
+    sql = f"""
+    select distinct
+        e.node_id,
+        coalesce(m.min_parent, e.parent) as parent
+    from {edges_name} as e
+    left join ({_star_min_parents_sql(edges_name)}) as m
+    on e.parent = m.node_id
+    """
+
+    return sql
+
+
+def _star_min_parents_sql(edges_name):
+    """SQL to find the minimum smaller neighbour of each node"""
+
+    sql = f"""
+    select node_id, min(parent) as min_parent
+    from {edges_name}
+    group by node_id
+    """
+
+    return sql
+
+
+def _small_star_sql(edges_name, min_parents_name):
+    """SQL for the small-star operation.
+
+    Each node u, together with all of its smaller neighbours, is attached to the
+    minimum of those neighbours.
+    """
+
+    sql = f"""
+    select
+        e.parent as node_id,
+        m.min_parent as parent
+    from {edges_name} as e
+    inner join {min_parents_name} as m
+    on e.node_id = m.node_id
+    where e.parent <> m.min_parent
+
+    UNION
+
+    select node_id, min_parent as parent
+    from {min_parents_name}
+    """
+
+    return sql
+
+
+def _star_edges_exit_condition_sql(edges_name):
+    """SQL exit condition for the large-star/small-star algorithm.
+
+    The algorithm has converged when the edges form a set of stars, each centred
+    on the minimum node id of its component. That is, no node has more than one
+    parent, and no parent itself has a parent.
+    """
+
+    sql = f"""
+    select
+        (
+            select count(*)
+            from {edges_name} as e
+            inner join {edges_name} as p
+            on e.parent = p.node_id
+        ) + (
+            select count(*)
+            from (
+                select node_id
+                from {edges_name}
+                group by node_id
+                having count(*) > 1
+            ) as multiple_parents
+        ) as count
+    """
+
+    return sql
+
+
+def _star_representatives_sql(edges_name):
+    sql = f"""
+    select
+        n.node_id,
+        coalesce(e.parent, n.node_id) as representative
+    from nodes as n
+    left join {edges_name} as e
+    on n.node_id = e.node_id
+    """
+
+    return sql
+
+
+def _solve_representatives_large_star_small_star(
+    linker: "Linker",
+    edges_table: SplinkDataFrame,
+    concat_with_tf: SplinkDataFrame,
+    _generated_graph: bool = False,
+) -> SplinkDataFrame:
+    """Solve connected components using alternating large-star and small-star
+    operations, which converges in a number of iterations logarithmic in the
+    number of nodes, rather than proportional to the diameter of the graph.
+
+    See https://dl.acm.org/doi/10.1145/2670979.2670997
+    """
+    input_dfs = [edges_table]
+    if _generated_graph:
+        edges_table.templated_name = "__splink__df_connected_components_df"
+    else:
+        input_dfs.append(concat_with_tf)
+
+    sql = _star_edges_initial_sql()
+    linker._enqueue_sql(sql, "__splink__df_star_edges")
+    edges = linker._execute_sql_pipeline([edges_table])
+
+    iteration, unconverged_count = 0, 1
+    while unconverged_count > 0:
+        start_time = time.time()
+        iteration += 1
+
+        sql = _large_star_sql(edges.physical_name)
+        linker._enqueue_sql(sql, "__splink__df_large_star")
+        sql = _star_min_parents_sql("__splink__df_large_star")
+        linker._enqueue_sql(sql, "__splink__df_large_star_min_parents")
+        sql = _small_star_sql(
+            "__splink__df_large_star", "__splink__df_large_star_min_parents"
+        )
+        linker._enqueue_sql(sql, f"__splink__df_star_edges_{iteration}")
+        next_edges = linker._execute_sql_pipeline()
+
+        edges.drop_table_from_database_and_remove_from_cache()
+        edges = next_edges
+
+        sql = _star_edges_exit_condition_sql(edges.physical_name)
+        linker._enqueue_sql(sql, "__splink__df_star_edges_unconverged")
+        unconverged_df = linker._execute_sql_pipeline(use_cache=False)
+        unconverged_count = unconverged_df.as_record_dict()[0]["count"]
+        unconverged_df.drop_table_from_database_and_remove_from_cache()
+
+        logger.info(
+            f"Completed iteration {iteration}, unconverged edges count "
+            f"{unconverged_count}"
+        )
+        end_time = time.time()
+        logger.log(15, f"    Iteration time: {end_time - start_time} seconds")
+
+    sql = _cc_create_nodes_table(linker, _generated_graph)
+    linker._enqueue_sql(sql, "nodes")
+    sql = _star_representatives_sql(edges.physical_name)
+    linker._enqueue_sql(sql, "__splink__df_representatives")
+    representatives = linker._execute_sql_pipeline(input_dfs)
+
+    edges.drop_table_from_database_and_remove_from_cache()
+
+    return representatives
+
+
+def solve_connected_components(
+    linker: "Linker",
+    edges_table: SplinkDataFrame,
+    df_predict: SplinkDataFrame,
+    concat_with_tf: SplinkDataFrame,
+    pairwise_output: bool = False,
+    filter_pairwise_format_for_clusters: bool = False,
+    _generated_graph: bool = False,
+    algorithm: str = "label_propagation",
+):
+    """Connected Components main algorithm.
+
+    This function helps cluster your linked (or deduped) records
+    into single groups, which can then be more easily visualised.
+
+    Args:
+        linker:
+            Splink linker object. For more, see splink.linker.
+
+        edges_table (SplinkDataFrame):
+            Splink dataframe containing our edges dataframe to be connected.
+
+        generated_graph (bool):
+            Specifies whether the input df is a NetworkX graph, or part of
+            a splink deduping or linking job.
+
+            This is used for testing against NetworkX and only impacts how
+            our nodes table is generated as this can be shortcut using
+            __splink__df_concat_with_tf.
+
+        algorithm (str):
+            "label_propagation" to iteratively propagate representatives in SQL,
+            "large_star_small_star" to use the large-star/small-star algorithm in
+            SQL, which needs fewer iterations on graphs with long chains, or
+            "union_find" to solve in memory using numpy.
+
+    Returns:
+        SplinkDataFrame: A dataframe containing the connected components list
+        for your link or dedupe job.
+
+    """
+
+    if algorithm == "label_propagation":
+        representatives = _solve_representatives_label_propagation(
+            linker, edges_table, concat_with_tf, _generated_graph
+        )
+    elif algorithm == "large_star_small_star":
+        representatives = _solve_representatives_large_star_small_star(
+            linker, edges_table, concat_with_tf, _generated_graph
+        )
+    elif algorithm == "union_find":
+        representatives = _solve_representatives_union_find(linker, edges_table)
+    else:
+        raise ValueError(
+            f"Unknown connected components algorithm '{algorithm}'. Valid "
+            "algorithms are 'label_propagation', 'large_star_small_star' and "
+            "'union_find'."
+        )
+
     # Create our final representatives table
     # Need to edit how we export the table based on whether we are
     # performing a link or dedupe job.
@@ -529,9 +1082,15 @@ def solve_connected_components(
         pairwise_filter=filter_pairwise_format_for_clusters,
     )
 
-    representatives = linker._sql_to_splink_dataframe_checking_cache(
+    clusters = linker._sql_to_splink_dataframe_checking_cache(
         exit_query,
         "__splink__df_representatives",
     )
 
-    return representatives
+    if algorithm == "union_find":
+        # Registered tables are not marked as created by Splink
+        representatives.drop_table_from_database_and_remove_from_cache(
+            force_non_splink_table=True
+        )
+
+    return clusters
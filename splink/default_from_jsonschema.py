@@ -4,17 +4,19 @@ from .validate_jsonschema import get_schema
 
 
 def default_value_from_schema(key, schema_part):
-    schema = deepcopy(get_schema())
+    # The schema is cached and shared, so only copy the (possibly mutable)
+    # default that is handed back to the caller, not the whole schema
+    schema = get_schema()
     if schema_part == "root":
-        return schema["properties"][key]["default"]
+        return deepcopy(schema["properties"][key]["default"])
 
     if schema_part == "comparison":
         cc = schema["properties"]["comparisons"]
-        return cc["items"]["properties"][key]["default"]
+        return deepcopy(cc["items"]["properties"][key]["default"])
 
     if schema_part == "comparison_level":
         cc = schema["properties"]["comparisons"]
         cl = cc["items"]["properties"]["comparison_levels"]
-        return cl["items"]["properties"][key]["default"]
+        return deepcopy(cl["items"]["properties"][key]["default"])
 
     return None
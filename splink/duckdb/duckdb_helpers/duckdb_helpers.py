@@ -61,3 +61,100 @@ def duckdb_load_from_file(path):
         return file_functions[file_ext]
     else:
         return path
+
+
+# DuckDB settings that can be given in a resource config
+_resource_settings = (
+    "threads",
+    "memory_limit",
+    "temp_directory",
+    "preserve_insertion_order",
+)
+
+
+def _read_cgroup_value(path):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def _available_memory_bytes():
+    """The physical memory of the machine, or the memory limit of the container if
+    it is lower, or None if it cannot be determined"""
+    try:
+        limits = [os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")]
+    except (AttributeError, ValueError, OSError):
+        limits = []
+
+    for path in (
+        "/sys/fs/cgroup/memory.max",
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+    ):
+        value = _read_cgroup_value(path)
+        if value and value[0].isdigit():
+            limits.append(int(value[0]))
+
+    return min(limits, default=None)
+
+
+def _available_cpus():
+    """The number of cores the process may use, taking account of CPU affinity
+    and any CPU quota of the container"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    value = _read_cgroup_value("/sys/fs/cgroup/cpu.max")
+    if value and value[0].isdigit():
+        cpus = min(cpus, max(1, int(value[0]) // int(value[1])))
+    return cpus
+
+
+def auto_resource_config(memory_fraction=0.8, num_processes=1):
+    """A resource config for the DuckDBLinker sized from the available memory and
+    cores, shared equally between num_processes processes.
+
+    DuckDB sizes its memory limit from the physical memory of the machine, so in a
+    container with a lower memory limit, it may be killed rather than spilling to
+    disk.  Here the memory limit is sized from whichever is lower.
+
+    Args:
+        memory_fraction (float, optional): The fraction of the available memory
+            DuckDB may use before spilling to disk. Defaults to 0.8.
+        num_processes (int, optional): The number of processes running DuckDB
+            at once. Defaults to 1.
+
+    Returns:
+        dict: A resource config, which can be amended and passed to the
+            DuckDBLinker as `resource_config`
+    """
+    threads = max(1, _available_cpus() // num_processes)
+    config = {"threads": threads, "preserve_insertion_order": False}
+
+    memory_bytes = _available_memory_bytes()
+    if memory_bytes is not None:
+        memory_bytes = int(memory_bytes * memory_fraction) // num_processes
+        config["memory_limit"] = f"{memory_bytes // 2**20}MB"
+
+    return config
+
+
+def apply_duckdb_resource_config(con, resource_config):
+    """Apply the DuckDB settings in resource_config to the connection"""
+    if resource_config == "auto":
+        resource_config = auto_resource_config()
+
+    for name, value in resource_config.items():
+        if name not in _resource_settings:
+            raise ValueError(
+                f"'{name}' is not a valid resource setting. Valid settings are: "
+                f"{', '.join(_resource_settings)}"
+            )
+        if isinstance(value, bool):
+            value = str(value).lower()
+        elif isinstance(value, str):
+            value = "'{}'".format(value.replace("'", "''"))
+        con.execute(f"SET {name} = {value}")
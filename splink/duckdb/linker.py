@@ -15,13 +15,33 @@ from ..misc import (
 )
 from ..splink_dataframe import SplinkDataFrame
 from .duckdb_helpers.duckdb_helpers import (
+    apply_duckdb_resource_config,
     create_temporary_duckdb_connection,
     duckdb_load_from_file,
     validate_duckdb_connection,
 )
+from .sharded_predict import ShardedPredictor
 
 logger = logging.getLogger(__name__)
 
+# Width in bytes of a value of each fixed size type in a DuckDB table.  Values of
+# other types, such as strings and lists, have a 16 byte header, and long strings
+# use additional memory that is not counted
+_duckdb_type_widths = {
+    "BOOLEAN": 1,
+    "TINYINT": 1,
+    "SMALLINT": 2,
+    "INTEGER": 4,
+    "FLOAT": 4,
+    "DATE": 4,
+    "BIGINT": 8,
+    "DOUBLE": 8,
+    "TIMESTAMP": 8,
+    "HUGEINT": 16,
+    "UUID": 16,
+    "INTERVAL": 16,
+}
+
 
 class DuckDBDataFrame(SplinkDataFrame):
     linker: DuckDBLinker
@@ -55,6 +75,26 @@ class DuckDBDataFrame(SplinkDataFrame):
 
         return self.linker._con.query(sql).to_df()
 
+    def as_arrow_table(self, limit=None):
+        sql = f"select * from {self.physical_name}"
+        if limit:
+            sql += f" limit {limit}"
+
+        return self.linker._con.query(sql).arrow()
+
+    def iter_record_batches(self, batch_size=1_000_000):
+        # A query run on a connection ends any result being streamed from it, so
+        # tables created by Splink are streamed from a separate cursor.  Tables
+        # registered from dataframes are only visible to the linker's connection.
+        if self.created_by_splink:
+            con = self.linker._con.cursor()
+        else:
+            con = self.linker._con
+        reader = con.execute(f"select * from {self.physical_name}").fetch_record_batch(
+            batch_size
+        )
+        yield from reader
+
     def to_parquet(self, filepath, overwrite=False):
         if not overwrite:
             self.check_file_exists(filepath)
@@ -106,6 +146,7 @@ class DuckDBLinker(Linker):
         output_schema: str = None,
         input_table_aliases: str | list = None,
         validate_settings: bool = True,
+        resource_config: dict | str = None,
     ):
         """The Linker object manages the data linkage process and holds the data linkage
         model.
@@ -137,6 +178,17 @@ class DuckDBLinker(Linker):
                 to attach more easily readable/interpretable names. Defaults to None.
             validate_settings (bool, optional): When True, check your settings
                 dictionary for any potential errors that may cause splink to fail.
+            resource_config (dict | str, optional): DuckDB settings controlling the
+                resources used, from `threads`, `memory_limit`, `temp_directory`
+                and `preserve_insertion_order`, e.g. `{"threads": 8,
+                "memory_limit": "48GB", "temp_directory": "/scratch"}`.  Once
+                `memory_limit` is reached, large joins and sorts spill to
+                `temp_directory`.  If "auto", the threads and memory limit are
+                sized from the cores and memory available, including any limits of
+                the container.  Defaults to None, meaning DuckDB's defaults are
+                used, except that `preserve_insertion_order` is disabled on
+                connections created by Splink, since Splink does not rely on the
+                order of rows in its tables.
         """
 
         self._sql_dialect_ = "duckdb"
@@ -154,7 +206,15 @@ class DuckDBLinker(Linker):
         else:
             con = duckdb.connect(database=connection)
 
+        if not isinstance(connection, DuckDBPyConnection):
+            # Preserving insertion order prevents DuckDB from streaming results
+            # out of order, which uses more memory
+            con.execute("SET preserve_insertion_order = false")
+        if resource_config is not None:
+            apply_duckdb_resource_config(con, resource_config)
+
         self._con = con
+        self._sharded_predictor = None
 
         # If user has provided pandas dataframes, need to register
         # them with the database, using user-provided aliases
@@ -268,6 +328,23 @@ class DuckDBLinker(Linker):
     def _infinity_expression(self):
         return "cast('infinity' as float8)"
 
+    def _explain_sql(self, sql):
+        rows = self._con.execute(f"EXPLAIN ANALYZE {sql}").fetchall()
+        return "\n".join(plan for _, plan in rows)
+
+    def _table_size(self, physical_name):
+        row_count = self._con.execute(
+            f"select count(*) from {physical_name}"
+        ).fetchone()[0]
+        column_types = self._con.execute(
+            "select data_type from duckdb_columns() where table_name = ?",
+            [physical_name],
+        ).fetchall()
+        row_bytes = sum(
+            _duckdb_type_widths.get(data_type, 16) for (data_type,) in column_types
+        )
+        return row_count, row_count * row_bytes
+
     def _table_exists_in_database(self, table_name):
         sql = f"PRAGMA table_info('{table_name}');"
 
@@ -306,7 +383,73 @@ class DuckDBLinker(Linker):
     def _delete_table_from_database(self, name):
         drop_sql = f"""
         DROP TABLE IF EXISTS {name}"""
-        self._con.execute(drop_sql)
+        try:
+            self._con.execute(drop_sql)
+        except duckdb.CatalogException:
+            # Sharded predictions are views over parquet files
+            self._con.execute(f"DROP VIEW IF EXISTS {name}")
+
+    def enable_sharded_predict(
+        self,
+        num_shards: int,
+        max_workers: int = None,
+        output_directory: str = None,
+        resource_config: dict = None,
+    ):
+        """Run `predict()` across a pool of processes, each with its own DuckDB
+        connection, writing predictions to parquet.
+
+        For each blocking rule, records are partitioned into shards by a hash of
+        the rule's equi-join keys, so every pair of records compared by the rule
+        lies within a single shard.  Rules without equi-join keys on the same
+        columns for the left and right records are run over all records in a
+        single process.  The predictions are returned as a view over the parquet
+        files.
+
+        Examples:
+            ```py
+            linker = DuckDBLinker(df, settings)
+            linker.enable_sharded_predict(num_shards=16, max_workers=4)
+            df_predict = linker.predict()
+            ```
+
+        Args:
+            num_shards (int): The number of shards to partition records into for
+                each blocking rule.
+            max_workers (int, optional): The number of processes to run at once.
+                Defaults to the lower of num_shards and the number of cores.
+            output_directory (str, optional): The directory in which to write the
+                predictions. Defaults to a temporary directory, deleted when the
+                linker is.
+            resource_config (dict, optional): The DuckDB resource config of each
+                process, as for the `resource_config` of the linker.  Defaults to
+                sharing the cores and memory available equally between processes.
+        """
+        self._sharded_predictor = ShardedPredictor(
+            self, num_shards, max_workers, output_directory, resource_config
+        )
+
+    def predict(
+        self,
+        threshold_match_probability: float = None,
+        threshold_match_weight: float = None,
+        materialise_after_computing_term_frequencies=True,
+    ) -> SplinkDataFrame:
+        blocking_rules = self._settings_obj._blocking_rules_to_generate_predictions
+        sharded_predictor = self._sharded_predictor
+        if sharded_predictor is None or not sharded_predictor.supports(blocking_rules):
+            return super().predict(
+                threshold_match_probability,
+                threshold_match_weight,
+                materialise_after_computing_term_frequencies,
+            )
+
+        with self._trace_span("predict", num_shards=sharded_predictor.num_shards):
+            predictions = sharded_predictor.predict(
+                blocking_rules, threshold_match_probability, threshold_match_weight
+            )
+        self._predict_warning()
+        return predictions
 
     def export_to_duckdb_file(self, output_path, delete_intermediate_tables=False):
         """
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+import duckdb
+
+from ..blocking import BlockingRule, ExplodingBlockingRule, block_using_rules_sqls
+from ..comparison_vector_values import compute_comparison_vector_values_sql
+from ..misc import ascii_uid
+from ..pipeline import SQLPipeline
+from ..predict import predict_from_comparison_vectors_sqls
+from .duckdb_helpers.duckdb_helpers import (
+    apply_duckdb_resource_config,
+    auto_resource_config,
+)
+
+# https://stackoverflow.com/questions/39740632/python-type-hinting-without-cyclic-imports
+if TYPE_CHECKING:
+    from .linker import DuckDBDataFrame, DuckDBLinker
+
+logger = logging.getLogger(__name__)
+
+# The name of the table holding the records of a shard in each worker
+_shard_input_table_name = "__splink__df_concat_with_tf_shard"
+
+
+def _shard_key_sql(blocking_rule: BlockingRule) -> str | None:
+    """A SQL expression hashing the equi-join keys of a blocking rule, so that any
+    two records compared by the rule have the same hash, or None if the rule
+    cannot be sharded"""
+    keys = blocking_rule._equi_join_conditions
+
+    # A record is both the left and right record of comparisons, so it can only
+    # be assigned to one shard if the keys are the same expression on each side
+    if not keys or any(key_l != key_r for key_l, key_r in keys):
+        return None
+    return f"hash({', '.join(key_l for key_l, _ in keys)})"
+
+
+def _predict_shard(task: dict) -> str:
+    """Score the comparisons generated by a blocking rule between the records of
+    a single shard, in a new DuckDB connection, writing them to parquet"""
+    con = duckdb.connect()
+    try:
+        apply_duckdb_resource_config(con, task["resource_config"])
+        con.execute(
+            f"""
+            CREATE VIEW {task['input_table_name']} AS
+            SELECT * FROM read_parquet('{task['input_path']}')
+            """
+        )
+        con.execute(
+            f"""
+            CREATE TABLE {_shard_input_table_name} AS
+            SELECT * FROM {task['input_table_name']}
+            {task['shard_filter']}
+            """
+        )
+        con.execute(f"COPY ({task['sql']}) TO '{task['output_path']}' (FORMAT PARQUET)")
+    finally:
+        con.close()
+    return task["output_path"]
+
+
+class ShardedPredictor:
+    """Runs `predict()` for a DuckDBLinker across a pool of processes.
+
+    For each blocking rule, the input records are partitioned into shards by a hash
+    of the rule's equi-join keys.  Every pair of records compared by the rule has
+    the same keys, so lies within a single shard, and pairs already generated by
+    preceding rules are excluded as usual.  Each shard is blocked and scored in its
+    own process, with its own DuckDB connection and memory budget, and written to
+    parquet.  Rules without equi-join keys (or whose keys differ between the left
+    and right records) are run over all records in a single task.
+
+    The predictions are returned as a view over the parquet files.
+    """
+
+    def __init__(
+        self,
+        linker: DuckDBLinker,
+        num_shards: int,
+        max_workers: int = None,
+        output_directory: str = None,
+        resource_config: dict = None,
+    ):
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+
+        self.linker = linker
+        self.num_shards = num_shards
+        self.max_workers = max_workers or min(num_shards, os.cpu_count() or 1)
+
+        if output_directory is None:
+            self._temp_dir = tempfile.TemporaryDirectory()
+            output_directory = self._temp_dir.name
+        os.makedirs(output_directory, exist_ok=True)
+        self.output_directory = output_directory
+
+        if resource_config is None:
+            resource_config = auto_resource_config(num_processes=self.max_workers)
+        self.resource_config = resource_config
+
+    def supports(self, blocking_rules: list[BlockingRule]) -> bool:
+        # Exploding blocking rules read tables of id pairs from the linker's
+        # database, which workers cannot access
+        return not any(isinstance(br, ExplodingBlockingRule) for br in blocking_rules)
+
+    def _sql_for_blocking_rule(
+        self,
+        blocking_rule,
+        nodes_with_tf,
+        threshold_match_probability,
+        threshold_match_weight,
+    ) -> str:
+        """The SQL to score the comparisons generated by a single blocking rule,
+        reading the records of a shard"""
+        linker = self.linker
+        settings_obj = linker._settings_obj
+        original_blocking_rules = settings_obj._blocking_rules_to_generate_predictions
+
+        # Preceding rules are held on each rule, so pairs they generate are still
+        # excluded when the rule is blocked on its own
+        settings_obj._blocking_rules_to_generate_predictions = [blocking_rule]
+        pipeline = SQLPipeline()
+        try:
+            for sql in block_using_rules_sqls(linker):
+                pipeline.enqueue_sql(sql["sql"], sql["output_table_name"])
+        finally:
+            settings_obj._blocking_rules_to_generate_predictions = (
+                original_blocking_rules
+            )
+
+        sql = compute_comparison_vector_values_sql(settings_obj)
+        pipeline.enqueue_sql(sql, "__splink__df_comparison_vectors")
+
+        sqls = predict_from_comparison_vectors_sqls(
+            settings_obj,
+            threshold_match_probability,
+            threshold_match_weight,
+            sql_infinity_expression=linker._infinity_expression,
+        )
+        for sql in sqls:
+            pipeline.enqueue_sql(sql["sql"], sql["output_table_name"])
+
+        shard_input = linker._table_to_splink_dataframe(
+            nodes_with_tf.templated_name, _shard_input_table_name
+        )
+        return pipeline._generate_pipeline([shard_input])
+
+    def predict(
+        self,
+        blocking_rules: list[BlockingRule],
+        threshold_match_probability: float = None,
+        threshold_match_weight: float = None,
+    ) -> DuckDBDataFrame:
+        linker = self.linker
+        nodes_with_tf = linker._initialise_df_concat_with_tf()
+
+        physical_name = f"__splink__df_predict_{ascii_uid(8)}"
+        run_directory = os.path.join(self.output_directory, physical_name)
+        os.makedirs(run_directory)
+
+        input_path = os.path.join(run_directory, "input.parquet")
+        nodes_with_tf.to_parquet(input_path, overwrite=True)
+
+        if not blocking_rules:
+            blocking_rules = [BlockingRule("1=1")]
+
+        tasks = []
+        for i, br in enumerate(blocking_rules):
+            sql = self._sql_for_blocking_rule(
+                br, nodes_with_tf, threshold_match_probability, threshold_match_weight
+            )
+            shard_key = _shard_key_sql(br)
+            if shard_key is None:
+                logger.info(
+                    f"Blocking rule {br.blocking_rule_sql} has no equi-join keys to "
+                    "shard by, so will be run over all records in a single process"
+                )
+                shard_filters = [""]
+            else:
+                shard_filters = [
+                    f"WHERE {shard_key} % {self.num_shards} = {shard}"
+                    for shard in range(self.num_shards)
+                ]
+
+            for shard, shard_filter in enumerate(shard_filters):
+                output_path = os.path.join(
+                    run_directory, f"rule_{i}_shard_{shard}.parquet"
+                )
+                tasks.append(
+                    {
+                        "input_table_name": nodes_with_tf.physical_name,
+                        "input_path": input_path,
+                        "shard_filter": shard_filter,
+                        "sql": sql,
+                        "output_path": output_path,
+                        "resource_config": self.resource_config,
+                    }
+                )
+
+        logger.info(
+            f"Running {len(tasks)} prediction tasks across {self.max_workers} "
+            "processes"
+        )
+        # Workers are spawned, since forking a process with an open DuckDB
+        # connection is not safe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.max_workers, mp_context=context) as executor:
+            output_paths = list(executor.map(_predict_shard, tasks))
+        os.remove(input_path)
+
+        paths = ", ".join(f"'{path}'" for path in output_paths)
+        linker._con.execute(
+            f"""
+            CREATE VIEW {physical_name} AS
+            SELECT * FROM read_parquet([{paths}])
+            """
+        )
+        predictions = linker._table_to_splink_dataframe(
+            "__splink__df_predict", physical_name
+        )
+        predictions.created_by_splink = True
+        linker._intermediate_table_cache[physical_name] = predictions
+        return predictions
@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import logging
 from copy import deepcopy
+from statistics import NormalDist
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 from .blocking import BlockingRule, block_using_rules_sqls
 from .charts import (
     m_u_parameters_interactive_history_chart,
@@ -18,6 +21,10 @@ from .exceptions import EMTrainingException
 from .expectation_maximisation import expectation_maximisation
 from .misc import bayes_factor_to_prob, prob_to_bayes_factor
 from .parse_sql import get_columns_used_from_sql
+from .unique_id_concat import (
+    CONCAT_SEPARATOR,
+    _composite_unique_id_from_edges_sql,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +48,8 @@ class EMTrainingSession:
         comparisons_to_deactivate: list[Comparison] = None,
         comparison_levels_to_reverse_blocking_rule: list[ComparisonLevel] = None,
         estimate_without_term_frequencies: bool = False,
+        max_pairs: int = None,
+        seed: int = None,
     ):
         logger.info("\n----- Starting EM training session -----\n")
 
@@ -75,6 +84,13 @@ class EMTrainingSession:
             self._blocking_adjusted_probability_two_random_records_match
         )
 
+        self._max_pairs = max_pairs
+        self._seed = seed
+
+        # Populated during training with the m and u counts computed from the
+        # final expectation step, used to compute confidence intervals
+        self._m_u_counts = None
+
         self._training_fix_u_probabilities = fix_u_probabilities
         self._training_fix_m_probabilities = fix_m_probabilities
         self._training_fix_probability_two_random_records_match = (
@@ -111,7 +127,16 @@ class EMTrainingSession:
         self._settings_obj.comparisons = filtered_ccs
         self._comparisons_that_can_be_estimated = filtered_ccs
 
-        self._settings_obj_history = []
+        # The history of parameter estimates is stored compactly as one array of
+        # m and u values per iteration, ordered as in _comparison_levels_to_train.
+        # Settings objects are only reconstructed from these when charts need them
+        self._lambda_history: list[float] = []
+        self._m_history: list[np.ndarray] = []
+        self._u_history: list[np.ndarray] = []
+        # The arrays hold the values used in training, so a mask of the levels
+        # whose probability is unset or not observed is recorded alongside them
+        self._m_unset_history: list[np.ndarray] = []
+        self._u_unset_history: list[np.ndarray] = []
 
         # Add iteration 0 i.e. the starting parameters
         self._add_iteration()
@@ -147,14 +172,64 @@ class EMTrainingSession:
             f" since they are used in the blocking rules: {not_estimated}"
         )
 
+    def _blocked_pairs_sample_proportion(self):
+        """The proportion of the pairs generated by the training blocking rule
+        that must be sampled so that roughly `max_pairs` comparisons are used
+        for training.  Returns 1.0 if no sampling is needed.
+        """
+        if self._max_pairs is None:
+            return 1.0
+
+        num_pairs = self._original_linker.count_num_comparisons_from_blocking_rule(
+            self._blocking_rule_for_training
+        )
+        if num_pairs <= self._max_pairs:
+            return 1.0
+
+        proportion = self._max_pairs / num_pairs
+        logger.info(
+            f"Training blocking rule generates {num_pairs:,.0f} comparisons.  "
+            f"Sampling {proportion:.3%} of them (approximately "
+            f"{self._max_pairs:,.0f} comparisons) to estimate parameters."
+        )
+        return proportion
+
+    def _sample_blocked_pairs_sql(self, proportion):
+        uid_cols = self._settings_obj._unique_id_input_columns
+        uid_l = _composite_unique_id_from_edges_sql(uid_cols, "l")
+        uid_r = _composite_unique_id_from_edges_sql(uid_cols, "r")
+        pair_id = f"{uid_l} || '{CONCAT_SEPARATOR}' || {uid_r}"
+
+        sample_sql = self._training_linker._random_sample_sql(
+            proportion,
+            self._max_pairs,
+            self._seed,
+            table="__splink__df_blocked_unsampled",
+            unique_id=pair_id,
+        )
+        return f"""
+        select *
+        from __splink__df_blocked_unsampled
+        {sample_sql}
+        """
+
     def _comparison_vectors(self):
         self._training_log_message()
 
         nodes_with_tf = self._original_linker._initialise_df_concat_with_tf()
 
+        proportion = self._blocked_pairs_sample_proportion()
+
         sqls = block_using_rules_sqls(self._training_linker)
         for sql in sqls:
-            self._training_linker._enqueue_sql(sql["sql"], sql["output_table_name"])
+            output_table_name = sql["output_table_name"]
+            if proportion < 1.0 and output_table_name == "__splink__df_blocked":
+                output_table_name = "__splink__df_blocked_unsampled"
+            self._training_linker._enqueue_sql(sql["sql"], output_table_name)
+
+        if proportion < 1.0:
+            sql = self._sample_blocked_pairs_sql(proportion)
+            self._training_linker._enqueue_sql(sql, "__splink__df_blocked")
 
         # repartition after blocking only exists on the SparkLinker
         repartition_after_blocking = getattr(
@@ -241,8 +316,118 @@ class EMTrainingSession:
 
         self._original_linker._em_training_sessions.append(self)
 
+    @staticmethod
+    def _levels_excluding_null(settings_obj):
+        return [
+            cl
+            for cc in settings_obj.comparisons
+            for cl in cc._comparison_levels_excluding_null
+        ]
+
+    @property
+    def _comparison_levels_to_train(self):
+        return self._levels_excluding_null(self._settings_obj)
+
     def _add_iteration(self):
-        self._settings_obj_history.append(deepcopy(self._settings_obj))
+        levels = self._comparison_levels_to_train
+        self._lambda_history.append(
+            self._settings_obj._probability_two_random_records_match
+        )
+        self._m_history.append(np.array([cl.m_probability for cl in levels]))
+        self._u_history.append(np.array([cl.u_probability for cl in levels]))
+        self._m_unset_history.append(
+            np.array([self._is_unset(cl._m_probability) for cl in levels], dtype=bool)
+        )
+        self._u_unset_history.append(
+            np.array([self._is_unset(cl._u_probability) for cl in levels], dtype=bool)
+        )
+
+    @staticmethod
+    def _is_unset(probability):
+        # As in ComparisonLevel.as_dict, such probabilities are not carried over to
+        # a copy of the settings, which then uses the default value
+        return not probability or probability == LEVEL_NOT_OBSERVED_TEXT
+
+    def _settings_obj_history(self):
+        """Reconstruct the settings object at each iteration from the parameter
+        history.  A single copy of the settings is updated in place and yielded once
+        per iteration, so consumers must extract what they need before advancing.
+        """
+        settings_obj = deepcopy(self._settings_obj)
+        levels = self._levels_excluding_null(settings_obj)
+        history = zip(
+            self._lambda_history,
+            self._m_history,
+            self._u_history,
+            self._m_unset_history,
+            self._u_unset_history,
+        )
+        for lam, m_values, u_values, m_unset, u_unset in history:
+            settings_obj._probability_two_random_records_match = lam
+            m_values = np.where(m_unset, None, m_values)
+            u_values = np.where(u_unset, None, u_values)
+            for cl, m, u in zip(levels, m_values.tolist(), u_values.tolist()):
+                cl._m_probability = m
+                cl._u_probability = u
+            yield settings_obj
+
+    def m_probability_confidence_interval_records(self, confidence_level=0.95):
+        """Approximate confidence intervals for the m probabilities estimated by
+        this training session.
+
+        Intervals are computed using the normal approximation to the binomial,
+        treating the expected number of matches in the final expectation step
+        (the sum of the match probabilities of the training comparisons) as the
+        sample size.  They capture the sampling error arising from the number of
+        comparisons used for training, which is of particular interest when
+        `max_pairs` has been used to train on a sample of the blocked pairs.
+
+        Args:
+            confidence_level (float, optional): The confidence level of the
+                intervals. Defaults to 0.95.
+
+        Returns:
+            list: A list of records, one per comparison level, containing the
+                m probability estimate and the lower and upper bounds of its
+                confidence interval.
+        """
+        if self._m_u_counts is None:
+            raise ValueError(
+                "Confidence intervals are only available once the training "
+                "session has been run"
+            )
+
+        z = NormalDist().inv_cdf((1 + confidence_level) / 2)
+
+        counts = self._m_u_counts
+        counts = counts[counts["comparison_vector_value"] != -1]
+        expected_matches = counts.groupby("output_column_name")["m_count"].sum()
+
+        output_records = []
+        for cc in self._settings_obj.comparisons:
+            n = expected_matches.get(cc._output_column_name, 0)
+            for cl in cc._comparison_levels_excluding_null:
+                m = cl._m_probability
+                if m in (None, LEVEL_NOT_OBSERVED_TEXT) or n <= 0:
+                    m, lower, upper = None, None, None
+                else:
+                    half_width = z * (m * (1 - m) / n) ** 0.5
+                    lower = max(m - half_width, 0.0)
+                    upper = min(m + half_width, 1.0)
+
+                output_records.append(
+                    {
+                        "comparison_name": cc._output_column_name,
+                        "comparison_vector_value": cl._comparison_vector_value,
+                        "label_for_charts": cl.label_for_charts,
+                        "m_probability": m,
+                        "m_probability_lower": lower,
+                        "m_probability_upper": upper,
+                        "expected_match_count": float(n),
+                        "confidence_level": confidence_level,
+                    }
+                )
+        return output_records
 
     @property
     def _blocking_adjusted_probability_two_random_records_match(self):
@@ -281,7 +466,7 @@ class EMTrainingSession:
     def _iteration_history_records(self):
         output_records = []
 
-        for iteration, settings_obj in enumerate(self._settings_obj_history):
+        for iteration, settings_obj in enumerate(self._settings_obj_history()):
             records = settings_obj._parameters_as_detailed_records
 
             for r in records:
@@ -296,8 +481,7 @@ class EMTrainingSession:
     @property
     def _lambda_history_records(self):
         output_records = []
-        for i, s in enumerate(self._settings_obj_history):
-            lam = s._probability_two_random_records_match
+        for i, lam in enumerate(self._lambda_history):
             r = {
                 "probability_two_random_records_match": lam,
                 "probability_two_random_records_match_reciprocal": 1 / lam,
@@ -345,46 +529,36 @@ class EMTrainingSession:
         return message
 
     def _max_change_in_parameters_comparison_levels(self):
-        previous_iteration = self._settings_obj_history[-2]
-        this_iteration = self._settings_obj_history[-1]
-        max_change = -0.1
-
         max_change_levels = {
             "previous_iteration": None,
             "this_iteration": None,
             "max_change_type": None,
             "max_change_value": None,
         }
-        comparisons = zip(previous_iteration.comparisons, this_iteration.comparisons)
-        for comparison in comparisons:
-            prev_cc = comparison[0]
-            this_cc = comparison[1]
-            z_cls = zip(prev_cc.comparison_levels, this_cc.comparison_levels)
-            for z_cl in z_cls:
-                if z_cl[0].is_null_level:
-                    continue
-                prev_cl = z_cl[0]
-                this_cl = z_cl[1]
-                change_m = this_cl.m_probability - prev_cl.m_probability
-                change_u = this_cl.u_probability - prev_cl.u_probability
-                change = max(abs(change_m), abs(change_u))
-                change_type = (
-                    "m_probability"
-                    if abs(change_m) > abs(change_u)
-                    else "u_probability"
-                )
-                change_value = change_m if abs(change_m) > abs(change_u) else change_u
-                if change > max_change:
-                    max_change = change
-                    max_change_levels["prev_comparison_level"] = prev_cl
-                    max_change_levels["current_comparison_level"] = this_cl
-                    max_change_levels["max_change_type"] = change_type
-                    max_change_levels["max_change_value"] = change_value
-                    max_change_levels["max_abs_change_value"] = abs(change_value)
+        max_change = -0.1
+
+        change_m = self._m_history[-1] - self._m_history[-2]
+        change_u = self._u_history[-1] - self._u_history[-2]
+        if len(change_m) > 0:
+            change = np.maximum(np.abs(change_m), np.abs(change_u))
+            # argmax returns the first of any tied maxima, i.e. the first level
+            # encountered with the largest change
+            i = int(np.argmax(change))
+            cl = self._comparison_levels_to_train[i]
+            if abs(change_m[i]) > abs(change_u[i]):
+                change_type, change_value = "m_probability", float(change_m[i])
+            else:
+                change_type, change_value = "u_probability", float(change_u[i])
+
+            max_change = float(change[i])
+            max_change_levels["prev_comparison_level"] = cl
+            max_change_levels["current_comparison_level"] = cl
+            max_change_levels["max_change_type"] = change_type
+            max_change_levels["max_change_value"] = change_value
+            max_change_levels["max_abs_change_value"] = abs(change_value)
 
         change_probability_two_random_records_match = (
-            this_iteration._probability_two_random_records_match
-            - previous_iteration._probability_two_random_records_match
+            self._lambda_history[-1] - self._lambda_history[-2]
         )
 
         if abs(change_probability_two_random_records_match) > max_change:
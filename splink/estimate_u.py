@@ -2,15 +2,21 @@ from __future__ import annotations
 
 import logging
 import multiprocessing
+import time
 from copy import deepcopy
 from typing import TYPE_CHECKING, List
 
+import pandas as pd
+
 from .blocking import block_using_rules_sqls, blocking_rule_to_obj
 from .comparison_vector_values import compute_comparison_vector_values_sql
+from .constants import LEVEL_NOT_OBSERVED_TEXT
+from .exceptions import SplinkException
 from .expectation_maximisation import (
     compute_new_parameters_sql,
     compute_proportions_for_new_parameters,
 )
+from .input_column import InputColumn
 from .m_u_records_to_parameters import (
     append_u_probability_to_comparison_level_trained_probabilities,
     m_u_records_to_lookup_dict,
@@ -18,7 +24,9 @@ from .m_u_records_to_parameters import (
 
 # https://stackoverflow.com/questions/39740632/python-type-hinting-without-cyclic-imports
 if TYPE_CHECKING:
+    from .comparison import Comparison
     from .linker import Linker
+    from .settings import Settings
 
 logger = logging.getLogger(__name__)
 
@@ -52,12 +60,20 @@ def _proportion_sample_size_link_only(
     return proportion, sample_size
 
 
-def estimate_u_values(linker: Linker, max_pairs, seed=None):
-    logger.info("----- Estimating u probabilities using random sampling -----")
+def _u_counts_from_random_sample(linker: Linker, max_pairs, seed=None):
+    """Count the pairwise comparisons of a random sample of records falling into
+    each comparison level, returning a pandas dataframe of u counts"""
+    param_records, _ = _u_counts_and_proportion_from_random_sample(
+        linker, max_pairs, seed
+    )
+    return param_records
 
-    nodes_with_tf = linker._initialise_df_concat_with_tf()
 
-    original_settings_obj = linker._settings_obj
+def _u_counts_and_proportion_from_random_sample(linker: Linker, max_pairs, seed=None):
+    """As `_u_counts_from_random_sample`, also returning the proportion of records
+    that were sampled, which is 1.0 if the sample contained every record"""
+
+    nodes_with_tf = linker._initialise_df_concat_with_tf()
 
     training_linker = deepcopy(linker)
 
@@ -159,16 +175,33 @@ def estimate_u_values(linker: Linker, max_pairs, seed=None):
     df_params = training_linker._execute_sql_pipeline(sample_dataframe)
 
     param_records = df_params.as_pandas_dataframe()
-    param_records = compute_proportions_for_new_parameters(param_records)
     df_params.drop_table_from_database_and_remove_from_cache()
     df_sample.drop_table_from_database_and_remove_from_cache()
 
-    m_u_records = [
+    return param_records, proportion
+
+
+def _u_records_from_random_sample(linker: Linker, max_pairs, seed=None):
+    """Compute u probabilities for every comparison level from the pairwise
+    comparisons of a random sample of records, returning them as a list of
+    records suitable for `m_u_records_to_lookup_dict`"""
+
+    param_records = _u_counts_from_random_sample(linker, max_pairs, seed)
+    param_records = compute_proportions_for_new_parameters(param_records)
+
+    return [
         r
         for r in param_records
         if r["output_column_name"] != "_probability_two_random_records_match"
     ]
 
+
+def estimate_u_values(linker: Linker, max_pairs, seed=None):
+    logger.info("----- Estimating u probabilities using random sampling -----")
+
+    m_u_records = _u_records_from_random_sample(linker, max_pairs, seed)
+
+    original_settings_obj = linker._settings_obj
     m_u_records_lookup = m_u_records_to_lookup_dict(m_u_records)
     for c in original_settings_obj.comparisons:
         for cl in c._comparison_levels_excluding_null:
@@ -177,3 +210,338 @@ def estimate_u_values(linker: Linker, max_pairs, seed=None):
             )
 
     logger.info("\nEstimated u probabilities using random sampling")
+
+
+def _u_relative_standard_errors(settings_obj: Settings, u_counts):
+    """The relative standard error of the u probability of each non-null comparison
+    level, given the cumulative u counts of the pairs sampled so far.
+
+    The u probability p of a level observed in c out of n sampled pairs has a
+    standard error of sqrt(p(1-p)/n), so its relative standard error is
+    sqrt((1-p)/c).  Levels that have not yet been observed have an infinite
+    relative standard error.
+    """
+    counts = u_counts.set_index(["output_column_name", "comparison_vector_value"])[
+        "u_count"
+    ]
+
+    errors = {}
+    for cc in settings_obj.comparisons:
+        levels = cc._comparison_levels_excluding_null
+        level_counts = [
+            counts.get((cc._output_column_name, cl._comparison_vector_value), 0.0)
+            for cl in levels
+        ]
+        n = sum(level_counts)
+        for cl, c in zip(levels, level_counts):
+            if c > 0:
+                rse = ((1 - c / n) / c) ** 0.5
+            else:
+                rse = float("inf")
+            errors[(cc._output_column_name, cl._comparison_vector_value)] = rse
+    return errors
+
+
+def estimate_u_values_adaptively(
+    linker: Linker,
+    max_pairs,
+    seed=None,
+    target_relative_standard_error=0.05,
+    max_seconds=None,
+    pairs_per_chunk=None,
+):
+    logger.info("----- Estimating u probabilities using adaptive random sampling -----")
+
+    settings_obj = linker._settings_obj
+
+    if pairs_per_chunk is None:
+        pairs_per_chunk = max_pairs / 10
+
+    start_time = time.time()
+    u_counts = None
+    pairs_sampled = 0
+    chunk = 0
+
+    while True:
+        chunk_seed = None if seed is None else seed + chunk
+        chunk_counts, proportion = _u_counts_and_proportion_from_random_sample(
+            linker, pairs_per_chunk, chunk_seed
+        )
+        chunk += 1
+
+        is_lambda = (
+            chunk_counts["output_column_name"]
+            == "_probability_two_random_records_match"
+        )
+        chunk_counts = chunk_counts[~is_lambda]
+        first_comparison = settings_obj.comparisons[0]._output_column_name
+        chunk_pairs = chunk_counts.loc[
+            chunk_counts["output_column_name"] == first_comparison, "u_count"
+        ].sum()
+        if chunk_pairs == 0:
+            if u_counts is None:
+                raise SplinkException(
+                    "The random sample of records produced no pairwise "
+                    "comparisons, so u probabilities cannot be estimated"
+                )
+            logger.info(f"Chunk {chunk} produced no pairs, so sampling has stopped")
+            break
+        pairs_sampled += chunk_pairs
+
+        if u_counts is not None:
+            chunk_counts = pd.concat([u_counts, chunk_counts])
+        u_counts = chunk_counts.groupby(
+            ["output_column_name", "comparison_vector_value"], as_index=False
+        )[["m_count", "u_count"]].sum()
+
+        errors = _u_relative_standard_errors(settings_obj, u_counts)
+        worst_level, max_error = max(errors.items(), key=lambda item: item[1])
+        elapsed = time.time() - start_time
+        logger.info(
+            f"Chunk {chunk}: {pairs_sampled:,.0f} pairs sampled in {elapsed:.1f}s. "
+            f"Largest relative standard error is {max_error:.3f} "
+            f"({worst_level[0]}, comparison vector value {worst_level[1]})"
+        )
+
+        # Further chunks would repeat the same comparisons, so would not
+        # reduce the true error
+        if proportion >= 1.0:
+            logger.info("Every pair of records was compared, so sampling has stopped")
+            break
+        if max_error <= target_relative_standard_error:
+            logger.info("Target relative standard error reached")
+            break
+        if max_seconds is not None and elapsed >= max_seconds:
+            logger.info("Time budget reached before target relative standard error")
+            break
+        if pairs_sampled >= max_pairs:
+            logger.info("max_pairs reached before target relative standard error")
+            break
+
+    m_u_records = compute_proportions_for_new_parameters(u_counts)
+    m_u_records_lookup = m_u_records_to_lookup_dict(m_u_records)
+    for c in settings_obj.comparisons:
+        for cl in c._comparison_levels_excluding_null:
+            append_u_probability_to_comparison_level_trained_probabilities(
+                cl, m_u_records_lookup, "estimate u by adaptive random sampling"
+            )
+
+    logger.info("\nEstimated u probabilities using adaptive random sampling")
+
+
+def _analytic_exact_match_column(comparison: Comparison):
+    """If the u probability of the first non-null level of the comparison can be
+    computed directly from the distribution of values of a single column, return
+    that column.  This is the case if the level is an exact match on the column,
+    and any null level refers only to that same column.
+    """
+    levels = comparison._comparison_levels_excluding_null
+    first_level = levels[0]
+    if not first_level._is_exact_match:
+        return None
+
+    colnames = first_level._exact_match_colnames
+    if len(colnames) != 1:
+        return None
+    col = InputColumn(colnames[0], sql_dialect=first_level.sql_dialect)
+
+    for cl in comparison.comparison_levels:
+        if cl.is_null_level:
+            null_cols = cl._input_columns_used_by_sql_condition
+            null_cols = {c.unquote().name.lower() for c in null_cols}
+            if null_cols != {col.unquote().name.lower()}:
+                return None
+    return col
+
+
+def _value_frequency_statistics_sqls(
+    input_columns: list[InputColumn], source_dataset_col: str = None
+):
+    """SQL to compute, for each column, the sum of squared value counts (overall
+    and, if a source dataset column is given, within each source dataset) and the
+    number of non null values in each source dataset.
+    """
+    table = "__splink__df_concat_with_tf"
+
+    groupings = ["value"]
+    if source_dataset_col:
+        groupings.append("value_dataset")
+
+    union_sqls = []
+    for i, col in enumerate(input_columns):
+        for grouping in groupings:
+            group_by = col.name
+            if grouping == "value_dataset":
+                group_by = f"{col.name}, {source_dataset_col}"
+
+            sql = f"""
+            select
+            {i} as column_index,
+            '{grouping}' as grouping,
+            sum(n * n) as sum_sq_counts
+            from (
+                select cast(count(*) as float8) as n
+                from {table}
+                where {col.name} is not null
+                group by {group_by}
+            ) as value_counts
+            """
+            union_sqls.append(sql)
+    sum_sq_sql = " union all ".join(union_sqls)
+
+    count_exprs = [
+        f"count({col.name}) as count_{i}" for i, col in enumerate(input_columns)
+    ]
+    count_exprs.insert(0, "count(*) as row_count")
+    if source_dataset_col:
+        count_exprs.insert(0, f"{source_dataset_col} as source_dataset")
+        group_by = f"group by {source_dataset_col}"
+    else:
+        group_by = ""
+
+    counts_sql = f"""
+    select {", ".join(count_exprs)}
+    from {table}
+    {group_by}
+    """
+
+    return [
+        {"sql": sum_sq_sql, "output_table_name": "__splink__value_frequency_sum_sq"},
+        {"sql": counts_sql, "output_table_name": "__splink__value_counts_by_dataset"},
+    ]
+
+
+def _exact_match_u_probability(
+    link_only, sum_sq_counts, sum_sq_counts_within_datasets, non_null_counts, totals
+):
+    """The probability that a random pair of records (in the denominator of the
+    u probability) agree exactly on a column.
+
+    Args:
+        link_only (bool): Whether pairs are only formed between source datasets
+        sum_sq_counts (float): The sum over distinct values of the squared count
+        sum_sq_counts_within_datasets (float): As above, but counting values
+            within each source dataset separately.  Only used if link_only
+        non_null_counts (list): The number of non-null values in each dataset
+        totals (list): The number of records in each dataset counted in the
+            denominator of the u probability
+    """
+    n_values = sum(non_null_counts)
+    n = sum(totals)
+    if link_only:
+        agreeing_pairs = (sum_sq_counts - sum_sq_counts_within_datasets) / 2
+        total_pairs = (n**2 - sum(t**2 for t in totals)) / 2
+    else:
+        agreeing_pairs = (sum_sq_counts - n_values) / 2
+        total_pairs = n * (n - 1) / 2
+
+    if total_pairs <= 0:
+        return None
+    return agreeing_pairs / total_pairs
+
+
+def estimate_u_values_from_value_frequencies(linker: Linker, max_pairs, seed=None):
+    logger.info("----- Estimating u probabilities from value frequencies -----")
+
+    settings_obj = linker._settings_obj
+    link_only = settings_obj._link_type == "link_only"
+
+    analytic_cols = {}
+    for cc in settings_obj.comparisons:
+        col = _analytic_exact_match_column(cc)
+        if col is not None:
+            analytic_cols[cc._output_column_name] = col
+
+    # Comparisons with levels other than an exact match and an else level
+    # need a (small) sample of record pairs to estimate the remaining levels
+    sampled_comparisons = [
+        cc
+        for cc in settings_obj.comparisons
+        if cc._output_column_name not in analytic_cols
+        or len(cc._comparison_levels_excluding_null) > 2
+        or not cc._comparison_levels_excluding_null[-1]._is_else_level
+    ]
+    if sampled_comparisons:
+        sampled_records = _u_records_from_random_sample(linker, max_pairs, seed)
+    else:
+        sampled_records = []
+    sampled_lookup = m_u_records_to_lookup_dict(sampled_records)
+
+    analytic_u = {}
+    if analytic_cols:
+        nodes_with_tf = linker._initialise_df_concat_with_tf()
+        input_columns = list(analytic_cols.values())
+        source_dataset_col = None
+        if link_only:
+            source_dataset_col = settings_obj._source_dataset_column_name
+
+        sqls = _value_frequency_statistics_sqls(input_columns, source_dataset_col)
+        results = []
+        for sql in sqls:
+            linker._enqueue_sql(sql["sql"], sql["output_table_name"])
+            df = linker._execute_sql_pipeline([nodes_with_tf])
+            results.append(df.as_record_dict())
+            df.drop_table_from_database_and_remove_from_cache()
+        sum_sq_records, count_records = results
+
+        sum_sq = {
+            (r["column_index"], r["grouping"]): r["sum_sq_counts"] or 0.0
+            for r in sum_sq_records
+        }
+
+        for i, output_column_name in enumerate(analytic_cols):
+            cc = settings_obj._get_comparison_by_output_column_name(output_column_name)
+            has_null_level = any(cl.is_null_level for cl in cc.comparison_levels)
+            non_null_counts = [r[f"count_{i}"] for r in count_records]
+            if has_null_level:
+                totals = non_null_counts
+            else:
+                totals = [r["row_count"] for r in count_records]
+
+            analytic_u[output_column_name] = _exact_match_u_probability(
+                link_only,
+                sum_sq[(i, "value")],
+                sum_sq.get((i, "value_dataset"), 0.0),
+                non_null_counts,
+                totals,
+            )
+
+    for cc in settings_obj.comparisons:
+        name = cc._output_column_name
+        levels = cc._comparison_levels_excluding_null
+        sampled = sampled_lookup.get(name, {})
+
+        u_probabilities = {}
+        if name in analytic_cols and analytic_u[name] is not None:
+            u_exact = analytic_u[name]
+            u_probabilities[levels[0]._comparison_vector_value] = u_exact
+            if len(levels) == 2 and levels[-1]._is_else_level:
+                u_probabilities[levels[-1]._comparison_vector_value] = 1 - u_exact
+            else:
+                # Rescale the sampled u probabilities of the remaining levels, which
+                # are estimates of their distribution amongst pairs that do not
+                # match exactly
+                u_exact_sampled = sampled.get(
+                    levels[0]._comparison_vector_value, {}
+                ).get("u_probability", 0.0)
+                if u_exact_sampled < 1:
+                    scale = (1 - u_exact) / (1 - u_exact_sampled)
+                else:
+                    scale = 0.0
+                for cl in levels[1:]:
+                    cvv = cl._comparison_vector_value
+                    if "u_probability" in sampled.get(cvv, {}):
+                        u = sampled[cvv]["u_probability"] * scale
+                        u_probabilities[cvv] = u
+        else:
+            for cvv, record in sampled.items():
+                if "u_probability" in record:
+                    u_probabilities[cvv] = record["u_probability"]
+
+        for cl in levels:
+            u = u_probabilities.get(cl._comparison_vector_value)
+            if u is None or u == 0:
+                u = LEVEL_NOT_OBSERVED_TEXT
+            cl._add_trained_u_probability(u, "estimate u from value frequencies")
+
+    logger.info("\nEstimated u probabilities from value frequencies")
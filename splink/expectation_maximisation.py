@@ -231,42 +231,47 @@ def expectation_maximisation(
         )
 
     for i in range(1, max_iterations + 1):
-        start_time = time.time()
-
-        # Expectation step
-        if settings_obj._estimate_without_term_frequencies:
-            sqls = predict_from_agreement_pattern_counts_sqls(
-                settings_obj,
-                sql_infinity_expression=linker._infinity_expression,
+        with linker._trace_span("em_iteration", iteration=i) as span:
+            start_time = time.time()
+
+            # Expectation step
+            if settings_obj._estimate_without_term_frequencies:
+                sqls = predict_from_agreement_pattern_counts_sqls(
+                    settings_obj,
+                    sql_infinity_expression=linker._infinity_expression,
+                )
+            else:
+                sqls = predict_from_comparison_vectors_sqls(
+                    settings_obj,
+                    sql_infinity_expression=linker._infinity_expression,
+                )
+
+            for sql in sqls:
+                linker._enqueue_sql(sql["sql"], sql["output_table_name"])
+
+            sql = compute_new_parameters_sql(settings_obj)
+            linker._enqueue_sql(sql, "__splink__m_u_counts")
+            if settings_obj._estimate_without_term_frequencies:
+                df_params = linker._execute_sql_pipeline([agreement_pattern_counts])
+            else:
+                df_params = linker._execute_sql_pipeline([df_comparison_vector_values])
+            param_records = df_params.as_pandas_dataframe()
+            em_training_session._m_u_counts = param_records
+            param_records = compute_proportions_for_new_parameters(param_records)
+
+            df_params.drop_table_from_database_and_remove_from_cache()
+
+            maximisation_step(em_training_session, param_records)
+            max_change_dict = (
+                em_training_session._max_change_in_parameters_comparison_levels()
             )
-        else:
-            sqls = predict_from_comparison_vectors_sqls(
-                settings_obj,
-                sql_infinity_expression=linker._infinity_expression,
+            span.set_attribute(
+                "max_abs_change_value", max_change_dict["max_abs_change_value"]
             )
+            logger.info(f"Iteration {i}: {max_change_dict['message']}")
+            end_time = time.time()
+            logger.log(15, f"    Iteration time: {end_time - start_time} seconds")
 
-        for sql in sqls:
-            linker._enqueue_sql(sql["sql"], sql["output_table_name"])
-
-        sql = compute_new_parameters_sql(settings_obj)
-        linker._enqueue_sql(sql, "__splink__m_u_counts")
-        if settings_obj._estimate_without_term_frequencies:
-            df_params = linker._execute_sql_pipeline([agreement_pattern_counts])
-        else:
-            df_params = linker._execute_sql_pipeline([df_comparison_vector_values])
-        param_records = df_params.as_pandas_dataframe()
-        param_records = compute_proportions_for_new_parameters(param_records)
-
-        df_params.drop_table_from_database_and_remove_from_cache()
-
-        maximisation_step(em_training_session, param_records)
-        max_change_dict = (
-            em_training_session._max_change_in_parameters_comparison_levels()
-        )
-        logger.info(f"Iteration {i}: {max_change_dict['message']}")
-        end_time = time.time()
-        logger.log(15, f"    Iteration time: {end_time - start_time} seconds")
-
-        if max_change_dict["max_abs_change_value"] < em_convergece:
-            break
+            if max_change_dict["max_abs_change_value"] < em_convergece:
+                break
     logger.info(f"\nEM converged after {i} iterations")
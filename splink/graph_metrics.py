@@ -92,147 +92,6 @@ def _node_degree_sql(
     return sqls
 
 
-def _node_mapping_table_sql(
-    df_node_metrics: SplinkDataFrame,
-):
-    """
-    Generate SQL to make a table that maps composite_unique_ids to 1-indexed integers.
-
-    This is the node-labelling-scheme required by igraph
-    """
-    nodes_table_name = df_node_metrics.physical_name
-    sql_infos = []
-    sql = f"""
-        SELECT
-            composite_unique_id,
-            row_number() OVER(ORDER BY 1) - 1 AS new_id
-        FROM
-            {nodes_table_name}
-    """
-    node_mapping_table_name = "__splink__nodes_integer_mapping"
-    sql_info = {"sql": sql, "output_table_name": node_mapping_table_name}
-    sql_infos.append(sql_info)
-    return sql_infos
-
-
-def _edges_for_igraph_sql(
-    df_node_mappings: SplinkDataFrame,
-    truncated_edges_table_name: str,
-    composite_uid_edges_l: str,
-    composite_uid_edges_r: str,
-):
-    """
-    Generate SQL to relabel an edges table using the node relabelling as
-    generated by table specified by `_node_mapping_table_sql`
-    """
-    node_mapping_table_name = df_node_mappings.physical_name
-    sql = f"""
-        SELECT
-            edges_left_mapped.node_l,
-            m.new_id AS node_r
-        FROM (
-            SELECT
-                m.new_id AS node_l,
-                e.{composite_uid_edges_r} AS node_r
-            FROM
-                {truncated_edges_table_name} e
-            LEFT JOIN
-                {node_mapping_table_name} m
-            ON
-                e.{composite_uid_edges_l} = m.composite_unique_id
-        ) edges_left_mapped
-        LEFT JOIN
-            {node_mapping_table_name} m
-        ON
-            m.composite_unique_id = edges_left_mapped.node_r
-    """
-    edges_with_mapped_ids_table_name = "__splink__edges_with_mapped_ids"
-    sql_info = {"sql": sql, "output_table_name": edges_with_mapped_ids_table_name}
-    return sql_info
-
-
-def _bridges_from_igraph_sql(
-    df_node_mappings: SplinkDataFrame,
-    df_bridges: SplinkDataFrame,
-):
-    """
-    Generate SQL to relabel an edges table back to the original labelling
-    using the node relabelling as generated by table specified by
-    `_node_mapping_table_sql` in 'reverse'
-    """
-    node_mapping_table_name = df_node_mappings.physical_name
-    sql = f"""
-        SELECT
-            e.node_l AS node_l,
-            m.composite_unique_id AS node_r,
-            TRUE AS is_bridge
-        FROM(
-            SELECT
-                m.composite_unique_id AS node_l,
-                e.node_r
-            FROM
-                {df_bridges.physical_name} e
-            LEFT JOIN
-                {node_mapping_table_name} m
-            ON
-                e.node_l = m.new_id
-        ) e
-        LEFT JOIN
-            {node_mapping_table_name} m
-        ON
-            m.new_id = e.node_r
-    """
-    edges_with_mapped_ids_table_name = "__splink__bridges_only"
-    sql_info = {"sql": sql, "output_table_name": edges_with_mapped_ids_table_name}
-    return sql_info
-
-
-def _full_bridges_sql(
-    df_truncated_edges: SplinkDataFrame,
-    bridges_only_table_name: str,
-    composite_uid_edges_l: str,
-    composite_uid_edges_r: str,
-):
-    """
-    Generate SQL to combine a table of only bridges with the remaining (non-bridge)
-    edges, and mark them as such
-    """
-    sql = f"""
-        SELECT
-            e.{composite_uid_edges_l} AS composite_unique_id_l,
-            e.{composite_uid_edges_r} AS composite_unique_id_r,
-            COALESCE(b.is_bridge, FALSE) AS is_bridge
-        FROM
-        {df_truncated_edges.physical_name} e
-        LEFT JOIN
-        {bridges_only_table_name} b
-        ON
-            e.{composite_uid_edges_l} = b.node_l
-        AND e.{composite_uid_edges_r} = b.node_r
-    """
-    edges_metrics_table_name = "__splink__graph_metrics_edges"
-    sql_info = {"sql": sql, "output_table_name": edges_metrics_table_name}
-    return sql_info
-
-
-def _basic_edge_metrics_sql(
-    composite_uid_edges_l: str,
-    composite_uid_edges_r: str,
-    truncated_edges_table_name: str,
-) -> List[Dict[str, str]]:
-    # dummy sql that returns the edges without any metrics, as there are none
-    # that we can currently compute without igraph
-    sql_info = {
-        "sql": (
-            f"SELECT {composite_uid_edges_l} AS composite_unique_id_l, "
-            f"{composite_uid_edges_r} AS composite_unique_id_r "
-            f"FROM {truncated_edges_table_name}"
-        ),
-        "output_table_name": "__splink__graph_metrics_edges",
-    }
-    return sql_info
-
-
 def _size_density_centralisation_sql(
     df_node_metrics: SplinkDataFrame,
 ) -> List[Dict[str, str]]:
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from copy import deepcopy
 from dataclasses import dataclass, replace
+from functools import lru_cache
 
 import sqlglot
 import sqlglot.expressions as exp
 
 from .default_from_jsonschema import default_value_from_schema
+from .parse_sql import parse_one_cached
 from .sql_transform import sqlglot_tree_signature
 
 
@@ -76,6 +78,7 @@ class SqlglotColumnTreeBuilder:
         return self.as_sqlglot_tree.sql(dialect=self.sqlglot_dialect)
 
     @classmethod
+    @lru_cache(maxsize=4096)  # noqa: B019 - builders are immutable, so can be shared
     def from_raw_column_name_or_column_reference(cls, input_str, sqlglot_dialect):
         def tree_to_sqlglot_column_tree_builder_args(sqlglot_tree, sqlglot_dialect):
             args = {"sqlglot_dialect": sqlglot_dialect, "quoted": True}
@@ -99,14 +102,14 @@ class SqlglotColumnTreeBuilder:
                 return f"{q_s}{input_str}{q_e}"
 
         valid_signatures = {
-            sqlglot_tree_signature(sqlglot.parse_one("col_name")),
-            sqlglot_tree_signature(sqlglot.parse_one("col_name[1]")),
-            sqlglot_tree_signature(sqlglot.parse_one("col_name['lat']")),
+            sqlglot_tree_signature(parse_one_cached("col_name", copy=False)),
+            sqlglot_tree_signature(parse_one_cached("col_name[1]", copy=False)),
+            sqlglot_tree_signature(parse_one_cached("col_name['lat']", copy=False)),
         }
 
         # If the raw string parses to a valid signature, use it
         try:
-            tree = sqlglot.parse_one(input_str, read=sqlglot_dialect)
+            tree = parse_one_cached(input_str, sqlglot_dialect, copy=False)
         except (sqlglot.ParseError, sqlglot.TokenError):
             pass
         else:
@@ -123,7 +126,7 @@ class SqlglotColumnTreeBuilder:
         q_s, q_e = _get_dialect_quotes(sqlglot_dialect)
         input_str = add_quotes_to_column_name(input_str, q_s, q_e)
         try:
-            tree = sqlglot.parse_one(input_str, read=sqlglot_dialect)
+            tree = parse_one_cached(input_str, sqlglot_dialect, copy=False)
         except (sqlglot.ParseError, sqlglot.TokenError):
             pass
         else:
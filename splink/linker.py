@@ -5,8 +5,10 @@ import json
 import logging
 import os
 import re
+import threading
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from copy import copy, deepcopy
 from pathlib import Path
 from statistics import median
@@ -55,7 +57,6 @@ from .charts import (
     unlinkables_chart,
     waterfall_chart,
 )
-from .cluster_studio import render_splink_cluster_studio_html
 from .comparison import Comparison
 from .comparison_level import ComparisonLevel
 from .comparison_vector_distribution import (
@@ -64,11 +65,17 @@ from .comparison_vector_distribution import (
 from .comparison_vector_values import compute_comparison_vector_values_sql
 from .connected_components import (
     _cc_create_unique_id_cols,
+    cluster_incrementally,
     solve_connected_components,
+    solve_connected_components_at_thresholds,
 )
 from .edge_metrics import compute_edge_metrics
 from .em_training_session import EMTrainingSession
-from .estimate_u import estimate_u_values
+from .estimate_u import (
+    estimate_u_values,
+    estimate_u_values_adaptively,
+    estimate_u_values_from_value_frequencies,
+)
 from .exceptions import SplinkDeprecated, SplinkException
 from .find_brs_with_comparison_counts_below_threshold import (
     find_blocking_rules_below_threshold_comparison_count,
@@ -79,10 +86,6 @@ from .graph_metrics import (
     _node_degree_sql,
     _size_density_centralisation_sql,
 )
-from .labelling_tool import (
-    generate_labelling_tool_comparisons,
-    render_labelling_tool_html,
-)
 from .logging_messages import execute_sql_logging_message_info, log_sql
 from .m_from_labels import estimate_m_from_pairwise_labels
 from .m_training import estimate_m_values_from_label_column
@@ -90,6 +93,7 @@ from .match_key_analysis import (
     count_num_comparisons_from_blocking_rules_for_prediction_sql,
 )
 from .match_weights_histogram import histogram_data
+from .materialisation_planner import MaterialisationPlanner
 from .misc import (
     ascii_uid,
     bayes_factor_to_prob,
@@ -99,25 +103,33 @@ from .misc import (
     prob_to_bayes_factor,
 )
 from .missingness import completeness_data, missingness_data
+from .native_graph_metrics import compute_graph_metrics_in_memory
 from .optimise_cost_of_brs import suggest_blocking_rules
+from .persistent_cache import PersistentCache
 from .pipeline import SQLPipeline
 from .predict import predict_from_comparison_vectors_sqls
 from .profile_data import profile_columns
+from .query_profiler import QueryProfiler
 from .settings import Settings
-from .splink_comparison_viewer import (
-    comparison_viewer_table_sqls,
-    render_splink_comparison_viewer_html,
-)
 from .splink_dataframe import SplinkDataFrame
 from .term_frequencies import (
+    _approximate_tf_min_count,
     _join_tf_to_input_df_sql,
+    _single_scan_term_frequencies_supported,
+    _term_frequency_columns_to_compute,
     colname_to_tf_tablename,
     compute_all_term_frequencies_sqls,
     compute_term_frequencies_from_concat_with_tf,
+    term_frequencies_for_all_columns_sql,
     term_frequencies_for_single_column_sql,
     term_frequencies_from_concat_with_tf,
     tf_adjustment_chart,
 )
+from .term_frequency_store import (
+    append_to_term_frequency_store,
+    load_or_compute_term_frequencies,
+)
+from .tracing import trace_span, traced
 from .unique_id_concat import (
     _composite_unique_id_from_edges_sql,
     _composite_unique_id_from_nodes_sql,
@@ -226,6 +238,9 @@ class Linker:
         self._pipeline = SQLPipeline()
 
         self._intermediate_table_cache: dict = CacheDictWithLogging()
+        # Held while the cache, query profiler and persistent cache are read or
+        # updated, since independent pipeline steps may execute concurrently
+        self._bookkeeping_lock = threading.RLock()
 
         homogenised_tables, homogenised_aliases = self._register_input_tables(
             input_table_or_tables,
@@ -241,6 +256,8 @@ class Linker:
 
         self._em_training_sessions = []
 
+        self._approximate_tf_min_counts = {}
+
         self._find_new_matches_mode = False
         self._train_u_using_random_sample_mode = False
         self._compare_two_records_mode = False
@@ -249,6 +266,15 @@ class Linker:
         self._deterministic_link_mode = False
 
         self.debug_mode = False
+        # If true, pipelines are split into steps, which materialise tables that
+        # are read more than once, and independent steps run concurrently where
+        # the backend allows
+        self.dag_execution_mode = False
+        self._materialisation_planner = None
+
+        self._persistent_cache = None
+        self._query_profiler = None
+        self._tracing_hooks = []
 
     def _input_columns(
         self,
@@ -559,17 +585,39 @@ class Linker:
                 # we execute the pipeline, it'll get cleared anyway
                 self._pipeline.reset()
 
+            # Where several tf tables are needed, compute them all in a single
+            # scan of the input data, materialised so it is not repeated in
+            # each of the tf tables that read from it
+            tf_cols = _term_frequency_columns_to_compute(self)
+            single_scan = (
+                materialise
+                and len(tf_cols) > 1
+                and _single_scan_term_frequencies_supported(self)
+            )
+            input_dataframes = []
+            if single_scan:
+                sql = vertically_concatenate_sql(self)
+                self._enqueue_sql(sql, "__splink__df_concat")
+                sql = term_frequencies_for_all_columns_sql(tf_cols)
+                self._enqueue_sql(sql, "__splink__df_all_tfs")
+                input_dataframes.append(self._execute_sql_pipeline())
+
             sql = vertically_concatenate_sql(self)
             self._enqueue_sql(sql, "__splink__df_concat")
 
-            sqls = compute_all_term_frequencies_sqls(self)
+            sqls = compute_all_term_frequencies_sqls(
+                self, from_all_tfs_table=single_scan
+            )
             for sql in sqls:
                 self._enqueue_sql(sql["sql"], sql["output_table_name"])
 
             if materialise:
-                nodes_with_tf = self._execute_sql_pipeline()
+                nodes_with_tf = self._execute_sql_pipeline(input_dataframes)
                 cache["__splink__df_concat_with_tf"] = nodes_with_tf
 
+            for df in input_dataframes:
+                df.drop_table_from_database_and_remove_from_cache()
+
         return nodes_with_tf
 
     def _table_to_splink_dataframe(
@@ -593,6 +641,7 @@ class Linker:
         """Add sql to the current pipeline, but do not execute the pipeline."""
         self._pipeline.enqueue_sql(sql, output_table_name)
 
+    @traced("execute_sql_pipeline", count_output_rows=False)
     def _execute_sql_pipeline(
         self,
         input_dataframes: list[SplinkDataFrame] = [],
@@ -614,8 +663,16 @@ class Linker:
                 pipeline
         """
 
+        if self.dag_execution_mode and not self.debug_mode:
+            try:
+                return self._execute_sql_pipeline_steps(input_dataframes, use_cache)
+            finally:
+                self._pipeline.reset()
+
         if not self.debug_mode:
-            sql_gen = self._pipeline._generate_pipeline(input_dataframes)
+            sql_gen = self._pipeline._generate_pipeline(
+                input_dataframes, self._inline_input_ctes
+            )
 
             output_tablename_templated = self._pipeline.queue[-1].output_table_name
 
@@ -653,6 +710,100 @@ class Linker:
             self._pipeline.reset()
             return dataframe
 
+    def enable_cost_based_materialisation(
+        self, materialisation_overhead_rows: int = 10_000
+    ):
+        """Decide which intermediate tables of each SQL pipeline to materialise, and
+        which to inline as CTEs, using estimated costs.
+
+        This turns on `dag_execution_mode`, in which each pipeline is split into
+        steps.  A table read more than once is materialised only if the estimated
+        cost of recomputing it for each read exceeds the cost of writing and
+        reading it.  Costs are estimated from the row counts of the input tables,
+        and of tables computed in previous pipelines.
+
+        Examples:
+            ```py
+            linker = DuckDBLinker(df, settings)
+            linker.enable_cost_based_materialisation()
+            linker.estimate_parameters_using_expectation_maximisation(br)
+            ```
+
+        Args:
+            materialisation_overhead_rows (int, optional): The fixed cost of
+                creating a table, expressed as a number of rows processed.  Larger
+                values mean fewer small tables are materialised. Defaults to
+                10,000.
+        """
+        self.dag_execution_mode = True
+        self._materialisation_planner = MaterialisationPlanner(
+            self, materialisation_overhead_rows=materialisation_overhead_rows
+        )
+
+    def _execute_sql_pipeline_steps(
+        self,
+        input_dataframes: list[SplinkDataFrame],
+        use_cache: bool,
+    ) -> SplinkDataFrame:
+        """Execute the SQL queued in the current pipeline as a series of steps,
+        following the dependency graph of its tasks.
+
+        Tables read more than once within the pipeline are materialised, and steps
+        that do not depend on each other run concurrently if the backend supports
+        it.  Materialised tables other than the output are dropped once the
+        pipeline has run.
+        """
+        planner = self._materialisation_planner
+        steps = self._pipeline._generate_pipeline_steps(input_dataframes, planner)
+        cache = self._intermediate_table_cache
+        physical_names_in_cache = {df.physical_name for df in cache.data.values()}
+
+        def execute_step(step):
+            pipeline = SQLPipeline()
+            pipeline.queue = step.tasks
+            sql = pipeline._generate_pipeline(
+                [step_outputs[name] for name in step.input_table_names],
+                self._inline_input_ctes,
+            )
+            return self._sql_to_splink_dataframe_checking_cache(
+                sql, step.output_table_name, use_cache
+            )
+
+        step_outputs = {}
+        for level in sorted({step.level for step in steps}):
+            level_steps = [step for step in steps if step.level == level]
+            if len(level_steps) > 1 and self._supports_concurrent_sql_execution:
+                with ThreadPoolExecutor(max_workers=len(level_steps)) as executor:
+                    outputs = list(executor.map(execute_step, level_steps))
+            else:
+                outputs = [execute_step(step) for step in level_steps]
+            for step, output in zip(level_steps, outputs):
+                step_outputs[step.output_table_name] = output
+                if planner is not None:
+                    planner.record_output(output)
+
+        output = step_outputs[steps[-1].output_table_name]
+        for df in step_outputs.values():
+            if (
+                df.physical_name != output.physical_name
+                and df.physical_name not in physical_names_in_cache
+            ):
+                df.drop_table_from_database_and_remove_from_cache()
+
+        return output
+
+    @property
+    def _supports_concurrent_sql_execution(self):
+        """Whether independent SQL statements can be executed concurrently from
+        several threads"""
+        return False
+
+    @property
+    def _inline_input_ctes(self):
+        """Whether the CTEs of a SQL pipeline that read its input tables should be
+        marked NOT MATERIALIZED, so the planner can use the indexes of the tables"""
+        return False
+
     def _execute_sql_against_backend(
         self, sql: str, templated_name: str, physical_name: str
     ) -> SplinkDataFrame:
@@ -838,34 +989,12 @@ class Linker:
         # Ensure hash is valid sql table name
         table_name_hash = f"{output_tablename_templated}_{hash}"
 
-        if use_cache:
-            # Certain tables are put in the cache using their templated_name
-            # An example is __splink__df_concat_with_tf
-            # These tables are put in the cache when they are first calculated
-            # e.g. with _initialise_df_concat_with_tf()
-            # But they can also be put in the cache manually using
-            # e.g. register_table_input_nodes_concat_with_tf()
-
-            # Look for these 'named' tables in the cache prior
-            # to looking for the hashed version
-
-            if output_tablename_templated in self._intermediate_table_cache:
-                return self._intermediate_table_cache.get_with_logging(
-                    output_tablename_templated
-                )
-
-            if table_name_hash in self._intermediate_table_cache:
-                return self._intermediate_table_cache.get_with_logging(table_name_hash)
-
-            # If not in cache, fall back on checking the database
-            if self._table_exists_in_database(table_name_hash):
-                logger.debug(
-                    f"Found cache for {output_tablename_templated} "
-                    f"in database using table name with physical name {table_name_hash}"
-                )
-                return self._table_to_splink_dataframe(
-                    output_tablename_templated, table_name_hash
-                )
+        with self._bookkeeping_lock:
+            cached = self._cached_splink_dataframe(
+                sql, output_tablename_templated, table_name_hash, use_cache
+            )
+        if cached is not None:
+            return cached
 
         if self.debug_mode:
             print(sql)  # noqa: T201
@@ -875,8 +1004,6 @@ class Linker:
                 output_tablename_templated,
             )
 
-            self._intermediate_table_cache.executed_queries.append(splink_dataframe)
-
             df_pd = splink_dataframe.as_pandas_dataframe()
             try:
                 from IPython.display import display
@@ -885,19 +1012,86 @@ class Linker:
             except ModuleNotFoundError:
                 print(df_pd)  # noqa: T201
 
+        elif self._query_profiler is not None:
+            splink_dataframe = self._query_profiler.profile_execution(
+                sql,
+                output_tablename_templated,
+                lambda: self._execute_sql_against_backend(
+                    sql, output_tablename_templated, table_name_hash
+                ),
+            )
         else:
             splink_dataframe = self._execute_sql_against_backend(
                 sql, output_tablename_templated, table_name_hash
             )
-            self._intermediate_table_cache.executed_queries.append(splink_dataframe)
 
-        splink_dataframe.created_by_splink = True
-        splink_dataframe.sql_used_to_create = sql
+        with self._bookkeeping_lock:
+            if use_cache and not self.debug_mode and self._persistent_cache is not None:
+                self._persistent_cache.save(splink_dataframe, sql)
+            self._intermediate_table_cache.executed_queries.append(
+                copy(splink_dataframe)
+            )
+
+            splink_dataframe.created_by_splink = True
+            splink_dataframe.sql_used_to_create = sql
+
+            physical_name = splink_dataframe.physical_name
+
+            self._intermediate_table_cache[physical_name] = splink_dataframe
+
+        return splink_dataframe
+
+    def _cached_splink_dataframe(
+        self, sql, output_tablename_templated, table_name_hash, use_cache
+    ) -> SplinkDataFrame | None:
+        """Return the results of sql from the cache, the database or the persistent
+        cache if they have already been computed, otherwise None"""
+        if not use_cache:
+            return None
+
+        # Certain tables are put in the cache using their templated_name
+        # An example is __splink__df_concat_with_tf
+        # These tables are put in the cache when they are first calculated
+        # e.g. with _initialise_df_concat_with_tf()
+        # But they can also be put in the cache manually using
+        # e.g. register_table_input_nodes_concat_with_tf()
+
+        # Look for these 'named' tables in the cache prior
+        # to looking for the hashed version
+
+        if output_tablename_templated in self._intermediate_table_cache:
+            return self._intermediate_table_cache.get_with_logging(
+                output_tablename_templated
+            )
+
+        if table_name_hash in self._intermediate_table_cache:
+            return self._intermediate_table_cache.get_with_logging(table_name_hash)
 
-        physical_name = splink_dataframe.physical_name
+        # If not in cache, fall back on checking the database
+        if self._table_exists_in_database(table_name_hash):
+            logger.debug(
+                f"Found cache for {output_tablename_templated} "
+                f"in database using table name with physical name {table_name_hash}"
+            )
+            return self._table_to_splink_dataframe(
+                output_tablename_templated, table_name_hash
+            )
 
-        self._intermediate_table_cache[physical_name] = splink_dataframe
+        if self.debug_mode or self._persistent_cache is None:
+            return None
 
+        splink_dataframe = self._persistent_cache.load(
+            sql, output_tablename_templated, table_name_hash
+        )
+        if splink_dataframe is not None:
+            self._intermediate_table_cache.executed_queries.append(
+                copy(splink_dataframe)
+            )
+            splink_dataframe.created_by_splink = True
+            splink_dataframe.sql_used_to_create = sql
+            self._intermediate_table_cache[
+                splink_dataframe.physical_name
+            ] = splink_dataframe
         return splink_dataframe
 
     def __deepcopy__(self, memo):
@@ -960,6 +1154,27 @@ class Linker:
             f"table_exists_in_database not implemented for {type(self)}"
         )
 
+    def _explain_sql(self, sql):
+        """Return the backend's query plan for sql, as text"""
+        raise NotImplementedError(f"_explain_sql not implemented for {type(self)}")
+
+    def _table_size(self, physical_name):
+        """Return the number of rows in a table, and an estimate of its size in
+        bytes, or None if the backend cannot estimate it"""
+        sql = f"select count(*) as row_count from {physical_name}"
+        df = self._execute_sql_against_backend(
+            sql, "__splink__table_size", f"__splink__table_size_{ascii_uid(8)}"
+        )
+        row_count = df.as_record_dict()[0]["row_count"]
+        df._drop_table_from_database(force_non_splink_table=True)
+        return row_count, None
+
+    def _table_size_estimate(self, physical_name):
+        """Return estimates of the number of rows in a table and its size in bytes,
+        either of which may be None, without scanning the table on backends where
+        that is expensive.  Used to keep the cache within its budget"""
+        return self._table_size(physical_name)
+
     def _validate_input_dfs(self):
         if not hasattr(self, "_input_tables_dict"):
             # This is only triggered where a user loads a settings dict from a
@@ -1234,6 +1449,34 @@ class Linker:
             stacklevel=2,
         )
 
+    def use_approximate_term_frequencies(self, column_name: str, min_count: int):
+        """Use approximate term frequencies for a high cardinality column, such as
+        an email address, to reduce the size of its term frequency table.
+
+        Only values that occur at least `min_count` times have their term frequency
+        retained exactly.  All other values are assigned the mean term frequency of
+        the values that were dropped, which the term frequency table holds on a
+        single row for one of those values, with a null term frequency.  As these
+        values are rare, their term frequency adjustments are small, so the effect
+        on match weights is negligible whilst the term frequency table, and the
+        cost of joining it to the input data, is much reduced.
+
+        This must be called before term frequencies are computed.
+
+        Examples:
+            ```py
+            linker.use_approximate_term_frequencies("email", min_count=2)
+            df_predict = linker.predict()
+            ```
+
+        Args:
+            column_name (str): The column for which term frequencies are computed
+            min_count (int): The minimum number of occurrences of a value for its
+                term frequency to be retained exactly
+        """
+        input_col = InputColumn(column_name, settings_obj=self._settings_obj)
+        self._approximate_tf_min_counts[input_col.unquote().name] = min_count
+
     def compute_tf_table(self, column_name: str) -> SplinkDataFrame:
         """Compute a term frequency table for a given column and persist to the database
 
@@ -1301,7 +1544,9 @@ class Linker:
             # If our df_concat_with_tf table already exists, use backwards inference to
             # find a given tf table
             colname = InputColumn(column_name)
-            sql = term_frequencies_from_concat_with_tf(colname)
+            sql = term_frequencies_from_concat_with_tf(
+                colname, _approximate_tf_min_count(self, colname)
+            )
             self._enqueue_sql(sql, colname_to_tf_tablename(colname))
             tf_df = self._execute_sql_pipeline([cache["__splink__df_concat_with_tf"]])
             self._intermediate_table_cache[tf_tablename] = tf_df
@@ -1312,7 +1557,9 @@ class Linker:
             input_dfs = []
             if df_concat:
                 input_dfs.append(df_concat)
-            sql = term_frequencies_for_single_column_sql(input_col)
+            sql = term_frequencies_for_single_column_sql(
+                input_col, min_count=_approximate_tf_min_count(self, input_col)
+            )
             self._enqueue_sql(sql, tf_tablename)
             tf_df = self._execute_sql_pipeline(input_dfs)
             self._intermediate_table_cache[tf_tablename] = tf_df
@@ -1418,8 +1665,16 @@ class Linker:
         [b.drop_materialised_id_pairs_dataframe() for b in exploding_br_with_id_tables]
         return deterministic_link_df
 
+    @traced("estimate_u_using_random_sampling")
     def estimate_u_using_random_sampling(
-        self, max_pairs: int = None, seed: int = None, *, target_rows=None
+        self,
+        max_pairs: int = None,
+        seed: int = None,
+        *,
+        target_rows=None,
+        target_relative_standard_error: float = None,
+        max_seconds: float = None,
+        pairs_per_chunk: int = None,
     ):
         """Estimate the u parameters of the linkage model using random sampling.
 
@@ -1446,11 +1701,33 @@ class Linker:
             seed (int): Seed for random sampling. Assign to get reproducible u
             probabilities. Note, seed for random sampling is only supported for
             DuckDB and Spark, for Athena and SQLite set to None.
+            target_relative_standard_error (float, optional): If set, u is
+            estimated adaptively. Pairs are sampled in successive chunks (each
+            chunk seeded with seed + chunk number, if seed is set), and sampling
+            stops as soon as the relative standard error of the u probability of
+            every comparison level is below this target, or once max_pairs pairs
+            or max_seconds have been used.  Defaults to None, meaning a single
+            sample of max_pairs is taken.
+            max_seconds (float, optional): In adaptive mode, a time budget after
+            which no further chunks are sampled. Defaults to None.
+            pairs_per_chunk (int, optional): In adaptive mode, the number of pairs
+            to sample in each chunk. Defaults to max_pairs / 10.
 
         Examples:
             ```py
             linker.estimate_u_using_random_sampling(1e8)
             ```
+            Sample in chunks of ten million pairs until every u probability is
+            known to within 2%, up to a maximum of one billion pairs or ten
+            minutes:
+            ```py
+            linker.estimate_u_using_random_sampling(
+                1e9,
+                target_relative_standard_error=0.02,
+                max_seconds=600,
+                pairs_per_chunk=1e7,
+            )
+            ```
 
         Returns:
             None: Updates the estimated u parameters within the linker object
@@ -1475,7 +1752,64 @@ class Linker:
         else:
             raise TypeError("Missing argument max_pairs")
 
-        estimate_u_values(self, max_pairs, seed)
+        if target_relative_standard_error is not None or max_seconds is not None:
+            if target_relative_standard_error is None:
+                target_relative_standard_error = 0.0
+            estimate_u_values_adaptively(
+                self,
+                max_pairs,
+                seed,
+                target_relative_standard_error=target_relative_standard_error,
+                max_seconds=max_seconds,
+                pairs_per_chunk=pairs_per_chunk,
+            )
+        else:
+            estimate_u_values(self, max_pairs, seed)
+        self._populate_m_u_from_trained_values()
+
+        self._settings_obj._columns_without_estimated_parameters_message()
+
+    def estimate_u_using_value_frequencies(
+        self, max_pairs: int = 1e6, seed: int = None
+    ):
+        """Estimate the u parameters of the linkage model directly from the
+        frequencies of values in the input data, falling back to random sampling
+        only where this is not possible.
+
+        Amongst random pairs of records, the probability that two records agree
+        exactly on a column is determined by the distribution of values in that
+        column.  For a comparison whose first (non-null) level is an exact match on a
+        single column, the u probability of that level is therefore computed exactly
+        using a single aggregation over the input data, rather than estimated by
+        sampling.  This is faster and more accurate than sampling, especially for
+        rare values.
+
+        The u probabilities of any remaining levels (e.g. fuzzy matches) are
+        estimated from a random sample of pairwise record comparisons, as
+        in `estimate_u_using_random_sampling()`, and rescaled to be consistent with
+        the exact match u probability.  Because only these levels are sampled, a
+        far smaller `max_pairs` is usually adequate.  Where every comparison
+        consists only of an exact match level and an else level, no sampling takes
+        place.
+
+        Args:
+            max_pairs (int, optional): The maximum number of pairwise record
+                comparisons to sample to estimate the u probabilities of levels
+                which cannot be computed from value frequencies. Defaults to 1e6.
+            seed (int, optional): Seed for random sampling. Assign to get
+                reproducible u probabilities. Note, seed for random sampling is only
+                supported for DuckDB and Spark, for Athena and SQLite set to None.
+
+        Examples:
+            ```py
+            linker.estimate_u_using_value_frequencies(max_pairs=1e6)
+            ```
+
+        Returns:
+            None: Updates the estimated u parameters within the linker object
+            and returns nothing.
+        """
+        estimate_u_values_from_value_frequencies(self, max_pairs, seed)
         self._populate_m_u_from_trained_values()
 
         self._settings_obj._columns_without_estimated_parameters_message()
@@ -1524,6 +1858,7 @@ class Linker:
 
         self._settings_obj._columns_without_estimated_parameters_message()
 
+    @traced("estimate_parameters_using_expectation_maximisation")
     def estimate_parameters_using_expectation_maximisation(
         self,
         blocking_rule: str,
@@ -1534,6 +1869,8 @@ class Linker:
         fix_m_probabilities=False,
         fix_u_probabilities=True,
         populate_probability_two_random_records_match_from_trained_values=False,
+        max_pairs: int = None,
+        seed: int = None,
     ) -> EMTrainingSession:
         """Estimate the parameters of the linkage model using expectation maximisation.
 
@@ -1614,6 +1951,18 @@ class Linker:
             populate_probability_two_random_records_match_from_trained_values
                 (bool, optional): If True, derive this parameter from
                 the blocked value. Defaults to False.
+            max_pairs (int, optional): If provided, and the blocking rule generates
+                more than this number of pairwise record comparisons, train on a
+                random sample of approximately `max_pairs` of the blocked
+                comparisons rather than all of them.  This bounds the cost of
+                training when a loose blocking rule is used.  Confidence intervals
+                for the resultant m estimates are available from
+                `m_probability_confidence_interval_records()` on the returned
+                training session.  Defaults to None (no sampling).
+            seed (int, optional): Seed for the random sample of blocked
+                comparisons used when `max_pairs` is set. Assign to get reproducible
+                parameter estimates. As with `estimate_u_using_random_sampling`,
+                seeds are only supported for DuckDB and Spark. Defaults to None.
 
         Examples:
             ```py
@@ -1677,6 +2026,8 @@ class Linker:
             comparisons_to_deactivate=comparisons_to_deactivate,
             comparison_levels_to_reverse_blocking_rule=comparison_levels_to_reverse_blocking_rule,  # noqa 501
             estimate_without_term_frequencies=estimate_without_term_frequencies,
+            max_pairs=max_pairs,
+            seed=seed,
         )
 
         em_training_session._train()
@@ -1690,6 +2041,7 @@ class Linker:
 
         return em_training_session
 
+    @traced("predict")
     def predict(
         self,
         threshold_match_probability: float = None,
@@ -2049,12 +2401,14 @@ class Linker:
 
         return predictions
 
+    @traced("cluster_pairwise_predictions_at_threshold")
     def cluster_pairwise_predictions_at_threshold(
         self,
         df_predict: SplinkDataFrame,
         threshold_match_probability: float = None,
         pairwise_formatting: bool = False,
         filter_pairwise_format_for_clusters: bool = True,
+        algorithm: str = "label_propagation",
     ) -> SplinkDataFrame:
         """Clusters the pairwise match predictions that result from `linker.predict()`
         into groups of connected record using the connected components graph clustering
@@ -2077,6 +2431,18 @@ class Linker:
             filter_pairwise_format_for_clusters (bool): If pairwise formatting has been
                 selected, whether to output all columns found within linker.predict(),
                 or just return clusters.
+            algorithm (str): The algorithm used to find connected components.
+                "label_propagation" (the default) iteratively propagates the
+                minimum id of each cluster in SQL, taking one iteration per step
+                of the longest path within a cluster.
+                "large_star_small_star" also runs in SQL, but needs only a
+                logarithmic number of iterations, so is faster on graphs with long
+                chains where the edges are too large to fit in memory, such as
+                when using Spark.
+                "union_find" pulls the edges into memory and solves using numpy,
+                which is fastest where the edges fit in memory, such as when using
+                DuckDB or SQLite.
+                All three give identical clusters and cluster ids.
 
         Returns:
             SplinkDataFrame: A SplinkDataFrame containing a list of all IDs, clustered
@@ -2101,6 +2467,100 @@ class Linker:
             concat_with_tf,
             pairwise_formatting,
             filter_pairwise_format_for_clusters,
+            algorithm=algorithm,
+        )
+        cc.metadata["threshold_match_probability"] = threshold_match_probability
+
+        return cc
+
+    def cluster_pairwise_predictions_at_multiple_thresholds(
+        self,
+        df_predict: SplinkDataFrame,
+        threshold_match_probabilities: list[float],
+    ) -> SplinkDataFrame:
+        """Clusters the pairwise match predictions that result from `linker.predict()`
+        at each of several match probability thresholds, in a single pass.
+
+        This is equivalent to calling `cluster_pairwise_predictions_at_threshold()`
+        once per threshold, but the predictions are read only once.  Edges are added
+        to an in-memory union-find in descending order of `match_probability`, and
+        the clusters are recorded as each threshold is passed.
+
+        Examples:
+            ```py
+            df_predict = linker.predict(threshold_match_probability=0.5)
+            df_clusters = linker.cluster_pairwise_predictions_at_multiple_thresholds(
+                df_predict, [0.5, 0.9, 0.99]
+            )
+            ```
+
+        Args:
+            df_predict (SplinkDataFrame): The results of `linker.predict()`
+            threshold_match_probabilities (list[float]): The thresholds at which
+                to cluster.
+
+        Returns:
+            SplinkDataFrame: A SplinkDataFrame containing all input records, with
+                one cluster id column per threshold, named e.g. `cluster_id_0_9`
+                for a threshold of 0.9.
+        """
+
+        concat_with_tf = self._initialise_df_concat_with_tf(df_predict)
+
+        cc = solve_connected_components_at_thresholds(
+            self, df_predict, concat_with_tf, threshold_match_probabilities
+        )
+        cc.metadata["threshold_match_probabilities"] = threshold_match_probabilities
+
+        return cc
+
+    def cluster_pairwise_predictions_incrementally(
+        self,
+        df_clusters: SplinkDataFrame,
+        df_new_predictions: SplinkDataFrame,
+        threshold_match_probability: float = None,
+    ) -> SplinkDataFrame:
+        """Updates an existing clustering with new pairwise match predictions, for
+        instance the matches of newly arrived records found using
+        `linker.find_matches_to_new_records()`.
+
+        Only the clusters touched by a new prediction are merged, so the cost is
+        proportional to the number of new predictions rather than to the size of
+        the whole graph.  Merged clusters take the minimum of their cluster ids, so
+        the result is the same as reclustering all predictions with
+        `cluster_pairwise_predictions_at_threshold()`, and records in clusters that
+        are not touched keep their cluster id.
+
+        Examples:
+            ```py
+            df_clusters = linker.cluster_pairwise_predictions_at_threshold(
+                df_predict, 0.95
+            )
+            df_new_matches = linker.find_matches_to_new_records(new_records)
+            df_clusters = linker.cluster_pairwise_predictions_incrementally(
+                df_clusters, df_new_matches, 0.95
+            )
+            ```
+
+        Args:
+            df_clusters (SplinkDataFrame): An existing clustering, in the format
+                output by `cluster_pairwise_predictions_at_threshold()`
+            df_new_predictions (SplinkDataFrame): The new pairwise match
+                predictions
+            threshold_match_probability (float): Include only new predictions
+                with a match_probability at or above this threshold.
+
+        Returns:
+            SplinkDataFrame: The records of `df_clusters` with updated cluster ids,
+                plus a row for each record that appears only in the new predictions.
+                The columns of these records are taken from the linker's input
+                data.  For records that are not in the input data, such as the new
+                records passed to `find_matches_to_new_records()`, columns other
+                than `cluster_id` and the unique id columns are null.
+        """
+
+        cc = cluster_incrementally(
+            self, df_clusters, df_new_predictions, threshold_match_probability
         )
         cc.metadata["threshold_match_probability"] = threshold_match_probability
 
@@ -2160,20 +2620,17 @@ class Linker:
 
     def _compute_metrics_edges(
         self,
-        df_node_metrics: SplinkDataFrame,
         df_predict: SplinkDataFrame,
         df_clustered: SplinkDataFrame,
         threshold_match_probability: float,
     ) -> SplinkDataFrame:
         """
-        Internal function for computing edge-level metrics.
+        Internal function for computing edge-level metrics in the database.
 
-        Accepts outputs of `linker._compute_node_metrics()`, `linker.predict()` and
+        Accepts outputs of `linker.predict()` and
         `linker.cluster_pairwise_at_threshold()`, along with the clustering threshold
         and produces a table of edge metrics.
 
-        Uses `igraph` under-the-hood for calculations
-
         Edge metrics produced:
         * is_bridge (is the edge a bridge?)
 
@@ -2188,7 +2645,7 @@ class Linker:
         ...
         """
         df_edge_metrics = compute_edge_metrics(
-            self, df_node_metrics, df_predict, df_clustered, threshold_match_probability
+            self, df_predict, df_clustered, threshold_match_probability
         )
         df_edge_metrics.metadata[
             "threshold_match_probability"
@@ -2248,6 +2705,11 @@ class Linker:
         Generates tables containing graph metrics (for nodes, edges and clusters),
         and returns a data class of Splink dataframes
 
+        Except in Spark, the nodes and edges are read into memory once, and all
+        metrics are computed in a single vectorised pass using numpy.  In Spark,
+        node and cluster metrics are computed in SQL, and bridges are found
+        cluster by cluster in the database.
+
         Args:
             df_predict (SplinkDataFrame): The results of `linker.predict()`
             df_clustered (SplinkDataFrame): The outputs of
@@ -2278,11 +2740,17 @@ class Linker:
                     "to compute graph metrics you must provide "
                     "`threshold_match_probability` manually"
                 )
+        # Except in Spark, the graph is small enough to compute all metrics in
+        # a single pass in memory
+        if self._sql_dialect != "spark":
+            return compute_graph_metrics_in_memory(
+                self, df_predict, df_clustered, threshold_match_probability
+            )
+
         df_node_metrics = self._compute_metrics_nodes(
             df_predict, df_clustered, threshold_match_probability
         )
         df_edge_metrics = self._compute_metrics_edges(
-            df_node_metrics,
             df_predict,
             df_clustered,
             threshold_match_probability,
@@ -3168,6 +3636,12 @@ class Linker:
             ```
 
         """
+        # Dashboards are imported on first use, to keep `import splink` fast
+        from .splink_comparison_viewer import (
+            comparison_viewer_table_sqls,
+            render_splink_comparison_viewer_html,
+        )
+
         self._raise_error_if_necessary_waterfall_columns_not_computed()
 
         sql = comparison_vector_distribution_sql(self)
@@ -3647,6 +4121,8 @@ class Linker:
             IFrame(src="./cluster_studio.html", width="100%", height=1200)
             ```
         """
+        from .cluster_studio import render_splink_cluster_studio_html
+
         self._raise_error_if_necessary_waterfall_columns_not_computed()
 
         rendered = render_splink_cluster_studio_html(
@@ -3819,6 +4295,138 @@ class Linker:
         # As a result, any previously cached tables will not be found
         self._intermediate_table_cache.invalidate_cache()
 
+    def set_cache_budget(self, max_rows: int = None, max_bytes: int = None):
+        """Limit the total size of the tables Splink keeps in its cache.
+
+        When the budget is exceeded, the least recently used tables created by
+        Splink are dropped from the database, and are recomputed if they are needed
+        again.  Tables that are expensive to recompute or that are registered by
+        the user, such as `__splink__df_concat_with_tf` and term frequency tables,
+        are never evicted, and nor are tables still held by a running algorithm
+        or by a `SplinkDataFrame` you hold.
+
+        Examples:
+            ```py
+            linker = DuckDBLinker(df, settings)
+            linker.set_cache_budget(max_bytes=4 * 1024**3)
+            df_predict = linker.predict()
+            linker.cache_statistics()
+            ```
+
+        Args:
+            max_rows (int, optional): The maximum total number of rows of the
+                tables in the cache. Defaults to None, meaning no limit.
+            max_bytes (int, optional): The maximum estimated total size of the
+                tables in the cache, in bytes.  Not supported on SQLite.
+                Defaults to None, meaning no limit.
+
+        Sizes are read from table metadata on Spark and Postgres rather than
+        counted, so are estimates, and tables whose size the backend does not
+        report are not counted towards the budget.
+        """
+        if max_bytes is not None and self._sql_dialect == "sqlite":
+            raise ValueError(
+                "A cache budget in bytes is not supported for the sqlite dialect. "
+                "Please use max_rows instead."
+            )
+        self._intermediate_table_cache.set_budget(max_rows, max_bytes)
+
+    def cache_statistics(self) -> dict:
+        """Return counts of the tables retrieved from the cache (hits), computed
+        (misses) and evicted to stay within the budget set by `set_cache_budget`,
+        along with the number, total rows and estimated total bytes of the tables
+        currently in the cache.  Sizes are only tracked while a budget is set.
+
+        Returns:
+            dict: The cache statistics
+        """
+        return self._intermediate_table_cache.statistics
+
+    def enable_query_profiling(self, explain_plans: bool = False):
+        """Record a profile of each SQL pipeline that Splink executes from now on,
+        to find the steps that dominate the run time of a job.  Any existing
+        profile is discarded.
+
+        The profile of each pipeline includes the templated name of its output
+        table, its wall time, its output row count and the names of the steps
+        (common table expressions) it comprises.  Retrieve it with
+        `query_profile_report`.
+
+        Examples:
+            ```py
+            linker.enable_query_profiling(explain_plans=True)
+            linker.predict()
+            linker.query_profile_report().sort_values("wall_time_seconds")
+            ```
+
+        Args:
+            explain_plans (bool, optional): If True, also record the backend's
+                query plan for each pipeline: EXPLAIN ANALYZE on DuckDB and
+                Postgres, which runs the query a second time, EXPLAIN QUERY PLAN on
+                SQLite and the physical plan on Spark. Defaults to False.
+        """
+        self._query_profiler = QueryProfiler(self, explain_plans=explain_plans)
+
+    def query_profile_report(self, output_type="pandas"):
+        """Return the profile of the SQL pipelines executed since
+        `enable_query_profiling` was called, with one row per pipeline.
+
+        Args:
+            output_type (str): One of pandas, json or records. Defaults to pandas.
+
+        Returns:
+            A pandas DataFrame, a JSON string, or a list of dictionaries
+        """
+        if self._query_profiler is None:
+            raise ValueError(
+                "Query profiling is not enabled. Call `enable_query_profiling` "
+                "before running the queries you want to profile"
+            )
+        if output_type == "pandas":
+            return self._query_profiler.as_pandas_dataframe()
+        elif output_type == "json":
+            return self._query_profiler.as_json()
+        elif output_type == "records":
+            return self._query_profiler.as_record_dict()
+        else:
+            raise ValueError(
+                f"output_type '{output_type}' is not supported. "
+                "Must be one of 'pandas', 'json' or 'records'"
+            )
+
+    def add_tracing_hook(self, hook):
+        """Add a hook that is called around the linker's operations, to export
+        structured tracing spans to an observability system.
+
+        Spans are opened around `predict`, `estimate_u_using_random_sampling`,
+        `estimate_parameters_using_expectation_maximisation` and each of its
+        iterations, `cluster_pairwise_predictions_at_threshold`, and each
+        execution of a SQL pipeline.  Each span is a `splink.tracing.Span`, with a
+        name, start and end times, a parent span and attributes such as the
+        output row count, the iteration number and the number of cache hits.
+
+        The hook is called with the span when it starts, and must return a
+        context manager, which is exited when the span ends.  The built-in
+        `splink.tracing.JsonLinesSpanExporter` writes each span to a file as a
+        line of JSON.
+
+        Examples:
+            ```py
+            from splink.tracing import JsonLinesSpanExporter
+
+            linker.add_tracing_hook(JsonLinesSpanExporter("splink_spans.jsonl"))
+            linker.predict()
+            ```
+
+        Args:
+            hook (Callable[[Span], ContextManager]): A context manager factory
+                that is called with each span.
+        """
+        self._tracing_hooks.append(hook)
+
+    def _trace_span(self, name, **attributes):
+        return trace_span(self._tracing_hooks, name, **attributes)
+
     def register_table_input_nodes_concat_with_tf(self, input_data, overwrite=False):
         """Register a pre-computed version of the input_nodes_concat_with_tf table that
         you want to re-use e.g. that you created in a previous run
@@ -3862,6 +4470,82 @@ class Linker:
         splink_dataframe.templated_name = table_name_templated
         return splink_dataframe
 
+    def use_term_frequency_store(self, directory: str):
+        """Load term frequency tables from a store of parquet files on disk, rather
+        than computing them from the input data.
+
+        Each term frequency table in the store is saved alongside a fingerprint of
+        the column from which it was computed (its count of non-null values and
+        the sum of a hash of each value).  Tables are only loaded if this
+        fingerprint matches that of the linker's input data.
+        Any tables that are missing from the store, or out of date, are computed
+        and saved to the store for use by later linkers.
+
+        Examples:
+            ```py
+            linker = DuckDBLinker(df, settings)
+            linker.use_term_frequency_store("tf_store/")
+            # Term frequencies are loaded from the store where possible
+            df_predict = linker.predict()
+            ```
+
+        Args:
+            directory (str): The directory in which to store term frequency tables.
+                It is created if it does not exist.
+        """
+        load_or_compute_term_frequencies(self, directory)
+
+    def update_term_frequency_store(self, directory: str, appended_records):
+        """Add the values of newly appended records to the term frequency tables in
+        a store created by `use_term_frequency_store`, without recomputing them from
+        the full input data.
+
+        The value counts and fingerprint of each stored table are updated, so that
+        a linker whose input data is the original data plus the appended records
+        will load the updated tables from the store.
+
+        Examples:
+            ```py
+            linker = DuckDBLinker(df_with_new_records, settings)
+            linker.update_term_frequency_store("tf_store/", df_new_records)
+            linker.use_term_frequency_store("tf_store/")
+            ```
+
+        Args:
+            directory (str): The directory of the term frequency store
+            appended_records: The records appended to the input data, in any
+                format accepted by `register_table`
+        """
+        append_to_term_frequency_store(self, directory, appended_records)
+
+    def use_persistent_cache(self, directory: str, max_bytes: int = None):
+        """Save the tables materialised by Splink as parquet files in a directory on
+        disk, and load them from there, rather than recomputing them, when the same
+        SQL is run against the same input data by this or any later linker.
+
+        Tables are keyed by the SQL used to create them, with the names of the
+        input tables replaced by a fingerprint of their contents (their row count
+        and the sum of a hash of each row), so changes to the input data or the
+        model's parameters result in a cache miss.  Only supported on DuckDB, Spark
+        and Postgres.
+
+        Examples:
+            ```py
+            linker = DuckDBLinker(df, settings)
+            linker.use_persistent_cache("splink_cache/", max_bytes=10 * 1024**3)
+            # Tables computed by a previous session are loaded from the cache
+            df_predict = linker.predict()
+            ```
+
+        Args:
+            directory (str): The directory in which to store cached tables.
+                It is created if it does not exist.
+            max_bytes (int, optional): If given, the least recently used tables
+                are deleted when the total size of the cache exceeds this many
+                bytes. Defaults to None, meaning the cache is unbounded.
+        """
+        self._persistent_cache = PersistentCache(self, directory, max_bytes)
+
     def register_labels_table(self, input_data, overwrite=False):
         table_name_physical = "__splink__df_labels_" + ascii_uid(8)
         splink_dataframe = self.register_table(
@@ -3903,6 +4587,11 @@ class Linker:
                 True.
         """
 
+        from .labelling_tool import (
+            generate_labelling_tool_comparisons,
+            render_labelling_tool_html,
+        )
+
         df_comparisons = generate_labelling_tool_comparisons(
             self,
             unique_id,
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from .splink_dataframe import SplinkDataFrame
+
+# https://stackoverflow.com/questions/39740632/python-type-hinting-without-cyclic-imports
+if TYPE_CHECKING:
+    from .linker import Linker
+    from .pipeline import SQLTask
+
+logger = logging.getLogger(__name__)
+
+
+class MaterialisationPlanner:
+    """Decides which tasks of a SQL pipeline to materialise as tables, and which
+    to inline as CTEs, by comparing estimated costs measured in rows processed.
+
+    A task read by n later tasks is evaluated n times if inlined, by engines that
+    inline CTEs.  Materialising it means evaluating it once, then writing its
+    output and reading it n times, plus a fixed overhead for creating a table.
+    The cost of evaluating a task is estimated as the number of rows it reads,
+    plus the cost of evaluating any inlined tasks it depends on.  Until the size
+    of its output has been observed, a task is inlined only if it is cheap to
+    evaluate relative to the overhead of creating a table.
+
+    Row counts of the linker's tables are measured once, and row counts of
+    materialised outputs are recorded, so that later pipelines that compute the
+    same tables (such as successive EM iterations) are planned using the sizes
+    observed in previous runs.  Where the cost of a task cannot be estimated, it
+    is materialised if it is read more than once.
+    """
+
+    def __init__(self, linker: Linker, materialisation_overhead_rows: int = 10_000):
+        self.linker = linker
+        self.materialisation_overhead_rows = materialisation_overhead_rows
+        # Templated name -> row count of the output observed in a previous run
+        self.observed_row_counts = {}
+        # Physical name -> row count, for existing tables
+        self._table_row_counts = {}
+
+    def _physical_table_rows(self, physical_name):
+        if physical_name not in self._table_row_counts:
+            try:
+                row_count, _ = self.linker._table_size_estimate(physical_name)
+            except Exception:
+                row_count = None
+            self._table_row_counts[physical_name] = row_count
+        return self._table_row_counts[physical_name]
+
+    def _existing_table_rows(self, table_name, input_dataframes):
+        """The row count of a table read by the pipeline that it does not compute"""
+        for df in input_dataframes:
+            if table_name in (df.templated_name, df.physical_name):
+                return self._physical_table_rows(df.physical_name)
+        cache = self.linker._intermediate_table_cache
+        if table_name in cache:
+            return self._physical_table_rows(cache[table_name].physical_name)
+        return self._physical_table_rows(table_name)
+
+    def record_output(self, splink_dataframe: SplinkDataFrame):
+        row_count = self._physical_table_rows(splink_dataframe.physical_name)
+        if row_count is not None:
+            self.observed_row_counts[splink_dataframe.templated_name] = row_count
+
+    def plan(
+        self,
+        parts: list[SQLTask],
+        dependencies: list[set[int]],
+        reference_counts: list[int],
+        input_dataframes: list[SplinkDataFrame],
+    ) -> list[bool]:
+        """Whether to materialise each task of a pipeline, given the indices of
+        the tasks each depends on and the number of times each is read"""
+        part_names = {p.output_table_name for p in parts}
+        estimated_rows = []
+        evaluation_cost = []
+        materialise = []
+
+        for i, part in enumerate(parts):
+            references = part._table_references or []
+            existing_rows = [
+                self._existing_table_rows(name, input_dataframes)
+                for name in references
+                if name not in part_names
+            ]
+            input_rows = existing_rows + [estimated_rows[j] for j in dependencies[i]]
+
+            if part.translates_physical_into_templated:
+                # The task selects * from an existing table, so costs nothing
+                rows = existing_rows[0] if existing_rows else None
+                cost = 0
+            else:
+                rows_read = None if None in input_rows else sum(input_rows)
+                rows = self.observed_row_counts.get(part.output_table_name)
+
+                inlined_costs = [
+                    evaluation_cost[j] for j in dependencies[i] if not materialise[j]
+                ]
+                if rows_read is None or None in inlined_costs:
+                    cost = None
+                else:
+                    cost = rows_read + sum(inlined_costs)
+
+            # Where the size of the output is unknown, the tables read by later
+            # tasks are assumed to be no larger than the largest input
+            if rows is None and None not in input_rows:
+                estimated_rows.append(max(input_rows, default=0))
+            else:
+                estimated_rows.append(rows)
+            evaluation_cost.append(cost)
+
+            reads = reference_counts[i]
+            if part.translates_physical_into_templated or reads <= 1:
+                materialise.append(False)
+            elif cost is None:
+                materialise.append(True)
+            else:
+                # The output size is only used if it is known, since it may be
+                # much smaller (aggregations) or larger (joins) than the input
+                inline_cost = (reads - 1) * cost
+                materialise_cost = (rows or 0) * (reads + 1)
+                materialise_cost += self.materialisation_overhead_rows
+                materialise.append(materialise_cost < inline_cost)
+
+            logger.log(
+                7,
+                f"Planned {part.output_table_name}: rows {rows}, "
+                f"evaluation cost {cost}, read {reads} times, "
+                f"materialise {materialise[-1]}",
+            )
+
+        materialise[-1] = True
+        return materialise
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from .graph_metrics import GraphMetricsResults
+from .misc import ascii_uid
+from .splink_dataframe import SplinkDataFrame
+from .unique_id_concat import (
+    _composite_unique_id_from_edges_sql,
+    _composite_unique_id_from_nodes_sql,
+)
+
+if TYPE_CHECKING:
+    from .linker import Linker
+
+logger = logging.getLogger(__name__)
+
+
+def _spanning_forest(
+    nodes_l: np.ndarray, nodes_r: np.ndarray, num_nodes: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find a spanning forest of an undirected graph over integer node ids
+    0..num_nodes-1, using the same hooking rounds as `_union_find_roots`.
+
+    Each time the root of one tree is hooked onto another, one of the edges
+    between the two trees is added to the forest.
+
+    Returns:
+        The root of the tree containing each node, which is its minimum node id,
+        and a boolean array, true for each edge in the forest
+    """
+    parent = np.arange(num_nodes)
+    in_forest = np.zeros(len(nodes_l), dtype=bool)
+    edge_ids = np.arange(len(nodes_l))
+
+    while True:
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+        roots_l = parent[nodes_l]
+        roots_r = parent[nodes_r]
+        spanning = roots_l != roots_r
+        if not spanning.any():
+            return parent, in_forest
+
+        nodes_l = nodes_l[spanning]
+        nodes_r = nodes_r[spanning]
+        edge_ids = edge_ids[spanning]
+        lower = np.minimum(roots_l[spanning], roots_r[spanning])
+        higher = np.maximum(roots_l[spanning], roots_r[spanning])
+        np.minimum.at(parent, higher, lower)
+
+        # Each root is hooked onto the lowest root it shares an edge with.  Add one
+        # such edge for each hooked root
+        hooked = parent[higher] == lower
+        _, first = np.unique(higher[hooked], return_index=True)
+        in_forest[edge_ids[hooked][first]] = True
+
+
+def _euler_tour_positions(
+    forest_l: np.ndarray, forest_r: np.ndarray, roots: np.ndarray, num_nodes: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Walk an Euler tour around each tree of a forest, starting at its root.
+
+    The tour traverses each edge twice, once in each direction, and the
+    positions of the arcs in the tour are found by pointer jumping.  The arcs
+    of the subtree below a node are then exactly those between the arc entering
+    the node and the arc leaving it.
+
+    Returns:
+        For each edge of the forest, its child node, and the positions of the arcs
+        entering and leaving the child.  Positions are unique across all trees.
+    """
+    num_edges = len(forest_l)
+    num_arcs = 2 * num_edges
+
+    # Arc i and arc i + num_edges are the same edge in opposite directions
+    arc_src = np.concatenate([forest_l, forest_r])
+    arc_dst = np.concatenate([forest_r, forest_l])
+    order = np.argsort(arc_src, kind="stable")
+    position_in_order = np.empty(num_arcs, dtype=np.int64)
+    position_in_order[order] = np.arange(num_arcs)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(arc_src, minlength=num_nodes), out=indptr[1:])
+
+    # After traversing u -> v, the tour leaves v by the arc following v -> u in
+    # the adjacency list of v, wrapping around to the first
+    arcs = order
+    reverse = position_in_order[(arcs + num_edges) % num_arcs]
+    dst = arc_dst[arcs]
+    successor = reverse + 1
+    wraps = successor == indptr[dst + 1]
+    successor[wraps] = indptr[dst[wraps]]
+
+    # Break the cycle around each tree where it returns to the first arc out of
+    # the root, so that the last arc points to itself
+    tree = roots[arc_src[arcs]]
+    is_first = np.arange(num_arcs) == indptr[tree]
+    is_last = is_first[successor]
+    successor[is_last] = np.flatnonzero(is_last)
+
+    distance_to_end = (~is_last).astype(np.int64)
+    while True:
+        next_successor = successor[successor]
+        if np.array_equal(next_successor, successor):
+            break
+        distance_to_end += distance_to_end[successor]
+        successor = next_successor
+
+    tree_sizes = np.bincount(tree, minlength=num_nodes)
+    tree_offsets = np.cumsum(tree_sizes) - tree_sizes
+    position = tree_offsets[tree] + tree_sizes[tree] - 1 - distance_to_end
+
+    # The arc entering the child of each edge comes before the arc leaving it
+    position_a = position[position_in_order[:num_edges]]
+    position_b = position[position_in_order[num_edges:]]
+    a_enters = position_a < position_b
+    child = np.where(a_enters, forest_r, forest_l)
+    enter = np.minimum(position_a, position_b)
+    leave = np.maximum(position_a, position_b)
+    return child, enter, leave
+
+
+def _range_extremes(
+    values_min: np.ndarray,
+    values_max: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """The minimum of values_min and maximum of values_max over each inclusive
+    range starts..ends.
+
+    Queries are answered offline, level by level of a sparse table, so that only
+    one level is held in memory at a time.
+    """
+    lengths = ends - starts + 1
+    levels = np.zeros(len(lengths), dtype=np.int64)
+    has_length = lengths > 0
+    levels[has_length] = np.floor(np.log2(lengths[has_length])).astype(np.int64)
+    range_min = np.empty(len(starts), dtype=values_min.dtype)
+    range_max = np.empty(len(starts), dtype=values_max.dtype)
+
+    table_min = values_min
+    table_max = values_max
+    for level in range(int(levels.max(initial=0)) + 1):
+        width = 1 << level
+        query = levels == level
+        a = starts[query]
+        b = ends[query] - width + 1
+        range_min[query] = np.minimum(table_min[a], table_min[b])
+        range_max[query] = np.maximum(table_max[a], table_max[b])
+        table_min = np.minimum(table_min[:-width], table_min[width:])
+        table_max = np.maximum(table_max[:-width], table_max[width:])
+
+    return range_min, range_max
+
+
+def _bridges(nodes_l: np.ndarray, nodes_r: np.ndarray, num_nodes: int) -> np.ndarray:
+    """Find the bridges of an undirected graph over integer node ids
+    0..num_nodes-1.
+
+    This uses the criterion of Tarjan's bridge-finding algorithm, reformulated so
+    that each step is a vectorised operation over all nodes or edges rather than
+    a depth first search: an edge is a bridge if and only if it is in a spanning
+    forest, and no edge outside the forest leaves the subtree below it.
+
+    Returns:
+        np.ndarray: A boolean array, true for each edge that is a bridge
+    """
+    roots, in_forest = _spanning_forest(nodes_l, nodes_r, num_nodes)
+    forest_edge_ids = np.flatnonzero(in_forest)
+    is_bridge = np.zeros(len(nodes_l), dtype=bool)
+    if len(forest_edge_ids) == 0:
+        return is_bridge
+
+    child, enter, leave = _euler_tour_positions(
+        nodes_l[forest_edge_ids], nodes_r[forest_edge_ids], roots, num_nodes
+    )
+
+    # Label each node by the position at which the tour enters it.  Roots, which
+    # are never in the subtree below an edge, are labelled -1
+    label = np.full(num_nodes, -1, dtype=np.int64)
+    label[child] = enter
+
+    # The lowest and highest labels among each node and its neighbours along
+    # edges outside the forest
+    non_forest_l = nodes_l[~in_forest]
+    non_forest_r = nodes_r[~in_forest]
+    lowest = label.copy()
+    highest = label.copy()
+    np.minimum.at(lowest, non_forest_l, label[non_forest_r])
+    np.minimum.at(lowest, non_forest_r, label[non_forest_l])
+    np.maximum.at(highest, non_forest_l, label[non_forest_r])
+    np.maximum.at(highest, non_forest_r, label[non_forest_l])
+
+    num_positions = 2 * len(forest_edge_ids)
+    lowest_by_position = np.full(num_positions, np.iinfo(np.int64).max)
+    highest_by_position = np.full(num_positions, -1, dtype=np.int64)
+    lowest_by_position[enter] = lowest[child]
+    highest_by_position[enter] = highest[child]
+
+    subtree_lowest, subtree_highest = _range_extremes(
+        lowest_by_position, highest_by_position, enter, leave
+    )
+    is_bridge[forest_edge_ids] = (subtree_lowest >= enter) & (subtree_highest <= leave)
+    return is_bridge
+
+
+def _cluster_metrics(node_metrics: pd.DataFrame) -> pd.DataFrame:
+    """Compute cluster size, density and centralisation from node degrees, as in
+    `_size_density_centralisation_sql`"""
+    clusters = node_metrics.groupby("cluster_id", sort=True)["node_degree"].agg(
+        n_nodes="count", sum_degree="sum", max_degree="max"
+    )
+    n_nodes = clusters["n_nodes"]
+    n_edges = clusters["sum_degree"] / 2.0
+    density = (2.0 * n_edges / (n_nodes * (n_nodes - 1))).where(n_nodes > 1)
+    cluster_centralisation = (
+        (n_nodes * clusters["max_degree"] - clusters["sum_degree"])
+        / ((n_nodes - 1) * (n_nodes - 2))
+    ).where(n_nodes > 2)
+
+    return pd.DataFrame(
+        {
+            "cluster_id": clusters.index,
+            "n_nodes": n_nodes.to_numpy(),
+            "n_edges": n_edges.to_numpy(),
+            "density": density.to_numpy(),
+            "cluster_centralisation": cluster_centralisation.to_numpy(),
+        }
+    )
+
+
+def _is_bridge_for_cluster(edges: pd.DataFrame) -> pd.DataFrame:
+    """Label the edges of a single cluster as bridges or not.  Used to compute
+    bridges in the database, one cluster at a time"""
+    codes, node_ids = pd.factorize(
+        pd.concat(
+            [edges["composite_unique_id_l"], edges["composite_unique_id_r"]],
+            ignore_index=True,
+        )
+    )
+    num_edges = len(edges)
+    is_bridge = _bridges(codes[:num_edges], codes[num_edges:], len(node_ids))
+    return pd.DataFrame(
+        {
+            "composite_unique_id_l": edges["composite_unique_id_l"].to_numpy(),
+            "composite_unique_id_r": edges["composite_unique_id_r"].to_numpy(),
+            "is_bridge": is_bridge,
+        }
+    )
+
+
+def compute_graph_metrics_in_memory(
+    linker: Linker,
+    df_predict: SplinkDataFrame,
+    df_clustered: SplinkDataFrame,
+    threshold_match_probability: float,
+) -> GraphMetricsResults:
+    """Compute node, edge and cluster metrics in a single in-memory pass over
+    integer-encoded edges.
+
+    The nodes and the edges at or above the threshold are each read from the
+    database once, and the three metrics tables are registered back to it.
+    """
+    uid_cols = linker._settings_obj._unique_id_input_columns
+    composite_uid_edges_l = _composite_unique_id_from_edges_sql(uid_cols, "l")
+    composite_uid_edges_r = _composite_unique_id_from_edges_sql(uid_cols, "r")
+    composite_uid_clusters = _composite_unique_id_from_nodes_sql(uid_cols)
+
+    sql = f"""
+        SELECT
+            {composite_uid_clusters} AS composite_unique_id,
+            cluster_id
+        FROM {df_clustered.physical_name}
+    """
+    df_nodes = linker._sql_to_splink_dataframe_checking_cache(
+        sql, "__splink__graph_metrics_node_ids"
+    )
+    nodes = df_nodes.as_pandas_dataframe()
+    df_nodes.drop_table_from_database_and_remove_from_cache()
+
+    sql = f"""
+        SELECT
+            {composite_uid_edges_l} AS composite_unique_id_l,
+            {composite_uid_edges_r} AS composite_unique_id_r
+        FROM {df_predict.physical_name}
+        WHERE match_probability >= {threshold_match_probability}
+    """
+    df_edges = linker._sql_to_splink_dataframe_checking_cache(
+        sql, "__splink__truncated_edges"
+    )
+    edges = df_edges.as_pandas_dataframe()
+    df_edges.drop_table_from_database_and_remove_from_cache()
+
+    start_time = time.time()
+
+    # Edges may have endpoints that are not in the clusters table.  These count
+    # towards bridges but are not output as nodes
+    num_nodes = len(nodes)
+    num_edges = len(edges)
+    codes, node_ids = pd.factorize(
+        pd.concat(
+            [
+                nodes["composite_unique_id"],
+                edges["composite_unique_id_l"],
+                edges["composite_unique_id_r"],
+            ],
+            ignore_index=True,
+        )
+    )
+    node_codes = codes[:num_nodes]
+    nodes_l = codes[num_nodes : num_nodes + num_edges]
+    nodes_r = codes[num_nodes + num_edges :]
+
+    degree = np.bincount(nodes_l, minlength=len(node_ids)) + np.bincount(
+        nodes_r, minlength=len(node_ids)
+    )
+    node_metrics = nodes.assign(node_degree=degree[node_codes])
+    edges["is_bridge"] = _bridges(nodes_l, nodes_r, len(node_ids))
+    cluster_metrics = _cluster_metrics(node_metrics)
+
+    logger.log(15, f"    Graph metrics time: {time.time() - start_time} seconds")
+
+    uid = ascii_uid(8)
+    results = {}
+    for name, metrics in [
+        ("nodes", node_metrics),
+        ("edges", edges),
+        ("clusters", cluster_metrics),
+    ]:
+        results[name] = linker.register_table(
+            metrics, f"__splink__graph_metrics_{name}_{uid}"
+        )
+        results[name].metadata[
+            "threshold_match_probability"
+        ] = threshold_match_probability
+
+    return GraphMetricsResults(**results)
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import List, Optional
 
 import sqlglot
@@ -7,9 +8,33 @@ from sqlglot.expressions import Bracket, Column, Lambda
 from .sql_transform import remove_quotes_from_identifiers
 
 
+@lru_cache(maxsize=4096)
+def _parse_one_memoised(sql, dialect):
+    return sqlglot.parse_one(sql, read=dialect)
+
+
+def parse_one_cached(sql, dialect=None, copy=True) -> sqlglot.Expression:
+    """Parse sql into a syntax tree, memoising the result by (sql, dialect).
+
+    Splink parses the same conditions many times while generating SQL, so
+    this avoids repeated parsing.  By default a copy of the memoised tree is
+    returned, which the caller is free to modify.  Read-only callers can pass
+    copy=False to avoid the cost of the copy.
+    """
+    tree = _parse_one_memoised(sql, dialect)
+    return tree.copy() if copy else tree
+
+
+@lru_cache(maxsize=256)
+def transpile_cached(sql, read, write, pretty=False) -> str:
+    """Transpile a single sql statement from one dialect to another, memoising the
+    result by (sql, read, write, pretty)"""
+    return sqlglot.transpile(sql, read=read, write=write, pretty=pretty)[0]
+
+
 def get_columns_used_from_sql(sql, dialect=None, retain_table_prefix=False):
     column_names = set()
-    syntax_tree = sqlglot.parse_one(sql, read=dialect)
+    syntax_tree = parse_one_cached(sql, dialect, copy=False)
 
     for subtree in syntax_tree.find_all(exp.Column):
         # check if any parents are lambdas
@@ -58,7 +83,7 @@ def parse_columns_in_sql(
             be returned.
     """
     try:
-        syntax_tree = sqlglot.parse_one(sql, read=sql_dialect)
+        syntax_tree = parse_one_cached(sql, sql_dialect)
     except Exception:  # Consider catching a more specific exception if possible
         # If we can't parse a SQL condition, it's better to just pass.
         return None
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+from typing import TYPE_CHECKING
+
+import pandas as pd
+from sqlglot.errors import ParseError
+from sqlglot.expressions import CTE, Table
+
+from .parse_sql import parse_one_cached
+from .splink_dataframe import SplinkDataFrame
+
+# https://stackoverflow.com/questions/39740632/python-type-hinting-without-cyclic-imports
+if TYPE_CHECKING:
+    from .linker import Linker
+
+logger = logging.getLogger(__name__)
+
+# The fingerprint of an input table is its row count and the sum of a hash of each
+# row, so it does not depend on the order of the rows.  The sum is returned as a
+# string to avoid any loss of precision.
+_row_hash_templates = {
+    "duckdb": ("cast(hash({cols}) as hugeint)", "varchar"),
+    "spark": ("cast(xxhash64({cols}) as decimal(38, 0))", "string"),
+    "postgres": ("cast(hashtext(cast(row({cols}) as text)) as numeric)", "text"),
+}
+
+_read_parquet_templates = {
+    "duckdb": "select * from read_parquet('{path}')",
+    "spark": "select * from parquet.`{path}`",
+}
+
+# Results of SQL using unseeded random numbers or samples are not reproducible, so
+# are never persisted.  The random salt added to the concatenated input data is an
+# exception, since it only affects how work is partitioned.
+_nondeterministic_sql_regex = re.compile(
+    r"\brand(om)?\s*\(\s*\)(?!\s+as\s+__splink_salt\b)"
+    r"|\b(using\s+sample|tablesample)\b(?!.*\brepeatable\b)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _input_fingerprint(linker: Linker, input_table: SplinkDataFrame) -> str:
+    hash_template, string_type = _row_hash_templates[linker._sql_dialect]
+    cols = ", ".join(c.name for c in input_table.columns)
+    sql = f"""
+    select
+        count(*) as row_count,
+        cast(sum({hash_template.format(cols=cols)}) as {string_type}) as row_hash
+    from {input_table.physical_name}
+    """
+    df = linker._sql_to_splink_dataframe_checking_cache(
+        sql, "__splink__input_fingerprint", use_cache=False
+    )
+    fingerprint = df.as_record_dict()[0]
+    df.drop_table_from_database_and_remove_from_cache()
+    return f"{fingerprint['row_count']}_{fingerprint['row_hash']}"
+
+
+def _path_size(path) -> int:
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, f))
+            for root, _, files in os.walk(path)
+            for f in files
+        )
+    return os.path.getsize(path)
+
+
+class PersistentCache:
+    """A cache of materialised tables, saved as parquet in a directory on disk, that
+    persists across linkers and sessions.
+
+    Each table is keyed by a hash of the SQL used to create it, in which the names
+    of the tables it reads are replaced by their own keys, and the names of the
+    linker's input tables by a fingerprint of their contents.  SQL that reads any
+    other table is not cached, since its result cannot be identified across
+    sessions.
+
+    If max_bytes is given, the least recently used tables are deleted whenever the
+    size of the cache exceeds it.
+    """
+
+    def __init__(self, linker: Linker, directory: str, max_bytes: int = None):
+        if linker._sql_dialect not in _row_hash_templates:
+            raise ValueError(
+                "A persistent cache is not supported for the "
+                f"{linker._sql_dialect} dialect, as there is no way to fingerprint "
+                "the input data"
+            )
+        self.linker = linker
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._keys_by_physical_name = {}
+        for input_table in linker._input_tables_dict.values():
+            self._keys_by_physical_name[input_table.physical_name] = _input_fingerprint(
+                linker, input_table
+            )
+
+        self._evict()
+
+    def _key(self, sql):
+        """The key for the result of sql, or None if the result cannot be cached"""
+        if _nondeterministic_sql_regex.search(sql):
+            return None
+
+        try:
+            tree = parse_one_cached(sql, self.linker._sql_dialect, copy=False)
+        except ParseError:
+            return None
+
+        cte_names = {cte.alias for cte in tree.find_all(CTE)}
+        table_names = {t.name for t in tree.find_all(Table)} - cte_names
+        if not table_names <= self._keys_by_physical_name.keys():
+            return None
+
+        for table_name in sorted(table_names, key=len, reverse=True):
+            sql = re.sub(
+                rf"\b{table_name}\b", self._keys_by_physical_name[table_name], sql
+            )
+        return hashlib.sha256(sql.encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, templated_name, key):
+        return os.path.join(self.directory, f"{templated_name}_{key}.parquet")
+
+    def load(self, sql, templated_name, physical_name) -> SplinkDataFrame | None:
+        """Create the table physical_name from the cache if sql has been run
+        before against the same input data, returning None otherwise"""
+        key = self._key(sql)
+        if key is None:
+            return None
+        path = self._path(templated_name, key)
+        if not os.path.exists(path):
+            return None
+
+        # Mark the table as recently used
+        os.utime(path)
+
+        dialect = self.linker._sql_dialect
+        if dialect in _read_parquet_templates:
+            read_sql = _read_parquet_templates[dialect].format(path=path)
+            splink_dataframe = self.linker._execute_sql_against_backend(
+                read_sql, templated_name, physical_name
+            )
+        else:
+            splink_dataframe = self.linker.register_table(
+                pd.read_parquet(path), physical_name
+            )
+            splink_dataframe.templated_name = templated_name
+
+        logger.debug(f"Loaded {templated_name} from persistent cache at {path}")
+        self._keys_by_physical_name[physical_name] = key
+        return splink_dataframe
+
+    def save(self, splink_dataframe: SplinkDataFrame, sql):
+        """Save a table created from sql to the cache, if it can be cached"""
+        key = self._key(sql)
+        if key is None:
+            return
+        path = self._path(splink_dataframe.templated_name, key)
+
+        # Write to a temporary path, so that an interrupted write cannot leave a
+        # partial table in the cache
+        temporary_path = os.path.join(self.directory, f".{os.path.basename(path)}")
+        try:
+            splink_dataframe.to_parquet(temporary_path, overwrite=True)
+        except (NotImplementedError, SyntaxError):
+            splink_dataframe.as_pandas_dataframe().to_parquet(temporary_path)
+        os.replace(temporary_path, path)
+
+        logger.debug(
+            f"Saved {splink_dataframe.templated_name} to persistent cache at {path}"
+        )
+        self._keys_by_physical_name[splink_dataframe.physical_name] = key
+        self._evict()
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith(".") or not name.endswith(".parquet"):
+                continue
+            path = os.path.join(self.directory, name)
+            entries.append((os.path.getmtime(path), _path_size(path), path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            logger.debug(f"Evicting {path} from persistent cache")
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            total_bytes -= size
@@ -1,10 +1,11 @@
 import logging
 from copy import deepcopy
 
-import sqlglot
 from sqlglot.errors import ParseError
 from sqlglot.expressions import Table
 
+from .parse_sql import parse_one_cached
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,11 +15,12 @@ class SQLTask:
     ):
         self.sql = sql
         self.output_table_name = output_table_name
+        self.translates_physical_into_templated = translates_physical_into_templated
 
     @property
     def _uses_tables(self):
         try:
-            tree = sqlglot.parse_one(self.sql, read=None)
+            tree = parse_one_cached(self.sql, copy=False)
         except ParseError:
             return ["Failure to parse SQL - tablenames not known"]
 
@@ -28,6 +30,17 @@ class SQLTask:
                 table_names.add(subtree.sql())
         return list(table_names)
 
+    @property
+    def _table_references(self):
+        """The name of every table read by the task, once per reference, or None
+        if the SQL cannot be parsed"""
+        try:
+            tree = parse_one_cached(self.sql, copy=False)
+        except ParseError:
+            return None
+
+        return [subtree.name for subtree in tree.find_all(Table)]
+
     @property
     def _task_description(self):
         uses_tables = ", ".join(self._uses_tables)
@@ -39,6 +52,25 @@ class SQLTask:
         )
 
 
+class SQLPipelineStep:
+    """A part of a pipeline that is executed as a single statement, and whose
+    output is materialised.
+
+    The statement computes the final task from the preceding tasks, as CTEs, and
+    from the outputs of earlier steps, named in input_table_names.  Steps at the
+    same level do not depend on each other.
+    """
+
+    def __init__(self, tasks, input_table_names, level):
+        self.tasks = tasks
+        self.input_table_names = input_table_names
+        self.level = level
+
+    @property
+    def output_table_name(self):
+        return self.tasks[-1].output_table_name
+
+
 class SQLPipeline:
     def __init__(self):
         self.queue = []
@@ -70,7 +102,14 @@ class SQLPipeline:
             for i, part in enumerate(parts):
                 logger.log(7, f"    Pipeline part {i+1}: {part._task_description}")
 
-    def _generate_pipeline(self, input_dataframes):
+    def _generate_pipeline(self, input_dataframes, inline_input_ctes=False):
+        """Generate the SQL of the pipeline as a single statement.
+
+        If inline_input_ctes is true, the CTEs that read the input dataframes are
+        marked NOT MATERIALIZED.  Postgres otherwise materialises a CTE that is
+        referenced more than once, so could not use the indexes of the input
+        tables in e.g. the blocking join
+        """
         parts = self._generate_pipeline_parts(input_dataframes)
 
         self._log_pipeline(parts, input_dataframes)
@@ -78,7 +117,12 @@ class SQLPipeline:
         with_parts = parts[:-1]
         last_part = parts[-1]
 
-        with_parts = [f"{p.output_table_name} as ({p.sql})" for p in with_parts]
+        def cte_sql(part):
+            if inline_input_ctes and part.translates_physical_into_templated:
+                return f"{part.output_table_name} as NOT MATERIALIZED ({part.sql})"
+            return f"{part.output_table_name} as ({part.sql})"
+
+        with_parts = [cte_sql(p) for p in with_parts]
         with_parts = ", \n".join(with_parts)
         if with_parts:
             with_parts = f"WITH {with_parts} "
@@ -87,6 +131,87 @@ class SQLPipeline:
 
         return final_sql
 
+    def _generate_pipeline_steps(self, input_dataframes, planner=None):
+        """Split the pipeline into steps using the dependency graph of its tasks.
+
+        The output of a task is materialised if it is read more than once, either
+        by several tasks or several times by one, so that it is not recomputed by
+        engines that inline CTEs.  If a MaterialisationPlanner is given, it makes
+        this decision instead, using estimated costs.  The final task is always
+        materialised.  Each materialised task becomes a step, containing the tasks
+        it depends on that are not themselves materialised.
+
+        Returns:
+            list[SQLPipelineStep]: The steps, in an order in which they can be
+            executed
+        """
+        parts = self._generate_pipeline_parts(input_dataframes)
+
+        self._log_pipeline(parts, input_dataframes)
+
+        part_index = {p.output_table_name: i for i, p in enumerate(parts)}
+        dependencies = []
+        reference_counts = [0] * len(parts)
+        for i, part in enumerate(parts):
+            references = part._table_references
+            if references is None:
+                # If we cannot tell which tables are read, assume all of them are
+                dependencies.append(set(range(i)))
+                continue
+            part_dependencies = set()
+            for table_name in references:
+                j = part_index.get(table_name)
+                if j is not None and j < i:
+                    part_dependencies.add(j)
+                    reference_counts[j] += 1
+            dependencies.append(part_dependencies)
+
+        if planner is not None:
+            materialise = planner.plan(
+                parts, dependencies, reference_counts, input_dataframes
+            )
+        else:
+            materialise = [
+                count > 1 and not part.translates_physical_into_templated
+                for part, count in zip(parts, reference_counts)
+            ]
+            materialise[-1] = True
+
+        steps = []
+        step_levels = {}
+        for i in range(len(parts)):
+            if not materialise[i]:
+                continue
+
+            # Collect the tasks this task depends on, through tasks that are not
+            # materialised
+            tasks_in_step = {i}
+            input_parts = set()
+            to_visit = list(dependencies[i])
+            while to_visit:
+                j = to_visit.pop()
+                if j in tasks_in_step or j in input_parts:
+                    continue
+                if materialise[j]:
+                    input_parts.add(j)
+                else:
+                    tasks_in_step.add(j)
+                    to_visit.extend(dependencies[j])
+
+            level = 1 + max((step_levels[j] for j in input_parts), default=-1)
+            step_levels[i] = level
+            steps.append(
+                SQLPipelineStep(
+                    tasks=[parts[j] for j in sorted(tasks_in_step)],
+                    input_table_names=[
+                        parts[j].output_table_name for j in sorted(input_parts)
+                    ],
+                    level=level,
+                )
+            )
+
+        return steps
+
     def _scan_pipeline_for_tables(self, table):
         queued_tables = [pipe.output_table_name for pipe in self._pipeline.queue]
         return table in queued_tables
@@ -1,19 +1,60 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import logging
 
+import numpy as np
 import pandas as pd
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
 
+from ..blocking import ExplodingBlockingRule
 from ..input_column import InputColumn
 from ..linker import Linker
 from ..misc import ensure_is_list
-from ..splink_dataframe import SplinkDataFrame
+from ..splink_dataframe import SplinkDataFrame, _record_batches_from_records
 from ..unique_id_concat import _composite_unique_id_from_nodes_sql
 
 logger = logging.getLogger(__name__)
 
+# The representation of null in the csv data loaded by COPY
+_copy_null_marker = "\\N"
+
+
+def _is_nested_value(value):
+    return isinstance(value, (list, tuple, dict, set, np.ndarray))
+
+
+def _postgres_arrow_type(udt_name):
+    """The SQL type to cast a column of the given Postgres type to, if any, and
+    the pyarrow type of the result"""
+    import pyarrow as pa
+
+    arrow_types = {
+        "bool": pa.bool_(),
+        "int2": pa.int16(),
+        "int4": pa.int32(),
+        "int8": pa.int64(),
+        "float4": pa.float32(),
+        "float8": pa.float64(),
+        "text": pa.string(),
+        "varchar": pa.string(),
+        "bpchar": pa.string(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+        "timestamptz": pa.timestamp("us", tz="UTC"),
+    }
+    if udt_name in arrow_types:
+        return None, arrow_types[udt_name]
+    if udt_name == "numeric":
+        return "float8", pa.float64()
+    # Array types are named after their element type, prefixed by an underscore
+    if udt_name.startswith("_") and udt_name[1:] in arrow_types:
+        return None, pa.list_(arrow_types[udt_name[1:]])
+    return "text", pa.string()
+
 
 class PostgresDataFrame(SplinkDataFrame):
     linker: PostgresLinker
@@ -71,8 +112,59 @@ class PostgresDataFrame(SplinkDataFrame):
         if limit:
             sql += f" LIMIT {limit}"
         sql += ";"
+        # Stream the rows through a server-side cursor, so that the driver does not
+        # hold the whole result in memory as well
+        with self.linker._engine.connect() as con:
+            res = con.execution_options(stream_results=True).execute(text(sql))
+            return [dict(r) for r in res.mappings()]
+
+    def _arrow_select_sql_and_schema(self):
+        """SQL selecting the columns of the table, cast to text or float8 where
+        they have no direct pyarrow equivalent, and the pyarrow schema of its
+        result"""
+        import pyarrow as pa
+
+        sql = f"""
+        SELECT column_name, udt_name
+        FROM information_schema.columns
+        WHERE table_name = '{self.physical_name}'
+        ORDER BY ordinal_position;
+        """
         res = self.linker._run_sql_execution(sql).mappings().all()
-        return [dict(r) for r in res]
+
+        select_cols = []
+        fields = []
+        for r in res:
+            name, udt_name = r["column_name"], r["udt_name"]
+            col = '"{}"'.format(name.replace('"', '""'))
+            cast_to, arrow_type = _postgres_arrow_type(udt_name)
+            select_cols.append(f"{col}::{cast_to} AS {col}" if cast_to else col)
+            fields.append(pa.field(name, arrow_type))
+
+        sql = f"SELECT {', '.join(select_cols)} FROM {self.physical_name}"
+        return sql, pa.schema(fields)
+
+    def as_arrow_table(self, limit=None):
+        import pyarrow as pa
+
+        sql, schema = self._arrow_select_sql_and_schema()
+        if limit:
+            sql += f" LIMIT {limit}"
+        with self.linker._engine.connect() as con:
+            res = con.execution_options(stream_results=True).execute(text(sql))
+            records = [dict(r) for r in res.mappings()]
+        return pa.Table.from_pylist(records, schema=schema)
+
+    def iter_record_batches(self, batch_size=1_000_000):
+        sql, schema = self._arrow_select_sql_and_schema()
+        # stream_results uses a server-side cursor, so that rows are fetched
+        # from the database a batch at a time
+        with self.linker._engine.connect() as con:
+            res = con.execution_options(
+                stream_results=True, max_row_buffer=batch_size
+            ).execute(text(sql))
+            records = (dict(r) for r in res.mappings())
+            yield from _record_batches_from_records(records, batch_size, schema)
 
 
 class PostgresLinker(Linker):
@@ -86,6 +178,7 @@ class PostgresLinker(Linker):
         validate_settings: bool = True,
         schema="splink",
         other_schemas_to_search: str | list = [],
+        unlogged_tables: bool = True,
     ):
         self._sql_dialect_ = "postgres"
         if not isinstance(engine, Engine):
@@ -94,6 +187,11 @@ class PostgresLinker(Linker):
             )
 
         self._engine = engine
+        # Tables created by Splink can be recomputed, so by default are not
+        # written to the write-ahead log.  They are emptied if the server crashes
+        self._unlogged_tables = unlogged_tables
+        self._analysed_tables = set()
+        self._blocking_key_indexes = set()
 
         input_tables = ensure_is_list(input_table_or_tables)
         input_aliases = self._ensure_aliases_populated_and_is_list(
@@ -125,7 +223,8 @@ class PostgresLinker(Linker):
         # execute sql is only reached if the user has explicitly turned off the cache
         self._delete_table_from_database(physical_name)
 
-        sql = f"CREATE TABLE {physical_name} AS {sql}"
+        table_type = "UNLOGGED TABLE" if self._unlogged_tables else "TABLE"
+        sql = f"CREATE {table_type} {physical_name} AS {sql}"
         self._log_and_run_sql_execution(sql, templated_name, physical_name)
 
         return self._table_to_splink_dataframe(templated_name, physical_name)
@@ -137,20 +236,91 @@ class PostgresLinker(Linker):
             res = con.execute(text(final_sql))
         return res
 
+    def _explain_sql(self, sql):
+        with self._engine.begin() as con:
+            rows = con.execute(text(f"EXPLAIN ANALYZE {sql}")).fetchall()
+        return "\n".join(row[0] for row in rows)
+
+    def _table_size_estimate(self, physical_name):
+        # Read the planner's statistics rather than counting the rows of the table
+        sql = f"""
+        SELECT reltuples, pg_total_relation_size(oid) AS num_bytes
+        FROM pg_class
+        WHERE oid = to_regclass('{physical_name}')
+        """
+        rec = self._run_sql_execution(sql).mappings().first()
+        if rec is None:
+            return None, None
+        # reltuples is -1 if the table has not yet been vacuumed or analysed
+        row_count = int(rec["reltuples"]) if rec["reltuples"] >= 0 else None
+        return row_count, rec["num_bytes"]
+
     def _table_registration(self, input, table_name):
         if isinstance(input, dict):
             input = pd.DataFrame(input)
         elif isinstance(input, list):
             input = pd.DataFrame.from_records(input)
 
-        # Will error if an invalid data type is passed
-        input.to_sql(
+        object_columns = input.select_dtypes(include="object")
+        for col in object_columns:
+            if object_columns[col].map(_is_nested_value).any():
+                raise ValueError(
+                    f"Column '{col}' contains lists, arrays or dicts, which cannot "
+                    "be loaded into Postgres from a pandas DataFrame. Please create "
+                    "the table in Postgres with the column types you need, and pass "
+                    "its name instead."
+                )
+
+        # COPY reads unquoted \N as null, and pandas does not quote it, so data
+        # containing that string is loaded using INSERTs to keep it intact
+        if (object_columns == _copy_null_marker).any().any():
+            input.to_sql(
+                table_name,
+                con=self._engine,
+                index=False,
+                if_exists="replace",
+                schema=self._db_schema,
+            )
+            return
+
+        # Create the table using the column types pandas would use, then load the
+        # rows using COPY, which is much faster than the INSERTs of to_sql
+        input.head(0).to_sql(
             table_name,
             con=self._engine,
             index=False,
             if_exists="replace",
             schema=self._db_schema,
         )
+        self._copy_into_table(input, table_name)
+
+    def _copy_into_table(self, input, table_name, chunksize=100_000):
+        cols = ", ".join(f'"{c}"' for c in input.columns)
+        sql = (
+            f"COPY {self._db_schema}.{table_name} ({cols}) "
+            f"FROM STDIN WITH (FORMAT csv, NULL '{_copy_null_marker}')"
+        )
+
+        raw_con = self._engine.raw_connection()
+        try:
+            cur = raw_con.cursor()
+            # Rows are converted to csv in chunks, to bound memory use
+            for start in range(0, len(input), chunksize):
+                buffer = io.StringIO()
+                input.iloc[start : start + chunksize].to_csv(
+                    buffer, index=False, header=False, na_rep=_copy_null_marker
+                )
+                buffer.seek(0)
+                if hasattr(cur, "copy_expert"):
+                    # psycopg2
+                    cur.copy_expert(sql, buffer)
+                else:
+                    # psycopg 3
+                    with cur.copy(sql) as copy:
+                        copy.write(buffer.getvalue())
+            raw_con.commit()
+        finally:
+            raw_con.close()
 
     def register_table(self, input, table_name, overwrite=False):
         # If the user has provided a table name, return it as a SplinkDataframe
@@ -203,6 +373,63 @@ class PostgresLinker(Linker):
     def _infinity_expression(self):
         return "'infinity'"
 
+    @property
+    def _supports_concurrent_sql_execution(self):
+        # Each statement runs on its own connection from the engine's pool
+        return True
+
+    @property
+    def _inline_input_ctes(self):
+        # Otherwise the input to the blocking join, which reads it twice, is
+        # materialised and cannot use the indexes on the blocking keys
+        return True
+
+    def _initialise_df_concat_with_tf(self, materialise=True):
+        nodes_with_tf = super()._initialise_df_concat_with_tf(materialise)
+        if nodes_with_tf is not None:
+            self._index_blocking_keys(
+                nodes_with_tf,
+                self._settings_obj._blocking_rules_to_generate_predictions,
+            )
+        return nodes_with_tf
+
+    def _index_blocking_keys(self, table: SplinkDataFrame, blocking_rules):
+        # Index the join keys of each blocking rule, and collect statistics so the
+        # planner can estimate the size of blocking joins
+        if not table.created_by_splink:
+            return
+
+        for br in blocking_rules:
+            if isinstance(br, ExplodingBlockingRule):
+                continue
+            keys = [key_r for _, key_r in br._equi_join_conditions]
+            if not keys:
+                continue
+
+            # Expressions must be parenthesised in an index definition
+            keys_sql = ", ".join(f"({key})" for key in keys)
+            key_hash = hashlib.sha256(keys_sql.encode("utf-8")).hexdigest()[:9]
+            index_name = f"{table.physical_name}_{key_hash}"
+            if index_name in self._blocking_key_indexes:
+                continue
+            sql = f"""
+            CREATE INDEX IF NOT EXISTS {index_name}
+            ON {table.physical_name} ({keys_sql})
+            """
+            try:
+                self._run_sql_execution(sql)
+            except SQLAlchemyError as e:
+                # e.g. if a key uses a function that is not immutable
+                logger.debug(f"Could not index blocking keys {keys_sql}: {e}")
+                continue
+            self._blocking_key_indexes.add(index_name)
+            # Statistics on the indexed expressions are collected by ANALYZE
+            self._analysed_tables.discard(table.physical_name)
+
+        if table.physical_name not in self._analysed_tables:
+            self._run_sql_execution(f"ANALYZE {table.physical_name};")
+            self._analysed_tables.add(table.physical_name)
+
     def _table_exists_in_database(self, table_name):
         sql = f"""
         SELECT table_name
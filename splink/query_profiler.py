@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable
+
+from sqlglot.errors import ParseError
+from sqlglot.expressions import CTE
+
+from .parse_sql import parse_one_cached
+from .splink_dataframe import SplinkDataFrame
+
+# https://stackoverflow.com/questions/39740632/python-type-hinting-without-cyclic-imports
+if TYPE_CHECKING:
+    from .linker import Linker
+
+logger = logging.getLogger(__name__)
+
+
+def _pipeline_steps(sql, sql_dialect):
+    """The templated names of the CTEs in a pipeline, in order of execution"""
+    # sqlglot cannot parse the NOT MATERIALIZED of the input CTEs on Postgres
+    sql = sql.replace(" as NOT MATERIALIZED (", " as (")
+    try:
+        tree = parse_one_cached(sql, sql_dialect, copy=False)
+    except ParseError:
+        return []
+    return [cte.alias for cte in tree.find_all(CTE)][::-1]
+
+
+class QueryProfiler:
+    """Records the wall time, output row count and, optionally, the query plan of
+    every SQL pipeline executed by a linker, to show which steps of a job are
+    expensive.
+    """
+
+    def __init__(self, linker: Linker, explain_plans: bool = False):
+        self.linker = linker
+        self.explain_plans = explain_plans
+        self.records = []
+
+    def profile_execution(
+        self,
+        sql: str,
+        templated_name: str,
+        execute: Callable[[], SplinkDataFrame],
+    ) -> SplinkDataFrame:
+        """Execute a pipeline using execute(), recording its profile"""
+        started_at = datetime.now(timezone.utc).isoformat()
+        start_time = time.perf_counter()
+        splink_dataframe = execute()
+        wall_time = time.perf_counter() - start_time
+
+        physical_name = splink_dataframe.physical_name
+        row_count, _ = self.linker._table_size(physical_name)
+
+        plan = None
+        if self.explain_plans:
+            try:
+                plan = self.linker._explain_sql(sql)
+            except Exception as e:
+                logger.debug(f"Could not explain the sql for {templated_name}: {e}")
+
+        record = {
+            "templated_name": templated_name,
+            "physical_name": physical_name,
+            "started_at": started_at,
+            "wall_time_seconds": wall_time,
+            "row_count": row_count,
+            "pipeline_steps": _pipeline_steps(sql, self.linker._sql_dialect),
+            "plan": plan,
+        }
+        # Pipelines may be executed concurrently from several threads
+        with self.linker._bookkeeping_lock:
+            self.records.append(record)
+        return splink_dataframe
+
+    def as_record_dict(self):
+        return list(self.records)
+
+    def as_pandas_dataframe(self):
+        import pandas as pd
+
+        columns = [
+            "templated_name",
+            "physical_name",
+            "started_at",
+            "wall_time_seconds",
+            "row_count",
+            "pipeline_steps",
+            "plan",
+        ]
+        return pd.DataFrame(self.records, columns=columns)
+
+    def as_json(self):
+        return json.dumps(self.records, indent=2, default=str)
@@ -7,7 +7,6 @@ import re
 from itertools import compress
 
 import pandas as pd
-import sqlglot
 from numpy import nan
 from pyspark.sql.dataframe import DataFrame as spark_df
 from pyspark.sql.utils import AnalysisException
@@ -16,7 +15,8 @@ from ..databricks.enable_splink import enable_splink
 from ..input_column import InputColumn
 from ..linker import Linker
 from ..misc import ensure_is_list, major_minor_version_greater_equal_than
-from ..splink_dataframe import SplinkDataFrame
+from ..parse_sql import transpile_cached
+from ..splink_dataframe import SplinkDataFrame, _record_batches_from_records
 from ..term_frequencies import colname_to_tf_tablename
 from .jar_location import get_scala_udfs
 from .spark_helpers.custom_spark_dialect import Dialect
@@ -61,6 +61,34 @@ class SparkDataFrame(SplinkDataFrame):
 
         return self.linker.spark.sql(sql).toPandas()
 
+    def as_arrow_table(self, limit=None):
+        import pyarrow as pa
+
+        sql = f"select * from {self.physical_name}"
+        if limit:
+            sql += f" limit {limit}"
+
+        spark_df = self.linker.spark.sql(sql)
+        if hasattr(spark_df, "toArrow"):
+            return spark_df.toArrow()
+
+        # Before Spark 4, collect the Arrow batches that toPandas uses internally
+        batches = spark_df._collect_as_arrow()
+        if batches:
+            return pa.Table.from_batches(batches)
+        from pyspark.sql.pandas.types import to_arrow_schema
+
+        return to_arrow_schema(spark_df.schema).empty_table()
+
+    def iter_record_batches(self, batch_size=1_000_000):
+        from pyspark.sql.pandas.types import to_arrow_schema
+
+        # Collect one partition at a time, rather than the whole dataframe
+        spark_df = self.as_spark_dataframe()
+        schema = to_arrow_schema(spark_df.schema)
+        records = (row.asDict(recursive=True) for row in spark_df.toLocalIterator())
+        yield from _record_batches_from_records(records, batch_size, schema)
+
     def as_spark_dataframe(self):
         return self.linker.spark.table(self.physical_name)
 
@@ -396,7 +424,10 @@ class SparkLinker(Linker):
         return spark_df
 
     def _execute_sql_against_backend(self, sql, templated_name, physical_name):
-        sql = sqlglot.transpile(sql, read="spark", write="customspark", pretty=True)[0]
+        # Pretty printing large pipelines is slow, so is only done when the SQL
+        # is logged
+        pretty = logger.isEnabledFor(5)
+        sql = transpile_cached(sql, read="spark", write="customspark", pretty=pretty)
         spark_df = self._log_and_run_sql_execution(sql, templated_name, physical_name)
         spark_df = self._break_lineage_and_repartition(
             spark_df, templated_name, physical_name
@@ -412,10 +443,30 @@ class SparkLinker(Linker):
     def _run_sql_execution(self, final_sql, templated_name, physical_name):
         return self.spark.sql(final_sql)
 
+    def _explain_sql(self, sql):
+        sql = transpile_cached(sql, read="spark", write="customspark")
+        query_execution = self.spark.sql(sql)._jdf.queryExecution()
+        return query_execution.executedPlan().toString()
+
+    def _table_size_estimate(self, physical_name):
+        # Read the optimiser's statistics for the table rather than counting it,
+        # which would run a Spark job
+        stats = (
+            self.spark.table(physical_name)._jdf.queryExecution().optimizedPlan()
+        ).stats()
+        size_in_bytes = int(stats.sizeInBytes().toString())
+        row_count = stats.rowCount()
+        row_count = int(row_count.get().toString()) if row_count.isDefined() else None
+        return row_count, size_in_bytes
+
     @property
     def _infinity_expression(self):
         return "'infinity'"
 
+    @property
+    def _supports_concurrent_sql_execution(self):
+        return True
+
     def register_table(self, input, table_name, overwrite=False):
         """
         Register a table to your backend database, to be used in one of the
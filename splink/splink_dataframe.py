@@ -132,12 +132,57 @@ class SplinkDataFrame:
 
         return pd.DataFrame(self.as_record_dict(limit=limit))
 
+    def as_arrow_table(self, limit=None):
+        """Return the dataframe as a pyarrow table.
+
+        Where the backend supports it, the table is built without converting
+        to pandas, so this is cheaper than `as_pandas_dataframe()`.
+
+        Args:
+            limit (int, optional): If provided, return this number of rows (equivalent
+            to a limit statement in SQL). Defaults to None, meaning return all rows
+
+        Examples:
+            ```py
+            df_predict = linker.predict()
+            arrow_table = df_predict.as_arrow_table()
+            ```
+        Returns:
+            pyarrow.Table: pyarrow table
+        """
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(
+            self.as_pandas_dataframe(limit=limit), preserve_index=False
+        )
+
+    def iter_record_batches(self, batch_size=1_000_000):
+        """Iterate over the dataframe as pyarrow record batches.
+
+        Where the backend supports it, records are streamed from the database, so
+        the whole dataframe is never held in memory at once.
+
+        Examples:
+            ```py
+            df_predict = linker.predict()
+            for batch in df_predict.iter_record_batches(batch_size=100_000):
+                process(batch)
+            ```
+        Args:
+            batch_size (int, optional): The maximum number of rows in each batch.
+                Defaults to 1,000,000.
+
+        Returns:
+            Iterator[pyarrow.RecordBatch]: record batches
+        """
+        yield from self.as_arrow_table().to_batches(max_chunksize=batch_size)
+
     def _repr_pretty_(self, p, cycle):
         msg = (
             f"Table name in database: `{self.physical_name}`\n"
             "\nTo retrieve records, you can call the following methods on this object:"
-            "\n`.as_record_dict(limit=5)` or "
-            "`.as_pandas_dataframe(limit=5)`.\n"
+            "\n`.as_record_dict(limit=5)`, "
+            "`.as_pandas_dataframe(limit=5)` or `.as_arrow_table(limit=5)`.\n"
             "\nYou may omit the `limit` argument to return all records."
             "\n\nThis table represents the following splink entity: "
             f"{self.templated_name}"
@@ -182,3 +227,20 @@ class SplinkDataFrame:
                 "either `overwrite = True` or manually move or delete the "
                 "existing file."
             )
+
+
+def _record_batches_from_records(records, batch_size, schema):
+    """Convert an iterator of record dictionaries into pyarrow record batches with
+    the given schema.  The schema must come from the types of the columns, rather
+    than be inferred from the records, since a column may be null throughout the
+    first batch"""
+    import pyarrow as pa
+
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield pa.RecordBatch.from_pylist(batch, schema=schema)
+            batch = []
+    if batch:
+        yield pa.RecordBatch.from_pylist(batch, schema=schema)
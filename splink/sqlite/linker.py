@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import logging
 import sqlite3
 from math import log2, pow
@@ -10,11 +11,48 @@ from ..exceptions import SplinkException
 from ..input_column import InputColumn
 from ..linker import Linker
 from ..misc import ensure_is_list
-from ..splink_dataframe import SplinkDataFrame
+from ..splink_dataframe import SplinkDataFrame, _record_batches_from_records
 from ..unique_id_concat import _composite_unique_id_from_nodes_sql
 
 logger = logging.getLogger(__name__)
 
+# Pragmas for performance, at the expense of durability, which Splink's tables
+# do not need since they can be recomputed from the input data
+_performance_pragmas = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": -256 * 1024,
+    "mmap_size": 2**30,
+}
+
+
+def _sqlite_arrow_type(storage_classes):
+    """The SQL type to cast a column holding values of the given SQLite storage
+    classes to, if any, and the pyarrow type of the result"""
+    import pyarrow as pa
+
+    if not storage_classes:
+        return None, pa.null()
+    if storage_classes == {"integer"}:
+        return None, pa.int64()
+    if storage_classes <= {"integer", "real"}:
+        return "real", pa.float64()
+    if storage_classes == {"text"}:
+        return None, pa.string()
+    if storage_classes == {"blob"}:
+        return None, pa.binary()
+    return "text", pa.string()
+
+
+def _content_hash(value):
+    """A hash of the value that, unlike python's hash(), is the same in every
+    session.  It is 32 bits wide so that its sum over a column cannot overflow"""
+    if value is None:
+        return None
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big")
+
 
 def dict_factory(cursor, row):
     d = {}
@@ -80,6 +118,57 @@ class SQLiteDataFrame(SplinkDataFrame):
         cur = self.linker.con.cursor()
         return cur.execute(sql).fetchall()
 
+    def _arrow_select_sql_and_schema(self):
+        """SQL selecting the columns of the table, cast so that each holds values
+        of a single type, and the pyarrow schema of its result.  SQLite columns
+        are dynamically typed, so their types are found from the values they hold"""
+        import pyarrow as pa
+
+        pragma_result = self.linker.con.execute(
+            f"PRAGMA table_info({self.physical_name})"
+        ).fetchall()
+        names = [r["name"] for r in pragma_result]
+        quoted = ['"{}"'.format(name.replace('"', '""')) for name in names]
+
+        types_sql = ", ".join(
+            f"group_concat(distinct typeof({col})) as t{i}"
+            for i, col in enumerate(quoted)
+        )
+        types = self.linker.con.execute(
+            f"select {types_sql} from {self.physical_name}"
+        ).fetchone()
+
+        select_cols = []
+        fields = []
+        for i, (name, col) in enumerate(zip(names, quoted)):
+            storage_classes = set((types[f"t{i}"] or "").split(",")) - {"", "null"}
+            cast_to, arrow_type = _sqlite_arrow_type(storage_classes)
+            select_cols.append(f"cast({col} as {cast_to}) as {col}" if cast_to else col)
+            fields.append(pa.field(name, arrow_type))
+
+        sql = f"select {', '.join(select_cols)} from {self.physical_name}"
+        return sql, pa.schema(fields)
+
+    def as_arrow_table(self, limit=None):
+        import pyarrow as pa
+
+        sql, schema = self._arrow_select_sql_and_schema()
+        if limit:
+            sql += f" limit {limit}"
+        records = self.linker.con.cursor().execute(sql).fetchall()
+        return pa.Table.from_pylist(records, schema=schema)
+
+    def iter_record_batches(self, batch_size=1_000_000):
+        sql, schema = self._arrow_select_sql_and_schema()
+        cur = self.linker.con.cursor()
+        cur.execute(sql)
+
+        def records():
+            while rows := cur.fetchmany(batch_size):
+                yield from rows
+
+        yield from _record_batches_from_records(records(), batch_size, schema)
+
 
 class SQLiteLinker(Linker):
     def __init__(
@@ -91,6 +180,7 @@ class SQLiteLinker(Linker):
         input_table_aliases: str | list = None,
         validate_settings: bool = True,
         register_udfs=True,
+        pragmas: dict | str = None,
     ):
         self._sql_dialect_ = "sqlite"
 
@@ -98,10 +188,13 @@ class SQLiteLinker(Linker):
             connection = sqlite3.connect(connection)
         self.con = connection
         self.con.row_factory = dict_factory
+        if pragmas is not None:
+            self._set_pragmas(pragmas)
         # maths functions not always available by default depending on system
         self.con.create_function("log2", 1, log2)
         self.con.create_function("pow", 2, pow)
         self.con.create_function("power", 2, pow)
+        self.con.create_function("content_hash", 1, _content_hash, deterministic=True)
         if register_udfs:
             self._register_udfs()
 
@@ -120,6 +213,14 @@ class SQLiteLinker(Linker):
             validate_settings=validate_settings,
         )
 
+    def _set_pragmas(self, pragmas):
+        if pragmas == "performance":
+            pragmas = _performance_pragmas
+        for name, value in pragmas.items():
+            if not name.isidentifier():
+                raise ValueError(f"'{name}' is not a valid pragma name")
+            self.con.execute(f"PRAGMA {name} = {value}")
+
     def _table_to_splink_dataframe(self, templated_name, physical_name):
         return SQLiteDataFrame(templated_name, physical_name, self)
 
@@ -143,6 +244,10 @@ class SQLiteLinker(Linker):
     ) -> SplinkDataFrame:
         return self.con.execute(final_sql)
 
+    def _explain_sql(self, sql):
+        rows = self.con.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        return "\n".join(row["detail"] for row in rows)
+
     def register_table(self, input, table_name, overwrite=False):
         # If the user has provided a table name, return it as a SplinkDataframe
         if isinstance(input, str):
@@ -239,7 +344,12 @@ class SQLiteLinker(Linker):
 
         def wrap_func_with_str(func):
             def wrapped_func(str_l, str_r):
-                return func(str(str_l), str(str_r))
+                # Values are almost always strings, so avoid converting them
+                if type(str_l) is not str:
+                    str_l = str(str_l)
+                if type(str_r) is not str:
+                    str_r = str(str_r)
+                return func(str_l, str_r)
 
             return wrapped_func
 
@@ -252,4 +362,8 @@ class SQLiteLinker(Linker):
         }
 
         for sql_name, func in funcs_to_register.items():
-            self.con.create_function(sql_name, 2, wrap_func_with_str(func))
+            # Deterministic functions can be used in indexes, and are evaluated
+            # once per query where their arguments are constant
+            self.con.create_function(
+                sql_name, 2, wrap_func_with_str(func), deterministic=True
+            )
@@ -24,36 +24,141 @@ def colname_to_tf_tablename(input_column: InputColumn):
     return f"__splink__df_tf_{column_name_str}"
 
 
+def _approximate_tf_min_count(linker: Linker, input_column: InputColumn):
+    """The minimum count of a value for its term frequency to be retained exactly,
+    if the column has approximate term frequencies, otherwise None"""
+    return linker._approximate_tf_min_counts.get(input_column.unquote().name)
+
+
+def _term_frequencies_sql(
+    input_column: InputColumn, count_expr, from_sql, group_by_sql="", min_count=None
+):
+    tf_expr = (
+        f"cast({count_expr} as float8) / cast(sum({count_expr}) over () as float8)"
+    )
+
+    if min_count is None:
+        return f"""
+        select
+        {input_column.name}, {tf_expr} as {input_column.tf_name}
+        {from_sql}
+        {group_by_sql}
+        """
+
+    # Approximate term frequencies retain only values that occur at least
+    # min_count times.  The rest are assigned the mean term frequency of the
+    # values that were dropped, which is held in the __splink__tf_floor column.
+    # One dropped value is kept, with a null term frequency, so that the floor is
+    # available even if every value is dropped
+    is_tail = f"{count_expr} < {min_count}"
+    floor_expr = f"""
+        cast(sum(case when {is_tail} then {count_expr} end) over () as float8)
+        / cast(sum(case when {is_tail} then 1 end) over () as float8)
+        / cast(sum({count_expr}) over () as float8)
+    """
+    is_retained = f"__splink__value_count >= {min_count}"
+
+    return f"""
+    select
+    {input_column.name},
+    case when {is_retained} then {input_column.tf_name} end
+        as {input_column.tf_name},
+    __splink__tf_floor
+    from (
+        select
+        {input_column.name},
+        {count_expr} as __splink__value_count,
+        {tf_expr} as {input_column.tf_name},
+        {floor_expr} as __splink__tf_floor,
+        row_number() over (
+            partition by case when {is_tail} then 1 else 0 end
+            order by {input_column.name}
+        ) as __splink__tail_rank
+        {from_sql}
+        {group_by_sql}
+    ) as value_counts
+    where {is_retained} or __splink__tail_rank = 1
+    """
+
+
 def term_frequencies_for_single_column_sql(
-    input_column: InputColumn, table_name="__splink__df_concat"
+    input_column: InputColumn, table_name="__splink__df_concat", min_count=None
 ):
     col_name = input_column.name
 
+    # The denominator is computed with a window over the grouped values,
+    # rather than a scalar subquery, to avoid a second scan of the table
+    return _term_frequencies_sql(
+        input_column,
+        "count(*)",
+        f"from {table_name} where {col_name} is not null",
+        f"group by {col_name}",
+        min_count=min_count,
+    )
+
+
+def term_frequencies_for_all_columns_sql(
+    input_columns: list[InputColumn], table_name="__splink__df_concat"
+):
+    """Compute the value counts of all term frequency columns in a single scan of
+    the table, using grouping sets.
+
+    Each column appears in exactly one grouping set, and is null in the rows
+    belonging to the other sets, so the counts for a given column are the rows in
+    which that column is not null.  Use `term_frequencies_from_all_columns_sql` to
+    split the result into a term frequency table for each column.
+    """
+    col_names = ", ".join(c.name for c in input_columns)
+    grouping_sets = ", ".join(f"({c.name})" for c in input_columns)
+
     sql = f"""
     select
-    {col_name}, cast(count(*) as float8) / (select
-        count({col_name}) as total from {table_name})
-            as {input_column.tf_name}
+    {col_names}, count(*) as __splink__tf_count
     from {table_name}
-    where {col_name} is not null
-    group by {col_name}
+    group by grouping sets ({grouping_sets})
     """
 
     return sql
 
 
+def term_frequencies_from_all_columns_sql(
+    input_column: InputColumn, table_name="__splink__df_all_tfs", min_count=None
+):
+    return _term_frequencies_sql(
+        input_column,
+        "__splink__tf_count",
+        f"from {table_name} where {input_column.name} is not null",
+        min_count=min_count,
+    )
+
+
 def _join_tf_to_input_df_sql(linker: Linker):
     settings_obj = linker._settings_obj
     tf_cols = settings_obj._term_frequency_columns
 
     select_cols = []
+    floor_joins = []
 
-    for col in tf_cols:
+    for i, col in enumerate(tf_cols):
         tbl = colname_to_tf_tablename(col)
         if tbl in linker._intermediate_table_cache:
             tbl = linker._intermediate_table_cache[tbl].physical_name
         tf_col = col.tf_name
-        select_cols.append(f"{tbl}.{tf_col}")
+        if _approximate_tf_min_count(linker, col) is None:
+            select_cols.append(f"{tbl}.{tf_col}")
+        else:
+            # Values not retained in an approximate tf table take its floor value,
+            # which is computed once and joined as a single row
+            floor_alias = f"__splink__tf_floor_{i}"
+            select_cols.append(
+                f"case when __splink__df_concat.{col.name} is not null "
+                f"then coalesce({tbl}.{tf_col}, {floor_alias}.__splink__tf_floor) "
+                f"end as {tf_col}"
+            )
+            floor_joins.append(
+                f"cross join (select max(__splink__tf_floor) as __splink__tf_floor "
+                f"from {tbl}) as {floor_alias}"
+            )
 
     select_cols.insert(0, "__splink__df_concat.*")
     select_cols_str = ", ".join(select_cols)
@@ -72,7 +177,7 @@ def _join_tf_to_input_df_sql(linker: Linker):
     #     templ.format(tbl=colname_to_tf_tablename(col), col=col.name)
     #     for col in tf_cols
     # ]
-    left_joins_str = " ".join(left_joins)
+    left_joins_str = " ".join(left_joins + floor_joins)
 
     sql = f"""
     select {select_cols_str }
@@ -83,18 +188,65 @@ def _join_tf_to_input_df_sql(linker: Linker):
     return sql
 
 
-def term_frequencies_from_concat_with_tf(input_column):
+def term_frequencies_from_concat_with_tf(input_column, min_count=None):
+    if min_count is None:
+        sql = f"""
+            select
+            distinct {input_column.name},
+            {input_column.tf_name}
+            from __splink__df_concat_with_tf
+        """
+        return sql
+
+    # For approximate term frequencies, every dropped value was assigned the
+    # floor, which is below the term frequency of any retained value, so the
+    # floor is the smallest term frequency if that is below the threshold
+    tf_name = input_column.tf_name
+    threshold = (
+        f"cast({min_count} as float8) / cast(count({input_column.name}) over () "
+        "as float8)"
+    )
     sql = f"""
         select
         distinct {input_column.name},
-        {input_column.tf_name}
-        from __splink__df_concat_with_tf
+        {tf_name},
+        __splink__tf_floor
+        from (
+            select
+            {input_column.name},
+            {tf_name},
+            case when min({tf_name}) over () < {threshold}
+            then min({tf_name}) over () end as __splink__tf_floor
+            from __splink__df_concat_with_tf
+        ) as tf_values
     """
-
     return sql
 
 
-def compute_all_term_frequencies_sqls(linker: Linker) -> list[dict]:
+def _term_frequency_columns_to_compute(linker: Linker) -> list[InputColumn]:
+    """Term frequency columns whose tf tables are not already in the cache"""
+    return [
+        tf_col
+        for tf_col in linker._settings_obj._term_frequency_columns
+        if colname_to_tf_tablename(tf_col) not in linker._intermediate_table_cache
+    ]
+
+
+def _single_scan_term_frequencies_supported(linker: Linker) -> bool:
+    # SQLite does not support grouping sets
+    return linker._sql_dialect != "sqlite"
+
+
+def compute_all_term_frequencies_sqls(
+    linker: Linker, from_all_tfs_table=False
+) -> list[dict]:
+    """SQL to compute __splink__df_concat_with_tf, including the tf tables for any
+    term frequency columns not already in the cache.
+
+    If from_all_tfs_table is True, the tf tables are split out of
+    __splink__df_all_tfs, the output of `term_frequencies_for_all_columns_sql`,
+    rather than being computed from __splink__df_concat.
+    """
     settings_obj = linker._settings_obj
     tf_cols = settings_obj._term_frequency_columns
 
@@ -107,13 +259,14 @@ def compute_all_term_frequencies_sqls(linker: Linker) -> list[dict]:
         ]
 
     sqls = []
-    for tf_col in tf_cols:
-        tf_table_name = colname_to_tf_tablename(tf_col)
-
-        if tf_table_name not in linker._intermediate_table_cache:
-            sql = term_frequencies_for_single_column_sql(tf_col)
-            sql = {"sql": sql, "output_table_name": tf_table_name}
-            sqls.append(sql)
+    for tf_col in _term_frequency_columns_to_compute(linker):
+        min_count = _approximate_tf_min_count(linker, tf_col)
+        if from_all_tfs_table:
+            sql = term_frequencies_from_all_columns_sql(tf_col, min_count=min_count)
+        else:
+            sql = term_frequencies_for_single_column_sql(tf_col, min_count=min_count)
+        sql = {"sql": sql, "output_table_name": colname_to_tf_tablename(tf_col)}
+        sqls.append(sql)
 
     sql = _join_tf_to_input_df_sql(linker)
     sql = {
@@ -144,7 +297,9 @@ def compute_term_frequencies_from_concat_with_tf(linker: "Linker"):
         tf_table_name = colname_to_tf_tablename(tf_col)
 
         if tf_table_name not in cache:
-            sql = term_frequencies_from_concat_with_tf(tf_col)
+            sql = term_frequencies_from_concat_with_tf(
+                tf_col, _approximate_tf_min_count(linker, tf_col)
+            )
             sql = {
                 "sql": sql,
                 "output_table_name": colname_to_tf_tablename(tf_col),
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+from .exceptions import SplinkException
+from .input_column import InputColumn
+from .misc import ascii_uid
+from .splink_dataframe import SplinkDataFrame
+from .term_frequencies import (
+    _approximate_tf_min_count,
+    _single_scan_term_frequencies_supported,
+    _term_frequency_columns_to_compute,
+    colname_to_tf_tablename,
+    term_frequencies_for_all_columns_sql,
+)
+
+# https://stackoverflow.com/questions/39740632/python-type-hinting-without-cyclic-imports
+if TYPE_CHECKING:
+    from .linker import Linker
+
+logger = logging.getLogger(__name__)
+
+# The content hash of a column is the sum of a hash of each of its non-null values.
+# Unlike a hash of the whole column it does not depend on the order of the rows,
+# and the fingerprint of appended records can be added to that of the original
+# records to give the fingerprint of the combined data.  The sum is returned as a
+# string to avoid any loss of precision.
+# The SQLite linker registers content_hash as a python function.
+_content_hash_templates = {
+    "duckdb": ("cast(hash({col}) as hugeint)", "varchar"),
+    "spark": ("cast(xxhash64({col}) as decimal(38, 0))", "string"),
+    "postgres": ("cast(hashtext(cast({col} as text)) as numeric)", "text"),
+    "sqlite": ("content_hash({col})", "text"),
+    "presto": (
+        "cast(from_big_endian_64(xxhash64(to_utf8(cast({col} as varchar)))) "
+        "as decimal(38, 0))",
+        "varchar",
+    ),
+}
+
+
+def _check_content_hash_supported(linker: Linker):
+    # A fingerprint without a content hash would not detect changed values, so a
+    # stale table could be loaded from the store
+    if linker._sql_dialect not in _content_hash_templates:
+        raise SplinkException(
+            "The term frequency store is not supported for the "
+            f"{linker._sql_dialect} dialect"
+        )
+
+
+def _fingerprint_sql(input_columns: list[InputColumn], sql_dialect: str):
+    hash_template, string_type = _content_hash_templates[sql_dialect]
+    select_exprs = []
+    for i, col in enumerate(input_columns):
+        hash_expr = hash_template.format(col=col.name)
+        # The hash of an all-null column is zero, so it can be summed with others
+        select_exprs.append(f"count({col.name}) as non_null_count_{i}")
+        select_exprs.append(
+            f"cast(coalesce(sum(case when {col.name} is not null then {hash_expr} "
+            f"end), 0) as {string_type}) as content_hash_{i}"
+        )
+
+    return f"""
+    select {", ".join(select_exprs)}
+    from __splink__df_concat
+    """
+
+
+def _value_counts_sql(input_column: InputColumn):
+    return f"""
+    select {input_column.name}, count(*) as __splink__tf_count
+    from __splink__df_concat
+    where {input_column.name} is not null
+    group by {input_column.name}
+    """
+
+
+def _execute_against_concat(
+    linker: Linker, sql, output_table_name, input_dataframe: SplinkDataFrame = None
+):
+    """Execute sql that reads from __splink__df_concat, which is either the
+    concatenated input data of the linker, or input_dataframe if given"""
+    linker._pipeline.reset()
+    if input_dataframe is None:
+        df_concat = linker._initialise_df_concat()
+        input_dataframes = [df_concat] if df_concat else []
+    else:
+        input_dataframes = [input_dataframe]
+
+    linker._enqueue_sql(sql, output_table_name)
+    df = linker._execute_sql_pipeline(input_dataframes)
+    records = df.as_pandas_dataframe()
+    df.drop_table_from_database_and_remove_from_cache()
+    return records
+
+
+def _compute_fingerprints(
+    linker: Linker, input_columns: list[InputColumn], input_dataframe=None
+) -> list[dict]:
+    sql = _fingerprint_sql(input_columns, linker._sql_dialect)
+    result = _execute_against_concat(
+        linker, sql, "__splink__tf_fingerprints", input_dataframe
+    )
+    result = result.to_dict(orient="records")[0]
+
+    fingerprints = []
+    for i, col in enumerate(input_columns):
+        fingerprints.append(
+            {
+                "column_name": col.unquote().name,
+                "sql_dialect": linker._sql_dialect,
+                "non_null_count": int(result[f"non_null_count_{i}"]),
+                "content_hash": str(int(result[f"content_hash_{i}"])),
+            }
+        )
+    return fingerprints
+
+
+def _compute_value_counts(
+    linker: Linker, input_columns: list[InputColumn], input_dataframe=None
+) -> list[pd.DataFrame]:
+    """The count of each distinct non-null value of each column, computed in a
+    single scan where the backend allows"""
+    if len(input_columns) > 1 and _single_scan_term_frequencies_supported(linker):
+        sql = term_frequencies_for_all_columns_sql(input_columns)
+        all_counts = _execute_against_concat(
+            linker, sql, "__splink__df_all_tfs", input_dataframe
+        )
+        value_counts = []
+        for col in input_columns:
+            name = col.unquote().name
+            counts = all_counts.loc[
+                all_counts[name].notnull(), [name, "__splink__tf_count"]
+            ]
+            value_counts.append(counts.reset_index(drop=True))
+        return value_counts
+
+    return [
+        _execute_against_concat(
+            linker,
+            _value_counts_sql(col),
+            "__splink__tf_value_counts",
+            input_dataframe,
+        )
+        for col in input_columns
+    ]
+
+
+def _store_paths(directory, input_column: InputColumn):
+    stem = os.path.join(directory, colname_to_tf_tablename(input_column))
+    return f"{stem}.parquet", f"{stem}.json"
+
+
+def _read_store_entry(directory, input_column: InputColumn):
+    parquet_path, metadata_path = _store_paths(directory, input_column)
+    if not (os.path.exists(parquet_path) and os.path.exists(metadata_path)):
+        return None, None
+
+    import duckdb
+
+    with open(metadata_path) as f:
+        fingerprint = json.load(f)
+
+    con = duckdb.connect()
+    value_counts = con.execute(f"select * from read_parquet('{parquet_path}')").df()
+    con.close()
+    return fingerprint, value_counts
+
+
+def _write_store_entry(
+    directory, input_column: InputColumn, fingerprint, value_counts: pd.DataFrame
+):
+    import duckdb
+
+    os.makedirs(directory, exist_ok=True)
+    parquet_path, metadata_path = _store_paths(directory, input_column)
+
+    con = duckdb.connect()
+    con.register("__splink__tf_value_counts", value_counts)
+    con.execute(f"COPY __splink__tf_value_counts TO '{parquet_path}' (FORMAT PARQUET)")
+    con.close()
+
+    with open(metadata_path, "w") as f:
+        json.dump(fingerprint, f, indent=4)
+
+
+def _register_value_counts(
+    linker: Linker, input_column: InputColumn, value_counts: pd.DataFrame
+):
+    unquoted = input_column.unquote()
+    counts = value_counts["__splink__tf_count"].astype("float64")
+    tf_table = pd.DataFrame(
+        {
+            unquoted.name: value_counts[unquoted.name],
+            unquoted.tf_name: counts / counts.sum(),
+        }
+    )
+
+    min_count = _approximate_tf_min_count(linker, input_column)
+    if min_count is not None:
+        # As in _term_frequencies_sql, one value below min_count is kept with a
+        # null term frequency, so the floor is kept even if every value is dropped
+        is_tail = counts < min_count
+        tf_table["__splink__tf_floor"] = tf_table.loc[is_tail, unquoted.tf_name].mean()
+        tf_table.loc[is_tail, unquoted.tf_name] = None
+        tf_table = tf_table[~is_tail | ~is_tail.duplicated()]
+
+    linker.register_term_frequency_lookup(tf_table, unquoted.name, overwrite=True)
+
+
+def load_or_compute_term_frequencies(linker: Linker, directory):
+    _check_content_hash_supported(linker)
+    tf_cols = _term_frequency_columns_to_compute(linker)
+    if not tf_cols:
+        return
+
+    fingerprints = _compute_fingerprints(linker, tf_cols)
+
+    cols_to_compute = []
+    fingerprints_to_compute = []
+    for col, fingerprint in zip(tf_cols, fingerprints):
+        stored_fingerprint, value_counts = _read_store_entry(directory, col)
+        if stored_fingerprint == fingerprint:
+            logger.info(f"Loaded term frequencies for {col.unquote().name} from store")
+            _register_value_counts(linker, col, value_counts)
+        else:
+            cols_to_compute.append(col)
+            fingerprints_to_compute.append(fingerprint)
+
+    if not cols_to_compute:
+        return
+
+    all_value_counts = _compute_value_counts(linker, cols_to_compute)
+    for col, fingerprint, value_counts in zip(
+        cols_to_compute, fingerprints_to_compute, all_value_counts
+    ):
+        logger.info(f"Saving term frequencies for {col.unquote().name} to store")
+        _write_store_entry(directory, col, fingerprint, value_counts)
+        _register_value_counts(linker, col, value_counts)
+
+
+def append_to_term_frequency_store(linker: Linker, directory, appended_records):
+    _check_content_hash_supported(linker)
+    settings_obj = linker._settings_obj
+
+    entries = []
+    for col in settings_obj._term_frequency_columns:
+        stored_fingerprint, stored_value_counts = _read_store_entry(directory, col)
+        if stored_fingerprint is None:
+            logger.info(
+                f"No term frequencies for {col.unquote().name} in store, "
+                "so appended records were not added"
+            )
+        else:
+            entries.append((col, stored_fingerprint, stored_value_counts))
+
+    if not entries:
+        return
+
+    table_name = f"__splink__tf_store_appended_records_{ascii_uid(8)}"
+    appended_df = linker.register_table(appended_records, table_name)
+    appended_df.templated_name = "__splink__df_concat"
+    try:
+        cols = [col for col, _, _ in entries]
+        fingerprints = _compute_fingerprints(linker, cols, appended_df)
+        all_value_counts = _compute_value_counts(linker, cols, appended_df)
+    finally:
+        # Registered tables are not marked as created by Splink
+        appended_df.drop_table_from_database_and_remove_from_cache(
+            force_non_splink_table=True
+        )
+
+    for (col, stored_fingerprint, stored_value_counts), fp, value_counts in zip(
+        entries, fingerprints, all_value_counts
+    ):
+        name = col.unquote().name
+        value_counts = pd.concat([stored_value_counts, value_counts])
+        value_counts = value_counts.groupby(name, as_index=False)[
+            "__splink__tf_count"
+        ].sum()
+
+        fingerprint = {
+            **stored_fingerprint,
+            "non_null_count": stored_fingerprint["non_null_count"]
+            + fp["non_null_count"],
+            "content_hash": str(
+                int(stored_fingerprint["content_hash"]) + int(fp["content_hash"])
+            ),
+        }
+        logger.info(f"Appended term frequencies for {name} to store")
+        _write_store_entry(directory, col, fingerprint, value_counts)
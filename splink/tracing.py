@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import functools
+import json
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Callable, ContextManager
+
+from .misc import ascii_uid
+
+# https://stackoverflow.com/questions/39740632/python-type-hinting-without-cyclic-imports
+if TYPE_CHECKING:
+    from .linker import Linker
+
+# The innermost span that is open in the current thread
+_current_span: ContextVar[Span | None] = ContextVar("splink_current_span", default=None)
+
+
+class Span:
+    """A timed operation performed by a linker, such as `predict` or the execution
+    of a SQL pipeline, with attributes describing it.
+
+    Spans are nested: the span of a pipeline executed during `predict` has the
+    span of `predict` as its parent.
+    """
+
+    def __init__(self, name: str, attributes: dict = None, parent: Span = None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.parent = parent
+        self.span_id = ascii_uid(16)
+        self.trace_id = parent.trace_id if parent else ascii_uid(16)
+        self.start_time = time.time()
+        self.end_time = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration_seconds(self):
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else None,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_seconds": self.duration_seconds,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def current_span() -> Span | None:
+    """The innermost span open in the current thread, if any"""
+    return _current_span.get()
+
+
+@contextmanager
+def trace_span(hooks: list[Callable[[Span], ContextManager]], name: str, **attributes):
+    """Open a span, entering the context manager returned by each hook for the
+    duration of the span.  The span's end time and error are set before the
+    hooks are exited"""
+    span = Span(name, attributes, parent=current_span())
+    if not hooks:
+        yield span
+        return
+
+    token = _current_span.set(span)
+    try:
+        with ExitStack() as stack:
+            for hook in hooks:
+                stack.enter_context(hook(span))
+            try:
+                yield span
+            except BaseException as e:
+                span.error = repr(e)
+                raise
+            finally:
+                span.end_time = time.time()
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: str, count_output_rows: bool = True):
+    """Decorate a linker method so that it runs within a span.
+
+    The span records the number of tables retrieved from the linker's cache and
+    computed during the call and, if the method returns a SplinkDataFrame, its
+    name and, if count_output_rows, its row count
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(linker: Linker, *args, **kwargs):
+            hooks = linker._tracing_hooks
+            if not hooks:
+                return method(linker, *args, **kwargs)
+
+            cache = linker._intermediate_table_cache
+            hits_before = len(cache.queries_retrieved_from_cache)
+            misses_before = len(cache.executed_queries)
+
+            with trace_span(hooks, name) as span:
+                result = method(linker, *args, **kwargs)
+
+                hits = len(cache.queries_retrieved_from_cache) - hits_before
+                misses = len(cache.executed_queries) - misses_before
+                span.set_attribute("cache_hits", max(hits, 0))
+                span.set_attribute("cache_misses", max(misses, 0))
+
+                templated_name = getattr(result, "templated_name", None)
+                physical_name = getattr(result, "physical_name", None)
+                if physical_name is not None:
+                    span.set_attribute("output_templated_name", templated_name)
+                    span.set_attribute("output_physical_name", physical_name)
+                    if count_output_rows:
+                        row_count, _ = linker._table_size(physical_name)
+                        span.set_attribute("row_count", row_count)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+class JsonLinesSpanExporter:
+    """A tracing hook that appends each span to a file as a line of JSON when it
+    ends.
+
+    Examples:
+        ```py
+        from splink.tracing import JsonLinesSpanExporter
+
+        linker.add_tracing_hook(JsonLinesSpanExporter("splink_spans.jsonl"))
+        ```
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def __call__(self, span: Span):
+        try:
+            yield
+        finally:
+            line = json.dumps(span.as_dict(), default=str)
+            with self._lock:
+                with open(self.filepath, "a") as f:
+                    f.write(line + "\n")
@@ -45,7 +45,7 @@ def register_cc_df(G):
     return predict_df
 
 
-def run_cc_implementation(predict_df):
+def run_cc_implementation(predict_df, algorithm="label_propagation"):
     linker = predict_df.linker
     concat_with_tf = linker._initialise_df_concat_with_tf()
 
@@ -56,6 +56,7 @@ def run_cc_implementation(predict_df):
         df_predict=None,
         concat_with_tf=concat_with_tf,
         _generated_graph=True,
+        algorithm=algorithm,
     ).as_pandas_dataframe()
     cc = cc.rename(columns={"unique_id": "node_id", "cluster_id": "representative"})
     cc = cc[["node_id", "representative"]]
@@ -426,6 +426,21 @@ def test_blocking_rule_accepts_different_dialects():
     assert br._equi_join_conditions == [("`hi THERE`", "`hi THERE`")]
 
 
+def test_blocking_rule_parsed_join_condition_is_cached():
+    br = BlockingRule("l.first_name = r.first_name and l.dob > r.dob", "duckdb")
+    assert br._parsed_join_condition is br._parsed_join_condition
+
+    # Reading the conditions does not modify the cached tree
+    filter_conditions = br._filter_conditions
+    assert "l.dob > r.dob" in filter_conditions
+    for _ in range(2):
+        assert br._equi_join_conditions == [("first_name", "first_name")]
+        assert br._filter_conditions == filter_conditions
+
+    br.blocking_rule_sql = "l.surname = r.surname"
+    assert br._equi_join_conditions == [("surname", "surname")]
+
+
 @mark_with_dialects_excluding()
 def test_cumulative_br_funs(test_helpers, dialect):
     helper = test_helpers[dialect]
@@ -0,0 +1,74 @@
+import pandas as pd
+import pyarrow as pa
+
+from .decorator import mark_with_dialects_excluding
+
+
+@mark_with_dialects_excluding()
+def test_arrow_results(test_helpers, dialect):
+    helper = test_helpers[dialect]
+    df = helper.load_frame_from_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("first_name"),
+            helper.cl.exact_match("surname"),
+        ],
+        "blocking_rules_to_generate_predictions": ["l.dob = r.dob"],
+    }
+    linker = helper.Linker(df, settings, **helper.extra_linker_args())
+    df_predict = linker.predict()
+    expected = df_predict.as_pandas_dataframe()
+
+    arrow_table = df_predict.as_arrow_table()
+    assert isinstance(arrow_table, pa.Table)
+    assert arrow_table.num_rows == len(expected)
+    assert arrow_table.column_names == list(expected.columns)
+    assert df_predict.as_arrow_table(limit=5).num_rows == 5
+
+    batches = list(df_predict.iter_record_batches(batch_size=100))
+    assert all(isinstance(b, pa.RecordBatch) for b in batches)
+    assert max(b.num_rows for b in batches) <= 100
+    assert sum(b.num_rows for b in batches) == len(expected)
+
+    # Streaming is not interrupted by reading results while batches are consumed
+    num_rows = 0
+    for batch in df_predict.iter_record_batches(batch_size=100):
+        df_predict.as_record_dict(limit=1)
+        num_rows += batch.num_rows
+    assert num_rows == len(expected)
+
+    unique_ids = pa.Table.from_batches(batches).column("unique_id_l").to_pylist()
+    assert sorted(unique_ids) == sorted(expected["unique_id_l"])
+
+
+@mark_with_dialects_excluding()
+def test_arrow_schema_from_column_types(test_helpers, dialect):
+    helper = test_helpers[dialect]
+    df = helper.load_frame_from_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [helper.cl.exact_match("first_name")],
+    }
+    linker = helper.Linker(df, settings, **helper.extra_linker_args())
+
+    x = [None, None, "a", "b", None, "c"]
+    data = pd.DataFrame({"unique_id": range(len(x)), "x": x})
+    df_nulls = linker.register_table(data, "__splink__test_nulls", overwrite=True)
+
+    # The column is null throughout the first batch, but has the type of its
+    # later values in every batch
+    batches = list(df_nulls.iter_record_batches(batch_size=2))
+    assert len({b.schema for b in batches}) == 1
+    assert batches[0].schema.field("x").type == pa.string()
+    assert pa.Table.from_batches(batches).column("x").to_pylist() == x
+
+    # An empty table has the columns of the table
+    df_empty = linker.query_sql(
+        f"select * from {df_nulls.physical_name} where 1 = 0", output_type="splink_df"
+    )
+    arrow_table = df_empty.as_arrow_table()
+    assert arrow_table.num_rows == 0
+    assert arrow_table.column_names == ["unique_id", "x"]
@@ -345,3 +345,68 @@ def test_single_deletion():
     # Check it is no longer in the cache or database
     assert table_name not in get_duckdb_table_names_as_list(linker._con)
     assert "__splink__df_tf_name" not in cache
+
+
+def test_cache_budget_evicts_least_recently_used_tables():
+    df = pd.read_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [exact_match("first_name"), exact_match("surname")],
+        "blocking_rules_to_generate_predictions": ["l.dob = r.dob"],
+    }
+
+    linker = DuckDBLinker(df, settings)
+    cache = linker._intermediate_table_cache
+    linker.set_cache_budget(max_rows=1000)
+
+    df_predict = linker.predict()
+    evicted_name = df_predict.physical_name
+
+    # A table is not evicted while a SplinkDataFrame for it is held
+    df_predict_2 = linker.predict(threshold_match_probability=0.5)
+    assert linker.cache_statistics()["evictions"] == 0
+    assert evicted_name in get_duckdb_table_names_as_list(linker._con)
+
+    del df_predict, df_predict_2
+    df_predict_2 = linker.predict(threshold_match_probability=0.6)
+    stats = linker.cache_statistics()
+    assert stats["misses"] == 4
+    assert stats["evictions"] == 2
+
+    # The first predictions were evicted, but the pinned concat_with_tf was not
+    table_names = get_duckdb_table_names_as_list(linker._con)
+    assert evicted_name not in table_names
+    assert df_predict_2.physical_name in table_names
+    assert "__splink__df_concat_with_tf" in cache
+    assert stats["rows"] == 1000 + df_predict_2.as_pandas_dataframe().shape[0]
+
+    # The evicted table is transparently recomputed when it is needed again
+    df_predict_recomputed = linker.predict()
+    assert df_predict_recomputed.physical_name == evicted_name
+    assert linker.cache_statistics()["misses"] == 5
+
+
+def test_cache_budget_does_not_evict_tables_in_use():
+    df = pd.read_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            exact_match("first_name"),
+            exact_match("surname"),
+            exact_match("dob"),
+        ],
+        "blocking_rules_to_generate_predictions": ["l.dob = r.dob"],
+    }
+
+    linker = DuckDBLinker(df, settings)
+    # Smaller than the comparison vectors EM iterates over
+    linker.set_cache_budget(max_rows=2000)
+
+    linker.estimate_parameters_using_expectation_maximisation(
+        "l.first_name = r.first_name"
+    )
+    linker.predict()
+    linker.estimate_parameters_using_expectation_maximisation("l.surname = r.surname")
+    assert linker.cache_statistics()["evictions"] > 0
@@ -1,4 +1,5 @@
 # python3 -m pytest tests/test_cc_random_graphs.py
+import pandas as pd
 import pytest
 
 from tests.cc_testing_utils import (
@@ -8,19 +9,26 @@ from tests.cc_testing_utils import (
     register_cc_df,
     run_cc_implementation,
 )
+from tests.decorator import mark_with_dialects_excluding
+
 
 ###############################################################################
 # Accuracy Testing
 ###############################################################################
 
 
+@pytest.mark.parametrize(
+    "algorithm", ["label_propagation", "large_star_small_star", "union_find"]
+)
 @pytest.mark.parametrize("execution_number", range(20))
-def test_small_erdos_renyi_graph(execution_number):
+def test_small_erdos_renyi_graph(execution_number, algorithm):
     g = generate_random_graph(graph_size=500)
     linker = register_cc_df(g)
 
     assert check_df_equality(
-        run_cc_implementation(linker).sort_values(by=["node_id", "representative"]),
+        run_cc_implementation(linker, algorithm).sort_values(
+            by=["node_id", "representative"]
+        ),
         networkx_solve(g).sort_values(by=["node_id", "representative"]),
     )
 
@@ -47,3 +55,176 @@ def test_large_erdos_renyi_graph(execution_number):
         run_cc_implementation(linker).sort_values(by=["node_id", "representative"]),
         networkx_solve(g).sort_values(by=["node_id", "representative"]),
     )
+
+
+def predict_fake_1000(helper):
+    """A linker for the fake_1000 dataset, and its pairwise predictions"""
+    df = helper.load_frame_from_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("first_name"),
+            helper.cl.exact_match("surname"),
+            helper.cl.exact_match("dob"),
+        ],
+        "blocking_rules_to_generate_predictions": [
+            "l.surname = r.surname",
+            "l.dob = r.dob",
+        ],
+    }
+    linker = helper.Linker(df, settings, **helper.extra_linker_args())
+    return linker, linker.predict()
+
+
+def record_registered_tables(linker):
+    """Record the tables registered by the linker, which clustering should drop
+    once it has used them"""
+    registered = []
+    register_table = linker.register_table
+
+    def record_registered_table(*args, **kwargs):
+        registered.append(register_table(*args, **kwargs))
+        return registered[-1]
+
+    linker.register_table = record_registered_table
+    return registered
+
+
+def assert_dropped(linker, registered):
+    assert len(registered) > 0
+    for df in registered:
+        assert not linker._table_exists_in_database(df.physical_name)
+
+
+@mark_with_dialects_excluding()
+def test_cluster_algorithms_agree(test_helpers, dialect):
+    linker, df_predict = predict_fake_1000(test_helpers[dialect])
+
+    def clusters(algorithm, **kwargs):
+        df_clusters = linker.cluster_pairwise_predictions_at_threshold(
+            df_predict, 0.5, algorithm=algorithm, **kwargs
+        ).as_pandas_dataframe()
+        return df_clusters.sort_values(list(df_clusters.columns)).reset_index(drop=True)
+
+    df_lp = clusters("label_propagation")
+    assert len(df_lp) == 1000
+    assert df_lp["cluster_id"].nunique() < 1000
+    df_lp_pairwise = clusters("label_propagation", pairwise_formatting=True)
+
+    registered = record_registered_tables(linker)
+    for algorithm in ["large_star_small_star", "union_find"]:
+        pd.testing.assert_frame_equal(df_lp, clusters(algorithm), check_dtype=False)
+        pd.testing.assert_frame_equal(
+            df_lp_pairwise,
+            clusters(algorithm, pairwise_formatting=True),
+            check_dtype=False,
+        )
+    assert_dropped(linker, registered)
+
+    with pytest.raises(ValueError):
+        clusters("not_an_algorithm")
+
+
+@mark_with_dialects_excluding()
+def test_cluster_at_multiple_thresholds(test_helpers, dialect):
+    linker, df_predict = predict_fake_1000(test_helpers[dialect])
+
+    thresholds = [0.5, 0.95, 0.9999]
+    registered = record_registered_tables(linker)
+    df_multi = linker.cluster_pairwise_predictions_at_multiple_thresholds(
+        df_predict, thresholds
+    ).as_pandas_dataframe()
+    assert len(df_multi) == 1000
+    assert_dropped(linker, registered)
+    df_multi = df_multi.set_index("unique_id")
+
+    num_clusters = []
+    for threshold, col in zip(
+        thresholds, ["cluster_id_0_5", "cluster_id_0_95", "cluster_id_0_9999"]
+    ):
+        df_single = linker.cluster_pairwise_predictions_at_threshold(
+            df_predict, threshold
+        ).as_pandas_dataframe()
+        expected = df_single.set_index("unique_id")["cluster_id"]
+        actual = df_multi.loc[expected.index, col]
+        assert (actual.astype(str) == expected.astype(str)).all()
+        num_clusters.append(expected.nunique())
+
+    # Higher thresholds split clusters
+    assert num_clusters[0] < num_clusters[1] < num_clusters[2]
+
+    # A repeated threshold gives a single column
+    df_repeated = linker.cluster_pairwise_predictions_at_multiple_thresholds(
+        df_predict, [0.95, 0.95]
+    ).as_pandas_dataframe()
+    cluster_cols = [c for c in df_repeated.columns if c.startswith("cluster_id")]
+    assert cluster_cols == ["cluster_id_0_95"]
+
+
+@mark_with_dialects_excluding()
+def test_cluster_incrementally(test_helpers, dialect):
+    linker, df_predict = predict_fake_1000(test_helpers[dialect])
+    threshold = 0.9
+
+    # Cluster records with unique_id >= 200, then add the predictions involving
+    # the remaining records.  These have lower ids, so may change cluster ids
+    df_predict_old = linker._sql_to_splink_dataframe_checking_cache(
+        f"""
+        select * from {df_predict.physical_name}
+        where unique_id_l >= 200 and unique_id_r >= 200
+        """,
+        "__splink__df_predict_old",
+    )
+    df_predict_new = linker._sql_to_splink_dataframe_checking_cache(
+        f"""
+        select * from {df_predict.physical_name}
+        where unique_id_l < 200 or unique_id_r < 200
+        """,
+        "__splink__df_predict_new",
+    )
+    df_clusters_all = linker.cluster_pairwise_predictions_at_threshold(
+        df_predict_old, threshold
+    )
+    df_clusters_old = linker._sql_to_splink_dataframe_checking_cache(
+        f"select * from {df_clusters_all.physical_name} where unique_id >= 200",
+        "__splink__df_clusters_old",
+    )
+
+    registered = record_registered_tables(linker)
+    df_incremental = linker.cluster_pairwise_predictions_incrementally(
+        df_clusters_old, df_predict_new, threshold
+    ).as_pandas_dataframe()
+    assert_dropped(linker, registered)
+    df_incremental = df_incremental.set_index("unique_id")
+
+    df_expected = linker.cluster_pairwise_predictions_at_threshold(
+        df_predict, threshold
+    ).as_pandas_dataframe()
+    df_expected = df_expected.set_index("unique_id")
+
+    assert df_incremental.index.is_unique
+    old_ids = df_expected.index[df_expected.index >= 200]
+    assert set(old_ids) <= set(df_incremental.index)
+    # New records with no matches are not in the new predictions
+    missing = df_expected.loc[~df_expected.index.isin(df_incremental.index)]
+    assert (missing.index < 200).all()
+    assert (missing["cluster_id"] == missing.index).all()
+
+    expected = df_expected.loc[df_incremental.index, "cluster_id"]
+    assert (df_incremental["cluster_id"] == expected).all()
+
+    # Records new to the clustering have their columns joined from the input
+    assert (df_incremental.index < 200).any()
+    assert (
+        df_incremental["first_name"].fillna("")
+        == df_expected.loc[df_incremental.index, "first_name"].fillna("")
+    ).all()
+
+    # Clusters with no new predictions keep their cluster id
+    df_clusters_old = df_clusters_old.as_pandas_dataframe().set_index("unique_id")
+    changed = (
+        df_incremental.loc[old_ids, "cluster_id"]
+        != df_clusters_old.loc[old_ids, "cluster_id"]
+    )
+    assert 0 < changed.sum() < len(old_ids)
@@ -1,4 +1,6 @@
-from splink.parse_sql import get_columns_used_from_sql
+import sqlglot.expressions as exp
+
+from splink.parse_sql import get_columns_used_from_sql, parse_one_cached
 
 
 def test_get_columns_used():
@@ -67,3 +69,17 @@ def test_get_columns_used():
     assert set(get_columns_used_from_sql(sql)) == set(
         ["lat_lng_arr_uncommon_l", "lat_lng_arr_uncommon_r"]
     )
+
+
+def test_parse_one_cached_returns_independent_copies():
+    sql = "l.first_name = r.first_name"
+    tree = parse_one_cached(sql, "duckdb")
+    for column in tree.find_all(exp.Column):
+        del column.args["table"]
+    assert tree.sql() == "first_name = first_name"
+
+    # Modifying a copy does not affect the memoised tree
+    assert parse_one_cached(sql, "duckdb").sql() == sql
+    assert parse_one_cached(sql, "duckdb", copy=False) is parse_one_cached(
+        sql, "duckdb", copy=False
+    )
@@ -1,8 +1,12 @@
+from copy import deepcopy
+
 import pandas as pd
 import pytest
 
 import splink.duckdb.comparison_library as cl
+from splink.constants import LEVEL_NOT_OBSERVED_TEXT
 from splink.duckdb.linker import DuckDBLinker
+from splink.em_training_session import EMTrainingSession
 from splink.exceptions import EMTrainingException
 
 
@@ -96,3 +100,148 @@ def test_estimate_without_term_frequencies():
 
     for r in compare.to_dict(orient="records"):
         assert r["m_probability_e"] == pytest.approx(r["m_probability_a"])
+
+
+def test_sampled_em_training():
+    df = pd.read_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            cl.exact_match("first_name"),
+            cl.exact_match("surname"),
+            cl.exact_match("email"),
+        ],
+    }
+
+    br = "l.dob = r.dob"
+
+    def train(max_pairs):
+        linker = DuckDBLinker(df, settings)
+        session = linker.estimate_parameters_using_expectation_maximisation(
+            br, max_pairs=max_pairs, seed=42
+        )
+        return linker, session
+
+    linker, session_sampled = train(1000)
+    num_pairs = linker.count_num_comparisons_from_blocking_rule(br)
+    assert num_pairs > 1000
+
+    cvv = session_sampled._comparison_vectors().as_pandas_dataframe()
+    assert 0 < len(cvv) < num_pairs
+
+    # Seeded samples are reproducible
+    _, session_repeat = train(1000)
+    sampled_history = pd.DataFrame(session_sampled._iteration_history_records)
+    repeat_history = pd.DataFrame(session_repeat._iteration_history_records)
+    pd.testing.assert_series_equal(
+        sampled_history["m_probability"], repeat_history["m_probability"]
+    )
+
+    # If max_pairs exceeds the number of blocked pairs, no sampling takes place
+    _, session_full = train(num_pairs + 1)
+    cvv = session_full._comparison_vectors().as_pandas_dataframe()
+    assert len(cvv) == num_pairs
+
+    records = session_sampled.m_probability_confidence_interval_records()
+    assert len(records) == 6
+    for r in records:
+        assert r["m_probability_lower"] <= r["m_probability"]
+        assert r["m_probability"] <= r["m_probability_upper"]
+
+    # The full data gives tighter intervals than the sample
+    full_records = session_full.m_probability_confidence_interval_records()
+    for r_sample, r_full in zip(records, full_records):
+        assert r_full["expected_match_count"] > r_sample["expected_match_count"]
+
+
+def test_iteration_history_reconstructed_from_parameter_arrays():
+    df = pd.read_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            cl.exact_match("first_name"),
+            cl.levenshtein_at_thresholds("surname", 2),
+            cl.exact_match("email"),
+        ],
+    }
+
+    linker = DuckDBLinker(df, settings)
+    session = linker.estimate_parameters_using_expectation_maximisation("l.dob = r.dob")
+
+    num_iterations = len(session._lambda_history)
+    assert num_iterations > 1
+    assert len(session._m_history) == len(session._u_history) == num_iterations
+
+    history = pd.DataFrame(session._iteration_history_records)
+    history = history[
+        (history["comparison_name"] != "probability_two_random_records_match")
+        & ~history["is_null_level"]
+    ]
+    assert len(history) == num_iterations * len(session._comparison_levels_to_train)
+
+    # The final iteration of the history matches the trained parameters
+    final = history[history["iteration"] == num_iterations - 1]
+    for cl_trained, r in zip(
+        session._comparison_levels_to_train, final.to_dict(orient="records")
+    ):
+        assert r["comparison_vector_value"] == cl_trained._comparison_vector_value
+        assert r["m_probability"] == pytest.approx(cl_trained.m_probability)
+        assert r["u_probability"] == pytest.approx(cl_trained.u_probability)
+
+    lambda_history = pd.DataFrame(session._lambda_history_records)
+    assert len(lambda_history) == num_iterations
+
+    session.match_weights_interactive_history_chart()
+    session.m_u_values_interactive_history_chart()
+    session.probability_two_random_records_match_iteration_chart()
+
+
+def test_iteration_history_keeps_untrained_levels(monkeypatch):
+    df = pd.read_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    never_observed = {
+        "output_column_name": "city",
+        "comparison_levels": [
+            {
+                "sql_condition": "city_l IS NULL OR city_r IS NULL",
+                "is_null_level": True,
+            },
+            {"sql_condition": "1 = 0", "label_for_charts": "Never observed"},
+            {"sql_condition": "city_l = city_r", "label_for_charts": "Exact match"},
+            {"sql_condition": "ELSE", "label_for_charts": "All other comparisons"},
+        ],
+    }
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [cl.exact_match("first_name"), never_observed],
+    }
+
+    # Record the parameters at each iteration as the settings themselves
+    snapshots = []
+    add_iteration = EMTrainingSession._add_iteration
+
+    def add_iteration_and_snapshot(session):
+        add_iteration(session)
+        snapshots.append(
+            deepcopy(session._settings_obj)._parameters_as_detailed_records
+        )
+
+    monkeypatch.setattr(EMTrainingSession, "_add_iteration", add_iteration_and_snapshot)
+
+    linker = DuckDBLinker(df, settings)
+    session = linker.estimate_parameters_using_expectation_maximisation(
+        "l.surname = r.surname"
+    )
+    level = session._settings_obj.comparisons[1].comparison_levels[1]
+    assert level._m_probability == LEVEL_NOT_OBSERVED_TEXT
+
+    history = session._iteration_history_records
+    expected = [r for snapshot in snapshots for r in snapshot]
+    assert len(history) == len(expected)
+    for r, r_expected in zip(history, expected):
+        # Each record is labelled with the final lambda, not that of its iteration
+        r_expected.pop("probability_two_random_records_match", None)
+        for key, value in r_expected.items():
+            assert r[key] == pytest.approx(value), key
@@ -1,5 +1,6 @@
 import os
 
+import duckdb
 import pandas as pd
 import pyarrow as pa
 import pyarrow.csv as pa_csv
@@ -303,3 +304,94 @@ def test_small_example_duckdb(tmp_path):
     linker.estimate_parameters_using_expectation_maximisation(blocking_rule)
 
     linker.predict()
+
+
+@mark_with_dialects_including("duckdb")
+def test_duckdb_resource_config(tmp_path):
+    df = pd.read_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+    settings = {"link_type": "dedupe_only"}
+
+    def setting(linker, name):
+        sql = f"select current_setting('{name}')"
+        return linker._con.execute(sql).fetchone()[0]
+
+    # Quotes in string values are escaped
+    temp_directory = str(tmp_path / "splink's temp")
+    linker = DuckDBLinker(
+        df,
+        settings,
+        resource_config={
+            "threads": 2,
+            "memory_limit": "1GB",
+            "temp_directory": temp_directory,
+        },
+    )
+    assert setting(linker, "threads") == 2
+    assert setting(linker, "temp_directory") == temp_directory
+    # DuckDB reports the memory limit in its own units
+    con = duckdb.connect()
+    con.execute("SET memory_limit = '1GB'")
+    expected_memory_limit = con.execute(
+        "select current_setting('memory_limit')"
+    ).fetchone()[0]
+    assert setting(linker, "memory_limit") == expected_memory_limit
+    assert not setting(linker, "preserve_insertion_order")
+
+    linker = DuckDBLinker(df, settings, resource_config="auto")
+    assert setting(linker, "threads") >= 1
+
+    # Connections created by the user are left unchanged unless configured
+    con = duckdb.connect()
+    DuckDBLinker(df, settings, connection=con)
+    assert con.execute("select current_setting('preserve_insertion_order')").fetchone()[
+        0
+    ]
+
+    with pytest.raises(ValueError):
+        DuckDBLinker(df, settings, resource_config={"thread": 2})
+
+
+@mark_with_dialects_including("duckdb")
+def test_sharded_predict(tmp_path):
+    df = pd.read_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            cl.exact_match("first_name", term_frequency_adjustments=True),
+            cl.levenshtein_at_thresholds("surname", 2),
+            cl.exact_match("dob"),
+        ],
+        "blocking_rules_to_generate_predictions": [
+            "l.first_name = r.first_name and l.surname = r.surname",
+            "l.dob = r.dob",
+            # Cannot be sharded, so is run over all records
+            "l.first_name = r.surname",
+        ],
+    }
+
+    def sorted_predictions(linker):
+        df_predict = linker.predict(threshold_match_probability=0.01)
+        df_predict = df_predict.as_pandas_dataframe()
+        df_predict = df_predict.sort_values(["unique_id_l", "unique_id_r"])
+        return df_predict.reset_index(drop=True)
+
+    expected = sorted_predictions(DuckDBLinker(df, settings))
+
+    linker = DuckDBLinker(df, settings)
+    linker.enable_sharded_predict(
+        num_shards=4,
+        max_workers=2,
+        output_directory=str(tmp_path),
+        resource_config={"threads": 1},
+    )
+    actual = sorted_predictions(linker)
+    pd.testing.assert_frame_equal(actual, expected)
+
+    # Predictions are a view over the parquet files written by each shard
+    run_directories = list(tmp_path.iterdir())
+    assert len(run_directories) == 1
+    assert len(list(run_directories[0].glob("*.parquet"))) == 4 + 4 + 1
+
+    df_predict = linker.predict()
+    df_predict.drop_table_from_database_and_remove_from_cache()
+    assert not linker._table_exists_in_database(df_predict.physical_name)
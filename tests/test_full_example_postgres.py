@@ -131,3 +131,47 @@ def test_error_no_connection():
     # get an error as we don't pass a connection
     with pytest.raises(ValueError):
         PostgresLinker(df)
+
+
+@mark_with_dialects_including("postgres")
+def test_postgres_bulk_loading_and_unlogged_tables(pg_engine):
+    df = pd.read_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+    settings_dict = get_settings_dict()
+
+    linker = PostgresLinker(df, settings_dict, engine=pg_engine)
+
+    # Rows loaded using COPY match the input, including nulls
+    loaded = linker.register_table(df, "__splink__test_copy", overwrite=True)
+    loaded = loaded.as_pandas_dataframe().sort_values("unique_id")
+    pd.testing.assert_frame_equal(loaded.reset_index(drop=True), df, check_dtype=False)
+
+    df_predict = linker.predict()
+
+    def query(sql):
+        return linker._run_sql_execution(sql).mappings().all()
+
+    # Tables created by Splink are unlogged
+    sql = f"""
+    SELECT relpersistence FROM pg_class
+    WHERE relname = '{df_predict.physical_name}'
+    """
+    assert query(sql)[0]["relpersistence"] == "u"
+
+    # The join keys of blocking rules are indexed once concat_with_tf is created
+    concat_with_tf = linker._intermediate_table_cache["__splink__df_concat_with_tf"]
+    sql = f"""
+    SELECT indexname FROM pg_indexes
+    WHERE tablename = '{concat_with_tf.physical_name}'
+    """
+    assert len(query(sql)) == 1
+
+    # A literal \N string is kept intact rather than read as null
+    df_strings = pd.DataFrame({"id": [1, 2, 3], "value": ["a", "\\N", None]})
+    loaded = linker.register_table(df_strings, "__splink__test_copy", overwrite=True)
+    loaded = loaded.as_pandas_dataframe().sort_values("id")
+    assert loaded["value"].tolist() == ["a", "\\N", None]
+
+    # Lists cannot be loaded into a text column, so are rejected
+    df_lists = pd.DataFrame({"id": [1, 2], "value": [["a", "b"], ["c"]]})
+    with pytest.raises(ValueError, match="contains lists"):
+        linker.register_table(df_lists, "__splink__test_copy", overwrite=True)
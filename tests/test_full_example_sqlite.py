@@ -87,3 +87,20 @@ def test_default_conn_sqlite(tmp_path):
     linker = SQLiteLinker(df, settings_dict)
 
     linker.predict()
+
+
+def test_sqlite_performance_profile(tmp_path):
+    df = pd.read_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+    settings_dict = get_settings_dict()
+
+    def predictions(linker):
+        df_predict = linker.predict().as_pandas_dataframe()
+        df_predict = df_predict.sort_values(["unique_id_l", "unique_id_r"])
+        return df_predict.reset_index(drop=True)
+
+    expected = predictions(SQLiteLinker(df, settings_dict))
+
+    connection = os.path.join(tmp_path, "splink.db")
+    linker = SQLiteLinker(df, settings_dict, connection, pragmas="performance")
+    assert linker.con.execute("PRAGMA synchronous").fetchone()["synchronous"] == 0
+    pd.testing.assert_frame_equal(predictions(linker), expected)
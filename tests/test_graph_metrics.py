@@ -1,6 +1,9 @@
 from unittest.mock import patch
 
+import networkx as nx
+import numpy as np
 import pandas as pd
+import pytest
 from pandas.testing import assert_frame_equal
 from pytest import approx, raises
 
@@ -8,6 +11,7 @@ from splink.duckdb.duckdb_comparison_library import (
     exact_match,
 )
 from splink.duckdb.linker import DuckDBLinker
+from splink.native_graph_metrics import _bridges
 
 from .decorator import mark_with_dialects_excluding
 
@@ -397,7 +401,8 @@ def test_edges_without_igraph():
     df_edge_metrics = graph_metrics.edges.as_pandas_dataframe()
     assert "composite_unique_id_l" in df_edge_metrics.columns
     assert "composite_unique_id_r" in df_edge_metrics.columns
-    assert "is_bridge" not in df_edge_metrics.columns
+    # is_bridge is computed natively, without igraph
+    assert "is_bridge" in df_edge_metrics.columns
 
 
 def test_no_threshold_provided():
@@ -484,3 +489,26 @@ def test_override_metadata_threshold():
         df_expected_9,
         check_index_type=False,
     )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bridges_match_networkx(seed):
+    rng = np.random.default_rng(seed)
+    num_nodes = 300
+    # A sparse random graph, plus a long chain, a self loop and a repeated edge
+    nodes_l = np.concatenate([rng.integers(0, 200, 250), np.arange(200, 299), [5, 200]])
+    nodes_r = np.concatenate([rng.integers(0, 200, 250), np.arange(201, 300), [5, 201]])
+
+    is_bridge = _bridges(nodes_l, nodes_r, num_nodes)
+
+    G = nx.Graph()
+    G.add_nodes_from(range(num_nodes))
+    G.add_edges_from(zip(nodes_l, nodes_r))
+    # networkx finds bridges of the simple graph, in which repeated edges are
+    # merged.  Repeated edges are never bridges
+    edges = pd.Series([frozenset(e) for e in zip(nodes_l, nodes_r)])
+    repeated = set(edges[edges.duplicated()])
+    expected = {frozenset(e) for e in nx.bridges(G)} - repeated
+
+    assert set(edges[is_bridge]) == expected
+    assert frozenset([200, 201]) in repeated
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+import pytest
+
+# Modules that are slow to import, and are only needed for charts, dashboards and
+# settings validation, so should not be imported by `import splink`
+LAZILY_IMPORTED_MODULES = ["altair", "jinja2", "jsonschema"]
+
+
+@pytest.mark.parametrize(
+    "module", ["splink.duckdb.linker", "splink.sqlite.linker", "splink.linker"]
+)
+def test_slow_modules_are_imported_lazily(module):
+    code = f"""
+import sys
+import {module}
+print(",".join(m for m in {LAZILY_IMPORTED_MODULES} if m in sys.modules))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
@@ -0,0 +1,62 @@
+import os
+
+import pandas as pd
+import pytest
+
+from splink.sqlite.linker import SQLiteLinker
+
+from .decorator import mark_with_dialects_excluding, mark_with_dialects_including
+
+
+@mark_with_dialects_excluding("sqlite")
+def test_persistent_cache(test_helpers, dialect, tmp_path, caplog):
+    helper = test_helpers[dialect]
+    df = helper.load_frame_from_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+    cache_dir = str(tmp_path / "cache")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("first_name", term_frequency_adjustments=True),
+            helper.cl.exact_match("surname"),
+            helper.cl.exact_match("dob"),
+        ],
+        "blocking_rules_to_generate_predictions": ["l.dob = r.dob"],
+    }
+
+    def predictions(max_bytes=None):
+        linker = helper.Linker(df, settings, **helper.extra_linker_args())
+        linker.use_persistent_cache(cache_dir, max_bytes=max_bytes)
+        caplog.clear()
+        with caplog.at_level("DEBUG", logger="splink.persistent_cache"):
+            df_predict = linker.predict().as_pandas_dataframe()
+        df_predict = df_predict.sort_values(["unique_id_l", "unique_id_r"])
+        return df_predict.reset_index(drop=True)
+
+    def loaded_from_cache():
+        return [r.message for r in caplog.records if r.message.startswith("Loaded")]
+
+    # Computed and saved by the first linker, loaded by the second
+    expected = predictions()
+    assert loaded_from_cache() == []
+    assert len(os.listdir(cache_dir)) > 0
+
+    actual = predictions()
+    assert len(loaded_from_cache()) > 0
+    pd.testing.assert_frame_equal(actual, expected)
+
+    # The least recently used tables are evicted to stay within the budget
+    sizes = [os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir)]
+    max_bytes = max(sizes)
+    predictions(max_bytes=max_bytes)
+    sizes = [os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir)]
+    assert 0 < sum(sizes) <= max_bytes
+
+
+@mark_with_dialects_including("sqlite")
+def test_persistent_cache_unsupported_dialect(tmp_path):
+    linker = SQLiteLinker(
+        pd.DataFrame({"unique_id": [1, 2]}), {"link_type": "dedupe_only"}
+    )
+    with pytest.raises(ValueError):
+        linker.use_persistent_cache(str(tmp_path))
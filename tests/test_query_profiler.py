@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from .decorator import mark_with_dialects_excluding, mark_with_dialects_including
+
+
+@mark_with_dialects_excluding()
+def test_query_profile_report(test_helpers, dialect):
+    helper = test_helpers[dialect]
+    df = helper.load_frame_from_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("first_name", term_frequency_adjustments=True),
+            helper.cl.exact_match("surname"),
+        ],
+        "blocking_rules_to_generate_predictions": ["l.dob = r.dob"],
+    }
+    linker = helper.Linker(df, settings, **helper.extra_linker_args())
+
+    with pytest.raises(ValueError):
+        linker.query_profile_report()
+
+    linker.enable_query_profiling(explain_plans=True)
+    df_predict = linker.predict()
+
+    report = linker.query_profile_report()
+    assert list(report["templated_name"])[-1] == "__splink__df_predict"
+    assert (report["wall_time_seconds"] >= 0).all()
+    assert report["plan"].str.len().min() > 0
+
+    predict = report.iloc[-1]
+    assert predict["row_count"] == len(df_predict.as_pandas_dataframe())
+    assert "__splink__df_blocked" in predict["pipeline_steps"]
+
+    records = json.loads(linker.query_profile_report("json"))
+    assert [r["templated_name"] for r in records] == list(report["templated_name"])
+
+
+@mark_with_dialects_including("spark")
+def test_spark_explain_sql(df_spark):
+    from splink.spark.linker import SparkLinker
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [],
+        "blocking_rules_to_generate_predictions": ["l.dob = r.dob"],
+    }
+    linker = SparkLinker(df_spark, settings)
+    assert linker._infinity_expression == "'infinity'"
+
+    input_table = list(linker._input_tables_dict.values())[0]
+    plan = linker._explain_sql(f"select count(*) as n from {input_table.physical_name}")
+    assert isinstance(plan, str) and len(plan) > 0
+
+    linker.enable_query_profiling(explain_plans=True)
+    linker.predict()
+    report = linker.query_profile_report()
+    assert report["plan"].str.len().min() > 0
@@ -0,0 +1,190 @@
+import threading
+
+import pandas as pd
+
+from splink.duckdb.linker import DuckDBLinker
+from splink.materialisation_planner import MaterialisationPlanner
+from splink.pipeline import SQLPipeline
+from splink.query_profiler import _pipeline_steps
+from splink.splink_dataframe import SplinkDataFrame
+
+from .decorator import mark_with_dialects_excluding
+
+
+def test_pipeline_steps_materialise_reused_tables():
+    pipeline = SQLPipeline()
+    pipeline.enqueue_sql("select * from input_table", "a")
+    pipeline.enqueue_sql("select x from a", "b")
+    pipeline.enqueue_sql("select y from a", "c")
+    pipeline.enqueue_sql("select * from b union all select * from c", "d")
+    pipeline.enqueue_sql("select * from d as l inner join d as r on l.x = r.x", "e")
+    pipeline.enqueue_sql("select * from e", "f")
+
+    steps = pipeline._generate_pipeline_steps([])
+
+    # a is read by two tasks and d twice by one task, so both are materialised,
+    # along with the output
+    assert [s.output_table_name for s in steps] == ["a", "d", "f"]
+    assert [[t.output_table_name for t in s.tasks] for s in steps] == [
+        ["a"],
+        ["b", "c", "d"],
+        ["e", "f"],
+    ]
+    assert [s.input_table_names for s in steps] == [[], ["a"], ["d"]]
+    assert [s.level for s in steps] == [0, 1, 2]
+
+
+def test_pipeline_steps_independent_branches():
+    pipeline = SQLPipeline()
+    pipeline.enqueue_sql("select * from input_table", "a")
+    pipeline.enqueue_sql("select * from a as l join a as r on l.x = r.x", "b")
+    pipeline.enqueue_sql("select * from input_table", "c")
+    pipeline.enqueue_sql("select * from c as l join c as r on l.x = r.x", "d")
+    pipeline.enqueue_sql("select * from b union all select * from d", "e")
+
+    steps = pipeline._generate_pipeline_steps([])
+
+    # a and c do not depend on each other, so can be computed concurrently
+    levels = {s.output_table_name: s.level for s in steps}
+    assert levels == {"a": 0, "c": 0, "e": 1}
+
+    e = steps[-1]
+    assert [t.output_table_name for t in e.tasks] == ["b", "d", "e"]
+    assert e.input_table_names == ["a", "c"]
+
+
+def test_pipeline_inline_input_ctes():
+    input_df = SplinkDataFrame("input_table", "input_table_abc123", linker=None)
+
+    def pipeline_sql(inline_input_ctes):
+        pipeline = SQLPipeline()
+        pipeline.enqueue_sql(
+            "select * from input_table as l join input_table as r on l.x = r.x", "a"
+        )
+        pipeline.enqueue_sql("select * from a", "b")
+        return pipeline._generate_pipeline([input_df], inline_input_ctes)
+
+    sql = pipeline_sql(inline_input_ctes=False)
+    assert "NOT MATERIALIZED" not in sql
+
+    # Only the CTE reading the input table is inlined
+    sql = pipeline_sql(inline_input_ctes=True)
+    assert sql.count("NOT MATERIALIZED") == 1
+    assert "input_table as NOT MATERIALIZED (select * from input_table_abc123)" in sql
+    assert _pipeline_steps(sql, "postgres") == ["a", "input_table"]
+
+
+@mark_with_dialects_excluding()
+def test_dag_execution_mode(test_helpers, dialect):
+    helper = test_helpers[dialect]
+    df = helper.load_frame_from_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("first_name", term_frequency_adjustments=True),
+            helper.cl.exact_match("surname", term_frequency_adjustments=True),
+            helper.cl.exact_match("dob"),
+        ],
+        "blocking_rules_to_generate_predictions": ["l.dob = r.dob"],
+    }
+
+    def predictions(dag_execution_mode):
+        linker = helper.Linker(df, settings, **helper.extra_linker_args())
+        linker.dag_execution_mode = dag_execution_mode
+        df_predict = linker.predict()
+        df_predict = df_predict.as_pandas_dataframe()
+        df_predict = df_predict.sort_values(["unique_id_l", "unique_id_r"])
+        return linker, df_predict.reset_index(drop=True)
+
+    _, expected = predictions(False)
+    linker, actual = predictions(True)
+    pd.testing.assert_frame_equal(actual, expected)
+
+    # Tables materialised only because they were reused are dropped once the
+    # pipeline has run
+    cache = linker._intermediate_table_cache
+    templated_names = {df.templated_name for df in cache.data.values()}
+    assert "__splink__df_concat" not in templated_names
+    assert "__splink__df_concat_with_tf" in templated_names
+
+
+def test_materialisation_planner():
+    linker = DuckDBLinker(
+        pd.DataFrame({"unique_id": range(10)}), {"link_type": "dedupe_only"}
+    )
+    planner = MaterialisationPlanner(linker, materialisation_overhead_rows=10_000)
+    input_table = linker.register_table(
+        pd.DataFrame({"x": range(100_000)}), "input_table"
+    )
+    linker.register_table(pd.DataFrame({"x": range(10)}), "small_table")
+
+    pipeline = SQLPipeline()
+    # Expensive to compute, so worth materialising
+    pipeline.enqueue_sql("select count(*) as n from input_table", "counts")
+    # Cheap to compute, so not worth materialising
+    pipeline.enqueue_sql("select * from small_table", "small")
+    pipeline.enqueue_sql(
+        "select * from counts, small union all select * from counts, small", "e"
+    )
+
+    steps = pipeline._generate_pipeline_steps([input_table], planner)
+    assert [s.output_table_name for s in steps] == ["counts", "e"]
+
+    # Without the planner, every table read more than once is materialised
+    steps = pipeline._generate_pipeline_steps([input_table])
+    assert [s.output_table_name for s in steps] == ["counts", "small", "e"]
+
+    # Row counts of materialised outputs are recorded for later pipelines
+    linker._enqueue_sql("select count(*) as n from input_table", "counts")
+    planner.record_output(linker._execute_sql_pipeline())
+    assert planner.observed_row_counts == {"counts": 1}
+
+    # Now that its output is known to be small, it is still materialised
+    steps = pipeline._generate_pipeline_steps([input_table], planner)
+    assert [s.output_table_name for s in steps] == ["counts", "e"]
+
+
+def test_concurrent_steps_share_bookkeeping():
+    class ConcurrentDuckDBLinker(DuckDBLinker):
+        _supports_concurrent_sql_execution = True
+
+    linker = ConcurrentDuckDBLinker(
+        pd.DataFrame({"unique_id": range(10)}), {"link_type": "dedupe_only"}
+    )
+    linker.dag_execution_mode = True
+    linker.enable_query_profiling()
+    input_table = linker.register_table(pd.DataFrame({"x": range(10)}), "input_table")
+
+    # Both independent steps must be executing at once to pass the barrier, so
+    # execution is not serialised by the bookkeeping lock.  The connection itself
+    # is not shared between threads
+    barrier = threading.Barrier(2, timeout=10)
+    connection_lock = threading.Lock()
+    execute = linker._execute_sql_against_backend
+    count_rows = linker._table_size
+
+    def execute_concurrently(sql, templated_name, physical_name):
+        if templated_name in ("a", "c"):
+            barrier.wait()
+        with connection_lock:
+            return execute(sql, templated_name, physical_name)
+
+    def table_size(physical_name):
+        with connection_lock:
+            return count_rows(physical_name)
+
+    linker._execute_sql_against_backend = execute_concurrently
+    linker._table_size = table_size
+
+    linker._enqueue_sql("select * from input_table", "a")
+    linker._enqueue_sql("select * from a as l join a as r on l.x = r.x", "b")
+    linker._enqueue_sql("select * from input_table where x > 1", "c")
+    linker._enqueue_sql("select * from c as l join c as r on l.x = r.x", "d")
+    linker._enqueue_sql("select * from b union all select * from d", "e")
+    output = linker._execute_sql_pipeline([input_table])
+
+    assert len(output.as_pandas_dataframe()) == 18
+    assert linker.cache_statistics()["misses"] == 3
+    profiled = {r["templated_name"] for r in linker.query_profile_report("records")}
+    assert profiled == {"a", "c", "e"}
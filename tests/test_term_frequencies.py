@@ -2,6 +2,7 @@ import pandas as pd
 import pytest
 
 from splink.duckdb.linker import DuckDBLinker
+from tests.decorator import mark_with_dialects_excluding
 
 
 def get_data():
@@ -216,3 +217,229 @@ def test_weightand_clamp():
     # Adjustment would be 10/5.0 = 2 if no weighting was applied
 
     assert pytest.approx(bf) == bf_no_adj * 2**0.5
+
+
+@mark_with_dialects_excluding()
+def test_tf_tables_for_multiple_columns(test_helpers, dialect):
+    helper = test_helpers[dialect]
+    data = get_data()
+    data["city"] = data["city"].where(data["unique_id"] % 10 != 0, None)
+    data["age"] = data["unique_id"] % 5
+    df = helper.convert_frame(data)
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("city", term_frequency_adjustments=True),
+            helper.cl.exact_match("age", term_frequency_adjustments=True),
+        ],
+    }
+    linker = helper.Linker(df, settings, **helper.extra_linker_args())
+
+    concat_with_tf = linker._initialise_df_concat_with_tf().as_pandas_dataframe()
+    assert "__splink__df_all_tfs" not in linker._intermediate_table_cache
+
+    non_null_city = data["city"].notnull()
+    expected_city = data.loc[non_null_city, "city"].value_counts(normalize=True)
+    for r in concat_with_tf.to_dict(orient="records"):
+        if r["city"] is None:
+            assert pd.isnull(r["tf_city"])
+        else:
+            assert r["tf_city"] == pytest.approx(expected_city[r["city"]])
+        assert r["tf_age"] == pytest.approx(0.2)
+
+    tf_city = linker.compute_tf_table("city").as_pandas_dataframe()
+    tf_city = tf_city.dropna().set_index("city")["tf_city"]
+    assert len(tf_city) == 3
+    for city, tf in expected_city.items():
+        assert tf_city[city] == pytest.approx(tf)
+
+
+@mark_with_dialects_excluding()
+def test_term_frequency_store(test_helpers, dialect, tmp_path, caplog):
+    helper = test_helpers[dialect]
+    data = get_data()
+    data["age"] = data["unique_id"] % 5
+    store = str(tmp_path / "tf_store")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("city", term_frequency_adjustments=True),
+            helper.cl.exact_match("age", term_frequency_adjustments=True),
+        ],
+    }
+
+    def tf_lookup(df, col):
+        linker = helper.Linker(
+            helper.convert_frame(df), settings, **helper.extra_linker_args()
+        )
+        caplog.clear()
+        with caplog.at_level("INFO", logger="splink.term_frequency_store"):
+            linker.use_term_frequency_store(store)
+        tf = linker.compute_tf_table(col).as_pandas_dataframe()
+        return tf.set_index(col)[f"tf_{col}"].to_dict()
+
+    def loaded_from_store():
+        return [r.message for r in caplog.records if r.message.startswith("Loaded")]
+
+    expected_city = {"London": 0.8, "Birmingham": 0.16, "Truro": 0.04}
+
+    # Computed and saved by the first linker, loaded by the second
+    assert tf_lookup(data, "city") == pytest.approx(expected_city)
+    assert loaded_from_store() == []
+    assert tf_lookup(data, "city") == pytest.approx(expected_city)
+    assert len(loaded_from_store()) == 2
+
+    # Changed input data does not match the fingerprint, so is recomputed
+    changed = data.copy()
+    changed.loc[0:9, "city"] = None
+    tf_city = tf_lookup(changed, "city")
+    assert tf_city["London"] == pytest.approx(0.75)
+    assert loaded_from_store() == ["Loaded term frequencies for age from store"]
+
+    # As is a change of values that leaves the non-null count unchanged
+    changed = data.copy()
+    changed.loc[changed["city"] == "Truro", "city"] = "Ely"
+    assert "Ely" in tf_lookup(changed, "city")
+    assert loaded_from_store() == ["Loaded term frequencies for age from store"]
+
+    # Appended records are merged into the stored counts
+    tf_lookup(data.head(30), "city")
+    linker = helper.Linker(
+        helper.convert_frame(data), settings, **helper.extra_linker_args()
+    )
+    registered = []
+    register_table = linker.register_table
+
+    def record_registered_table(*args, **kwargs):
+        registered.append(register_table(*args, **kwargs))
+        return registered[-1]
+
+    linker.register_table = record_registered_table
+    linker.update_term_frequency_store(store, data.tail(20))
+    # The appended records are dropped once they have been counted
+    assert len(registered) == 1
+    assert not linker._table_exists_in_database(registered[0].physical_name)
+    assert tf_lookup(data, "city") == pytest.approx(expected_city)
+    assert len(loaded_from_store()) == 2
+    assert tf_lookup(data, "age") == pytest.approx({i: 0.2 for i in range(5)})
+
+
+@mark_with_dialects_excluding()
+def test_approximate_term_frequencies(test_helpers, dialect, tmp_path):
+    helper = test_helpers[dialect]
+    data = get_data()
+    data = pd.concat([data, pd.DataFrame([{"unique_id": 50, "city": "Ely"}])])
+    data["age"] = data["unique_id"] % 5
+    n = len(data)
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("city", term_frequency_adjustments=True),
+            helper.cl.exact_match("age", term_frequency_adjustments=True),
+        ],
+        "blocking_rules_to_generate_predictions": ["l.city = r.city"],
+    }
+    # Truro and Ely are assigned the mean of their term frequencies
+    expected_city = {
+        "London": 40 / n,
+        "Birmingham": 8 / n,
+        "Truro": 1.5 / n,
+        "Ely": 1.5 / n,
+    }
+
+    def get_linker():
+        linker = helper.Linker(
+            helper.convert_frame(data), settings, **helper.extra_linker_args()
+        )
+        linker.use_approximate_term_frequencies("city", min_count=5)
+        return linker
+
+    def tf_lookup(linker):
+        concat_with_tf = linker._initialise_df_concat_with_tf()
+        records = concat_with_tf.as_pandas_dataframe()
+        return records.groupby("city")["tf_city"].first().to_dict()
+
+    linker = get_linker()
+    tf_table = linker.compute_tf_table("city").as_pandas_dataframe()
+    assert sorted(tf_table.dropna(subset=["tf_city"])["city"]) == [
+        "Birmingham",
+        "London",
+    ]
+    # The floor is held on a single row for one of the dropped values
+    assert len(tf_table) == 3
+    assert tf_lookup(linker) == pytest.approx(expected_city)
+    linker.predict()
+
+    # Computed in a single scan with the other tf columns
+    assert tf_lookup(get_linker()) == pytest.approx(expected_city)
+
+    # Loaded from a term frequency store
+    store = str(tmp_path / "tf_store")
+    get_linker().use_term_frequency_store(store)
+    linker = get_linker()
+    linker.use_term_frequency_store(store)
+    assert tf_lookup(linker) == pytest.approx(expected_city)
+
+    # The floor is kept when every value occurs fewer than min_count times
+    def tf_age(store=None):
+        linker = helper.Linker(
+            helper.convert_frame(data), settings, **helper.extra_linker_args()
+        )
+        linker.use_approximate_term_frequencies("age", min_count=100)
+        if store:
+            linker.use_term_frequency_store(store)
+        records = linker._initialise_df_concat_with_tf().as_pandas_dataframe()
+        return records["tf_age"].tolist()
+
+    assert tf_age() == pytest.approx([0.2] * n)
+    store = str(tmp_path / "tf_store_age")
+    tf_age(store)
+    assert tf_age(store) == pytest.approx([0.2] * n)
+
+
+@mark_with_dialects_excluding()
+def test_approximate_term_frequencies_for_new_records(test_helpers, dialect):
+    helper = test_helpers[dialect]
+    df = helper.load_frame_from_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("first_name", term_frequency_adjustments=True),
+            helper.cl.exact_match("surname"),
+        ],
+        "blocking_rules_to_generate_predictions": ["l.surname = r.surname"],
+        "retain_intermediate_calculation_columns": True,
+    }
+    linker = helper.Linker(df, settings, **helper.extra_linker_args())
+    linker.use_approximate_term_frequencies("first_name", min_count=5)
+    df_concat_with_tf = linker._initialise_df_concat_with_tf().as_pandas_dataframe()
+    linker.predict()
+
+    tf_first_name = dict(
+        zip(df_concat_with_tf["first_name"], df_concat_with_tf["tf_first_name"])
+    )
+    floor = min(tf_first_name.values())
+    rare = next(name for name, tf in tf_first_name.items() if tf == floor)
+
+    # Values in the input data keep their term frequency, and values that are not
+    # are assigned the floor
+    record = {"unique_id": 10_000, "first_name": rare, "surname": "Smith"}
+    unseen = {"unique_id": 10_001, "first_name": "Zzyzx", "surname": "Smith"}
+    matches = linker.find_matches_to_new_records(
+        [record, unseen], blocking_rules=["l.surname = r.surname"]
+    ).as_pandas_dataframe()
+    assert len(matches) > 0
+    for uid in [10_000, 10_001]:
+        tfs = matches.loc[matches["unique_id_r"] == uid, "tf_first_name_r"]
+        assert tfs.tolist() == pytest.approx([floor] * len(tfs))
+
+    # The tf table is derived from concat_with_tf, so must derive the floor too
+    tf_table = linker.compute_tf_table("first_name").as_pandas_dataframe()
+    assert tf_table["__splink__tf_floor"].dropna().unique() == pytest.approx([floor])
+    comparison = linker.compare_two_records(record, unseen).as_pandas_dataframe()
+    assert comparison["tf_first_name_l"].tolist() == pytest.approx([floor])
+    assert comparison["tf_first_name_r"].tolist() == pytest.approx([floor])
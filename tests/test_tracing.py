@@ -0,0 +1,67 @@
+import json
+from contextlib import contextmanager
+
+from splink.tracing import JsonLinesSpanExporter
+
+from .decorator import mark_with_dialects_excluding
+
+
+@mark_with_dialects_excluding()
+def test_tracing_spans(test_helpers, dialect, tmp_path):
+    helper = test_helpers[dialect]
+    df = helper.load_frame_from_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("first_name"),
+            helper.cl.exact_match("surname"),
+        ],
+        "blocking_rules_to_generate_predictions": ["l.dob = r.dob"],
+        "max_iterations": 2,
+    }
+    linker = helper.Linker(df, settings, **helper.extra_linker_args())
+
+    started = []
+
+    @contextmanager
+    def hook(span):
+        started.append(span.name)
+        yield
+
+    filepath = str(tmp_path / "spans.jsonl")
+    linker.add_tracing_hook(hook)
+    linker.add_tracing_hook(JsonLinesSpanExporter(filepath))
+
+    linker.estimate_parameters_using_expectation_maximisation(
+        "l.first_name = r.first_name"
+    )
+    df_predict = linker.predict()
+
+    with open(filepath) as f:
+        spans = [json.loads(line) for line in f]
+    assert sorted(started) == sorted(s["name"] for s in spans)
+
+    spans_by_id = {s["span_id"]: s for s in spans}
+    em_iterations = [s for s in spans if s["name"] == "em_iteration"]
+    assert [s["attributes"]["iteration"] for s in em_iterations] == [1, 2]
+    em = spans_by_id[em_iterations[0]["parent_span_id"]]
+    assert em["name"] == "estimate_parameters_using_expectation_maximisation"
+
+    predict = spans[-1]
+    assert predict["name"] == "predict"
+    assert predict["parent_span_id"] is None
+    assert predict["duration_seconds"] >= 0
+    assert predict["attributes"]["row_count"] == len(df_predict.as_pandas_dataframe())
+    assert predict["attributes"]["cache_misses"] >= 1
+
+    pipelines = [
+        s
+        for s in spans
+        if s["name"] == "execute_sql_pipeline"
+        and s["parent_span_id"] == predict["span_id"]
+    ]
+    assert pipelines[-1]["attributes"]["output_templated_name"] == (
+        "__splink__df_predict"
+    )
+    assert all(s["trace_id"] == predict["trace_id"] for s in pipelines)
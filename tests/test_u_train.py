@@ -4,6 +4,7 @@ import pandas as pd
 import pytest
 
 from splink.estimate_u import _proportion_sample_size_link_only
+from splink.exceptions import SplinkException
 from tests.decorator import mark_with_dialects_excluding
 
 
@@ -324,6 +325,109 @@ def test_u_train_multilink(test_helpers, dialect):
     assert cl_no.u_probability == (denom - 10) / denom
 
 
+@mark_with_dialects_excluding()
+def test_u_from_value_frequencies_multilink(test_helpers, dialect):
+    helper = test_helpers[dialect]
+    datas = [
+        [
+            {"unique_id": 1, "name": "John"},
+            {"unique_id": 2, "name": "Robin"},
+        ],
+        [
+            {"unique_id": 1, "name": "Jon"},
+            {"unique_id": 2, "name": "David"},
+            {"unique_id": 3, "name": "Sophie"},
+        ],
+        [
+            {"unique_id": 1, "name": "Eva"},
+            {"unique_id": 2, "name": "David"},
+            {"unique_id": 3, "name": "Alex"},
+            {"unique_id": 4, "name": "Chris"},
+        ],
+        [
+            {"unique_id": 1, "name": "Andy"},
+            {"unique_id": 2, "name": "David"},
+            {"unique_id": 3, "name": "Reece"},
+            {"unique_id": 4, "name": "Adil"},
+            {"unique_id": 5, "name": "Adil"},
+            {"unique_id": 6, "name": "Adil"},
+            {"unique_id": 7, "name": "Adil"},
+        ],
+    ]
+    dfs = list(map(lambda x: helper.convert_frame(pd.DataFrame(x)), datas))
+
+    expected_total_links = 2 * 3 + 2 * 4 + 2 * 7 + 3 * 4 + 3 * 7 + 4 * 7
+    expected_total_links_with_dedupes = (2 + 3 + 4 + 7) * (2 + 3 + 4 + 7 - 1) / 2
+
+    settings = {
+        "link_type": "link_only",
+        "comparisons": [helper.cl.levenshtein_at_thresholds("name", 2)],
+        "blocking_rules_to_generate_predictions": [],
+    }
+
+    for link_type, denom, n_exact in [
+        # David - three pairwise comparisons
+        ("link_only", expected_total_links, 3),
+        # David and Adil
+        ("link_and_dedupe", expected_total_links_with_dedupes, 3 + 6),
+    ]:
+        settings["link_type"] = link_type
+        linker = helper.Linker(dfs, settings, **helper.extra_linker_args())
+        linker.estimate_u_using_value_frequencies(max_pairs=1e4)
+        cc_lev = linker._settings_obj.comparisons[0]
+
+        cl_exact = cc_lev._get_comparison_level_by_comparison_vector_value(2)
+        assert cl_exact.u_probability == pytest.approx(n_exact / denom)
+        # John, Jon (from sampling, which here includes all pairs)
+        cl_lev = cc_lev._get_comparison_level_by_comparison_vector_value(1)
+        assert cl_lev.u_probability == pytest.approx(1 / denom)
+        cl_no = cc_lev._get_comparison_level_by_comparison_vector_value(0)
+        assert cl_no.u_probability == pytest.approx((denom - n_exact - 1) / denom)
+
+
+@mark_with_dialects_excluding()
+def test_u_from_value_frequencies_with_nulls(test_helpers, dialect):
+    helper = test_helpers[dialect]
+    data = [
+        {"unique_id": 1, "name": "Amanda", "city": "London"},
+        {"unique_id": 2, "name": "Robin", "city": "London"},
+        {"unique_id": 3, "name": None, "city": "London"},
+        {"unique_id": 4, "name": "Amanda", "city": "Leeds"},
+        {"unique_id": 5, "name": "Amanda", "city": None},
+        {"unique_id": 6, "name": None, "city": "Leeds"},
+    ]
+    df = helper.convert_frame(pd.DataFrame(data))
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.exact_match("name"),
+            # No null level, so nulls fall into the else level
+            {
+                "output_column_name": "city",
+                "comparison_levels": [
+                    {"sql_condition": "city_l = city_r"},
+                    {"sql_condition": "ELSE"},
+                ],
+            },
+        ],
+    }
+
+    linker = helper.Linker(df, settings, **helper.extra_linker_args())
+    linker.estimate_u_using_value_frequencies()
+    cc_name, cc_city = linker._settings_obj.comparisons
+
+    # Four non-null names, with three pairs of Amandas
+    cl_exact = cc_name._get_comparison_level_by_comparison_vector_value(1)
+    assert cl_exact.u_probability == pytest.approx(3 / 6)
+
+    # Six records, with three pairs of London and one pair of Leeds
+    cl_exact = cc_city._get_comparison_level_by_comparison_vector_value(1)
+    assert cl_exact.u_probability == pytest.approx(4 / 15)
+    cl_else = cc_city._get_comparison_level_by_comparison_vector_value(0)
+    assert cl_else.u_probability == pytest.approx(11 / 15)
+
+
 # No SQLite or Postgres - don't support random seed
 @mark_with_dialects_excluding("sqlite", "postgres")
 def test_seed_u_outputs(test_helpers, dialect):
@@ -351,3 +455,95 @@ def test_seed_u_outputs(test_helpers, dialect):
         linker_1._settings_obj._parameter_estimates_as_records
         != linker_3._settings_obj._parameter_estimates_as_records
     )
+
+
+# No SQLite or Postgres - don't support random seed
+@mark_with_dialects_excluding("sqlite", "postgres")
+def test_adaptive_u_estimation(test_helpers, dialect):
+    helper = test_helpers[dialect]
+    df = helper.load_frame_from_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+
+    settings = {
+        "link_type": "dedupe_only",
+        "comparisons": [
+            helper.cl.levenshtein_at_thresholds("first_name", 2),
+            helper.cl.exact_match("surname"),
+        ],
+    }
+
+    def u_probabilities(linker):
+        return [
+            cl.u_probability
+            for cc in linker._settings_obj.comparisons
+            for cl in cc._comparison_levels_excluding_null
+        ]
+
+    # A loose target is met by the first chunk, which is the same sample as a
+    # single call with the same number of pairs
+    linker_single = helper.Linker(df, settings, **helper.extra_linker_args())
+    linker_single.estimate_u_using_random_sampling(max_pairs=1e3, seed=1)
+    linker_loose = helper.Linker(df, settings, **helper.extra_linker_args())
+    linker_loose.estimate_u_using_random_sampling(
+        max_pairs=1e4, seed=1, target_relative_standard_error=10, pairs_per_chunk=1e3
+    )
+    assert u_probabilities(linker_loose) == pytest.approx(
+        u_probabilities(linker_single)
+    )
+
+    # An unreachable target runs until max_pairs, and is reproducible
+    def train_to_budget():
+        linker = helper.Linker(df, settings, **helper.extra_linker_args())
+        linker.estimate_u_using_random_sampling(
+            max_pairs=1e4,
+            seed=1,
+            target_relative_standard_error=1e-6,
+            pairs_per_chunk=2e3,
+        )
+        return linker
+
+    linker_budget = train_to_budget()
+    assert u_probabilities(linker_budget) == u_probabilities(train_to_budget())
+    assert u_probabilities(linker_budget) != pytest.approx(
+        u_probabilities(linker_single)
+    )
+    for u in u_probabilities(linker_budget):
+        assert 0 < u < 1
+    assert sum(u_probabilities(linker_budget)[:3]) == pytest.approx(1.0)
+
+    cl = linker_budget._settings_obj.comparisons[1].comparison_levels[1]
+    descriptions = [r["description"] for r in cl._trained_u_probabilities]
+    assert descriptions == ["estimate u by adaptive random sampling"]
+
+    # A time budget alone also triggers adaptive mode, and always runs one chunk
+    linker_timed = helper.Linker(df, settings, **helper.extra_linker_args())
+    linker_timed.estimate_u_using_random_sampling(
+        max_pairs=1e4, seed=1, max_seconds=0, pairs_per_chunk=1e3
+    )
+    assert u_probabilities(linker_timed) == pytest.approx(
+        u_probabilities(linker_single)
+    )
+
+    # When a chunk compares every pair, sampling stops after that chunk, as more
+    # chunks would repeat the same comparisons
+    def train_exhaustively(df):
+        linker = helper.Linker(df, settings, **helper.extra_linker_args())
+        linker.estimate_u_using_random_sampling(
+            max_pairs=1e6,
+            seed=1,
+            target_relative_standard_error=1e-6,
+            pairs_per_chunk=1e3,
+        )
+        return linker
+
+    df_pd = pd.read_csv("./tests/datasets/fake_1000_from_splink_demos.csv")
+    df_small = helper.convert_frame(df_pd.head(20))
+    linker_small = helper.Linker(df_small, settings, **helper.extra_linker_args())
+    linker_small.estimate_u_using_random_sampling(max_pairs=1e3, seed=1)
+    assert u_probabilities(train_exhaustively(df_small)) == pytest.approx(
+        u_probabilities(linker_small)
+    )
+
+    # A sample without any pairs is an error, rather than sampling forever
+    df_single = helper.convert_frame(df_pd.head(1))
+    with pytest.raises(SplinkException, match="no pairwise comparisons"):
+        train_exhaustively(df_single)